@@ -0,0 +1,39 @@
+"""Add transaction keyset pagination indexes
+
+Revision ID: 0b7d4e9a3c15
+Revises: f2c5d8a17b3e
+Create Date: 2025-07-20 09:12:37.504816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d4e9a3c15'
+down_revision: Union[str, Sequence[str], None] = 'f2c5d8a17b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_transaction_account_date_id',
+        'transaction',
+        ['account_id', 'transaction_date', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_transaction_date_id',
+        'transaction',
+        ['transaction_date', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_date_id', table_name='transaction')
+    op.drop_index('ix_transaction_account_date_id', table_name='transaction')
@@ -0,0 +1,56 @@
+"""Add indexes for hot transaction queries
+
+Revision ID: 1c9e5f2b7a48
+Revises: 0b7d4e9a3c15
+Create Date: 2025-07-21 15:48:09.336120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c9e5f2b7a48'
+down_revision: Union[str, Sequence[str], None] = '0b7d4e9a3c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # transaction.account_id 已由键集分页的 (account_id, transaction_date, id) 索引覆盖，
+    # 这里补齐其余外键和按用户过滤所需的索引。
+    op.create_index(
+        op.f('ix_account_owner_id'), 'account', ['owner_id'], unique=False
+    )
+    op.create_index(
+        op.f('ix_file_metadata_account_id'),
+        'file_metadata',
+        ['account_id'],
+        unique=False,
+    )
+    op.create_index(
+        op.f('ix_transaction_counterparty_id'),
+        'transaction',
+        ['counterparty_id'],
+        unique=False,
+    )
+    # 对手方汇总的覆盖索引：按账户过滤、按对手方聚合，只扫描索引即可
+    op.create_index(
+        'ix_transaction_account_counterparty_summary',
+        'transaction',
+        ['account_id', 'counterparty_id'],
+        unique=False,
+        postgresql_include=['transaction_type', 'amount'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_transaction_account_counterparty_summary', table_name='transaction'
+    )
+    op.drop_index(op.f('ix_transaction_counterparty_id'), table_name='transaction')
+    op.drop_index(op.f('ix_file_metadata_account_id'), table_name='file_metadata')
+    op.drop_index(op.f('ix_account_owner_id'), table_name='account')
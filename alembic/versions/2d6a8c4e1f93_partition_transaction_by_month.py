@@ -0,0 +1,187 @@
+"""Partition transaction by month and add transaction_dedup
+
+Revision ID: 2d6a8c4e1f93
+Revises: 1c9e5f2b7a48
+Create Date: 2025-07-23 10:31:16.742058
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d6a8c4e1f93'
+down_revision: Union[str, Sequence[str], None] = '1c9e5f2b7a48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_COLUMNS = (
+    "id, transaction_date, amount, currency, transaction_type, description, "
+    "transaction_method, balance_after_txn, bank_transaction_id, is_cash, "
+    "location, branch_name, category, account_id, counterparty_id"
+)
+
+# 交易表上除主键以外的全部索引，分区前后都要重建
+_INDEXES = (
+    ('ix_transaction_id', ['id'], {}),
+    ('ix_transaction_transaction_date', ['transaction_date'], {}),
+    ('ix_transaction_category', ['category'], {}),
+    ('ix_transaction_counterparty_id', ['counterparty_id'], {}),
+    ('ix_transaction_account_date_id', ['account_id', 'transaction_date', 'id'], {}),
+    ('ix_transaction_date_id', ['transaction_date', 'id'], {}),
+    (
+        'ix_transaction_account_counterparty_summary',
+        ['account_id', 'counterparty_id'],
+        {'postgresql_include': ['transaction_type', 'amount']},
+    ),
+)
+
+# 迁移时提前创建的月份数，与 settings.PARTITION_PRECREATE_MONTHS 的默认值一致
+_UPCOMING_MONTHS = 3
+
+
+def _transaction_table(name: str, primary_key: list[str], **kw) -> None:
+    op.create_table(name,
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('transaction_id_seq'::regclass)"), nullable=False),
+    sa.Column('transaction_date', sa.DateTime(timezone=True), nullable=False, comment='交易发生的精确日期和时间'),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False, comment='交易金额。正数为收入，负数为支出。'),
+    sa.Column('currency', sa.String(length=3), nullable=False, comment='货币类型，如“CNY”'),
+    sa.Column('transaction_type', sa.String(), nullable=False, comment="交易类型, 'DEBIT' (支出) 或 'CREDIT' (收入)"),
+    sa.Column('description', sa.String(), nullable=False, comment='银行提供的交易摘要或描述'),
+    sa.Column('transaction_method', sa.String(), nullable=True, comment="原始交易类型或渠道，如'快捷支付'"),
+    sa.Column('balance_after_txn', sa.Numeric(precision=12, scale=2), nullable=True, comment='此次交易发生后，本方账户的余额'),
+    sa.Column('bank_transaction_id', sa.String(), nullable=False, comment='银行系统生成的唯一交易流水号'),
+    sa.Column('is_cash', sa.Boolean(), nullable=False, comment='是否为现金交易'),
+    sa.Column('location', sa.String(), nullable=True, comment='交易发生地点'),
+    sa.Column('branch_name', sa.String(), nullable=True, comment='交易发生的具体网点名称'),
+    sa.Column('category', sa.String(), nullable=True, comment='由系统分析得出的交易分类'),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('counterparty_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], name='transaction_account_id_fkey'),
+    sa.ForeignKeyConstraint(['counterparty_id'], ['counterparty.id'], name='transaction_counterparty_id_fkey'),
+    sa.PrimaryKeyConstraint(*primary_key, name='transaction_pkey'),
+    **kw,
+    )
+
+
+def _create_indexes(bank_transaction_id_unique: bool) -> None:
+    op.create_index(
+        'ix_transaction_bank_transaction_id',
+        'transaction',
+        ['bank_transaction_id'],
+        unique=bank_transaction_id_unique,
+    )
+    for name, columns, kw in _INDEXES:
+        op.create_index(name, 'transaction', columns, unique=False, **kw)
+
+
+def _drop_indexes() -> None:
+    op.drop_index('ix_transaction_bank_transaction_id', table_name='transaction')
+    for name, _, _ in _INDEXES:
+        op.drop_index(name, table_name='transaction')
+
+
+def _month_start(value: datetime.datetime) -> datetime.date:
+    value = value.astimezone(datetime.UTC)
+    return datetime.date(value.year, value.month, 1)
+
+
+def _next_month(month: datetime.date) -> datetime.date:
+    return datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. 旧表改名，腾出表名、主键名和索引名；序列与旧表解绑，新表继续沿用，保持 id 连续
+    _drop_indexes()
+    op.rename_table('transaction', 'transaction_legacy')
+    op.execute(
+        'ALTER TABLE transaction_legacy '
+        'RENAME CONSTRAINT transaction_pkey TO transaction_legacy_pkey'
+    )
+    op.execute('ALTER TABLE transaction_legacy ALTER COLUMN id DROP DEFAULT')
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY NONE')
+
+    # 2. 按 transaction_date 范围分区的新表，主键必须包含分区键
+    _transaction_table(
+        'transaction',
+        ['id', 'transaction_date'],
+        postgresql_partition_by='RANGE (transaction_date)',
+    )
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id')
+    _create_indexes(bank_transaction_id_unique=False)
+
+    # 3. 流水号去重表，取代原先流水号上的全局唯一索引
+    op.create_table('transaction_dedup',
+    sa.Column('bank_transaction_id', sa.String(), nullable=False),
+    sa.Column('transaction_date', sa.DateTime(timezone=True), nullable=False, comment='对应交易的日期，按流水号查找交易时可用于分区裁剪'),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('bank_transaction_id')
+    )
+    op.create_index(op.f('ix_transaction_dedup_account_id'), 'transaction_dedup', ['account_id'], unique=False)
+
+    # 4. 为已有数据覆盖的每个月建立分区，并提前建好之后几个月的分区；
+    # 再往后的月份由定时任务提前创建，更早的月份在入库前按需创建
+    first, last = op.get_bind().execute(
+        sa.text(
+            'SELECT min(transaction_date), max(transaction_date) '
+            'FROM transaction_legacy'
+        )
+    ).one()
+    now = datetime.datetime.now(datetime.UTC)
+    upcoming = _month_start(now)
+    for _ in range(_UPCOMING_MONTHS):
+        upcoming = _next_month(upcoming)
+    month = _month_start(first or now)
+    last_month = max(_month_start(last or now), upcoming)
+    while month <= last_month:
+        following = _next_month(month)
+        op.execute(
+            f'CREATE TABLE "transaction_p{month.year:04d}{month.month:02d}" '
+            f'PARTITION OF "transaction" FOR VALUES '
+            f"FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{following.isoformat()} 00:00:00+00')"
+        )
+        month = following
+
+    # 5. 迁移数据并删除旧表
+    op.execute(
+        f'INSERT INTO "transaction" ({_COLUMNS}) '
+        f'SELECT {_COLUMNS} FROM transaction_legacy'
+    )
+    op.execute(
+        'INSERT INTO transaction_dedup '
+        '(bank_transaction_id, transaction_date, account_id) '
+        'SELECT bank_transaction_id, transaction_date, account_id '
+        'FROM transaction_legacy'
+    )
+    op.drop_table('transaction_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 分区表改名后重建为普通表，删除分区表时会一并删除全部分区
+    _drop_indexes()
+    op.rename_table('transaction', 'transaction_partitioned')
+    op.execute(
+        'ALTER TABLE transaction_partitioned '
+        'RENAME CONSTRAINT transaction_pkey TO transaction_partitioned_pkey'
+    )
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY NONE')
+
+    _transaction_table('transaction', ['id'])
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id')
+    op.execute(
+        f'INSERT INTO "transaction" ({_COLUMNS}) '
+        f'SELECT {_COLUMNS} FROM transaction_partitioned'
+    )
+    op.drop_table('transaction_partitioned')
+    _create_indexes(bank_transaction_id_unique=True)
+
+    op.drop_index(op.f('ix_transaction_dedup_account_id'), table_name='transaction_dedup')
+    op.drop_table('transaction_dedup')
@@ -0,0 +1,53 @@
+"""Add person_counterparty_summary
+
+Revision ID: 3e7b9d5f2a61
+Revises: 2d6a8c4e1f93
+Create Date: 2025-07-24 16:20:58.103947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7b9d5f2a61'
+down_revision: Union[str, Sequence[str], None] = '2d6a8c4e1f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('person_counterparty_summary',
+    sa.Column('person_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False, comment='对手方名称'),
+    sa.Column('total_income', sa.Numeric(precision=16, scale=2), nullable=False, comment='收入合计（CREDIT 交易金额之和）'),
+    sa.Column('total_expense', sa.Numeric(precision=16, scale=2), nullable=False, comment='支出合计（DEBIT 交易金额之和）'),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['person_id'], ['person.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('person_id', 'name')
+    )
+    # 用已有的交易填充汇总表
+    op.execute(
+        """
+        INSERT INTO person_counterparty_summary
+            (person_id, name, total_income, total_expense, transaction_count)
+        SELECT
+            a.owner_id,
+            c.name,
+            sum(CASE WHEN t.transaction_type = 'CREDIT' THEN t.amount ELSE 0 END),
+            sum(CASE WHEN t.transaction_type = 'DEBIT' THEN t.amount ELSE 0 END),
+            count(*)
+        FROM "transaction" AS t
+        JOIN account AS a ON a.id = t.account_id
+        JOIN counterparty AS c ON c.id = t.counterparty_id
+        GROUP BY a.owner_id, c.name
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('person_counterparty_summary')
@@ -0,0 +1,60 @@
+"""Add account_daily_rollup
+
+Revision ID: 4f8c1a6e3b72
+Revises: 3e7b9d5f2a61
+Create Date: 2025-07-25 11:42:30.581264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8c1a6e3b72'
+down_revision: Union[str, Sequence[str], None] = '3e7b9d5f2a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('account_daily_rollup',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False, comment='北京时间的自然日'),
+    sa.Column('credit_total', sa.Numeric(precision=16, scale=2), nullable=False, comment='当日收入合计'),
+    sa.Column('debit_total', sa.Numeric(precision=16, scale=2), nullable=False, comment='当日支出合计（负数）'),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('cash_count', sa.Integer(), nullable=False, comment='当日现金交易笔数'),
+    sa.Column('closing_balance', sa.Numeric(precision=12, scale=2), nullable=True, comment='当日最后一笔带余额的交易之后的余额'),
+    sa.Column('closing_at', sa.DateTime(timezone=True), nullable=True, comment='closing_balance 对应交易的时间，增量累加时据此判断哪一笔更晚'),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('account_id', 'day')
+    )
+    # 用已有的交易填充日汇总表
+    op.execute(
+        """
+        INSERT INTO account_daily_rollup (
+            account_id, day, credit_total, debit_total, transaction_count,
+            cash_count, closing_balance, closing_at
+        )
+        SELECT
+            t.account_id,
+            (t.transaction_date AT TIME ZONE 'Asia/Shanghai')::date,
+            sum(CASE WHEN t.transaction_type = 'CREDIT' THEN t.amount ELSE 0 END),
+            sum(CASE WHEN t.transaction_type = 'DEBIT' THEN t.amount ELSE 0 END),
+            count(*),
+            count(*) FILTER (WHERE t.is_cash),
+            (array_agg(t.balance_after_txn ORDER BY t.transaction_date DESC)
+                FILTER (WHERE t.balance_after_txn IS NOT NULL))[1],
+            max(t.transaction_date) FILTER (WHERE t.balance_after_txn IS NOT NULL)
+        FROM "transaction" AS t
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_daily_rollup')
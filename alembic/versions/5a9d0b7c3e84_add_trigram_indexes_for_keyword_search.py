@@ -0,0 +1,53 @@
+"""Add pg_trgm indexes for transaction keyword search
+
+Revision ID: 5a9d0b7c3e84
+Revises: 4f8c1a6e3b72
+Create Date: 2025-07-26 16:05:47.219438
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9d0b7c3e84'
+down_revision: Union[str, Sequence[str], None] = '4f8c1a6e3b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 关键字搜索匹配的交易文本列
+_TRANSACTION_COLUMNS = ('description', 'transaction_method', 'location', 'branch_name')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm 随 PostgreSQL 的 contrib 模块发布，官方镜像中可以直接启用
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # 在分区表上建索引会同时为每个分区建立对应的索引，之后新建的分区也会自动继承
+    for column in _TRANSACTION_COLUMNS:
+        op.create_index(
+            f'ix_transaction_{column}_trgm',
+            'transaction',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+    op.create_index(
+        'ix_counterparty_name_trgm',
+        'counterparty',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 扩展可能被其他对象使用，降级时保留
+    op.drop_index('ix_counterparty_name_trgm', table_name='counterparty')
+    for column in reversed(_TRANSACTION_COLUMNS):
+        op.drop_index(f'ix_transaction_{column}_trgm', table_name='transaction')
@@ -0,0 +1,49 @@
+"""Add closing_transaction_id to account_daily_rollup
+
+Revision ID: 6b1e4d8f2c57
+Revises: 5a9d0b7c3e84
+Create Date: 2025-07-27 10:18:06.472913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1e4d8f2c57'
+down_revision: Union[str, Sequence[str], None] = '5a9d0b7c3e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('account_daily_rollup', sa.Column('closing_transaction_id', sa.Integer(), nullable=True, comment='closing_balance 对应交易的 id，交易时间相同时按 id 判断先后'))
+    # 按 (transaction_date, id) 重新确定每天的期末余额，之前同一时间的多笔交易取值不确定
+    op.execute(
+        """
+        UPDATE account_daily_rollup AS r
+        SET closing_balance = c.balance_after_txn,
+            closing_at = c.transaction_date,
+            closing_transaction_id = c.id
+        FROM (
+            SELECT DISTINCT ON (1, 2)
+                t.account_id,
+                (t.transaction_date AT TIME ZONE 'Asia/Shanghai')::date AS day,
+                t.balance_after_txn,
+                t.transaction_date,
+                t.id
+            FROM "transaction" AS t
+            WHERE t.balance_after_txn IS NOT NULL
+            ORDER BY 1, 2, t.transaction_date DESC, t.id DESC
+        ) AS c
+        WHERE r.account_id = c.account_id AND r.day = c.day
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('account_daily_rollup', 'closing_transaction_id')
@@ -0,0 +1,28 @@
+"""Add file_metadata parts_started_at
+
+Revision ID: 7c3f5e2a9d14
+Revises: 6b1e4d8f2c57
+Create Date: 2025-07-28 15:42:19.203871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3f5e2a9d14'
+down_revision: Union[str, Sequence[str], None] = '6b1e4d8f2c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file_metadata', sa.Column('parts_started_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file_metadata', 'parts_started_at')
@@ -0,0 +1,71 @@
+"""Add counterparty unique identity indexes
+
+Revision ID: a5ca64409e20
+Revises: 919b4b83d8c3
+Create Date: 2025-07-12 10:05:41.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5ca64409e20'
+down_revision: Union[str, Sequence[str], None] = '919b4b83d8c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. 纯空白的账号视为“无账号”，与解析服务的判断保持一致
+    op.execute(
+        "UPDATE counterparty SET account_number = NULL "
+        "WHERE btrim(account_number) = ''"
+    )
+
+    # 2. 合并历史上可能产生的重复对手方：交易统一指向最小ID，再删除多余记录
+    for partition_sql in (
+        "SELECT id, min(id) OVER (PARTITION BY account_number) AS keep_id "
+        "FROM counterparty WHERE account_number IS NOT NULL",
+        "SELECT id, min(id) OVER (PARTITION BY name) AS keep_id "
+        "FROM counterparty WHERE account_number IS NULL",
+    ):
+        op.execute(
+            f"""
+            UPDATE "transaction" AS t SET counterparty_id = d.keep_id
+            FROM ({partition_sql}) AS d
+            WHERE t.counterparty_id = d.id AND d.id <> d.keep_id
+            """
+        )
+        op.execute(
+            f"""
+            DELETE FROM counterparty AS c
+            USING ({partition_sql}) AS d
+            WHERE c.id = d.id AND d.id <> d.keep_id
+            """
+        )
+
+    # 3. 建立部分唯一索引，作为批量 upsert 的冲突目标
+    op.create_index(
+        'uq_counterparty_account_number',
+        'counterparty',
+        ['account_number'],
+        unique=True,
+        postgresql_where=sa.text('account_number IS NOT NULL'),
+    )
+    op.create_index(
+        'uq_counterparty_name_without_account',
+        'counterparty',
+        ['name'],
+        unique=True,
+        postgresql_where=sa.text('account_number IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_counterparty_name_without_account', table_name='counterparty')
+    op.drop_index('uq_counterparty_account_number', table_name='counterparty')
@@ -0,0 +1,28 @@
+"""Add file_metadata metrics
+
+Revision ID: c3e1f0a7d912
+Revises: a5ca64409e20
+Create Date: 2025-07-13 09:42:17.503821
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e1f0a7d912'
+down_revision: Union[str, Sequence[str], None] = 'a5ca64409e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file_metadata', sa.Column('metrics', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file_metadata', 'metrics')
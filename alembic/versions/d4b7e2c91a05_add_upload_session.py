@@ -0,0 +1,41 @@
+"""Add upload_session
+
+Revision ID: d4b7e2c91a05
+Revises: c3e1f0a7d912
+Create Date: 2025-07-14 10:18:05.216347
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b7e2c91a05'
+down_revision: Union[str, Sequence[str], None] = 'c3e1f0a7d912'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_session',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('mime_type', sa.String(), nullable=False),
+    sa.Column('filesize', sa.BigInteger(), nullable=False, comment='客户端声明的文件总大小'),
+    sa.Column('received_bytes', sa.BigInteger(), nullable=False, comment='已连续写入磁盘的字节数，即下一个数据块的偏移量'),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['file_id'], ['file_metadata.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('upload_session')
@@ -0,0 +1,42 @@
+"""Add upload_batch and file_metadata.batch_id
+
+Revision ID: e81f3a6c2d47
+Revises: d4b7e2c91a05
+Create Date: 2025-07-15 14:03:51.872409
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f3a6c2d47'
+down_revision: Union[str, Sequence[str], None] = 'd4b7e2c91a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_batch',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_batch_id'), 'upload_batch', ['id'], unique=False)
+    op.add_column('file_metadata', sa.Column('batch_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_file_metadata_batch_id'), 'file_metadata', ['batch_id'], unique=False)
+    op.create_foreign_key(op.f('file_metadata_batch_id_fkey'), 'file_metadata', 'upload_batch', ['batch_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('file_metadata_batch_id_fkey'), 'file_metadata', type_='foreignkey')
+    op.drop_index(op.f('ix_file_metadata_batch_id'), table_name='file_metadata')
+    op.drop_column('file_metadata', 'batch_id')
+    op.drop_index(op.f('ix_upload_batch_id'), table_name='upload_batch')
+    op.drop_table('upload_batch')
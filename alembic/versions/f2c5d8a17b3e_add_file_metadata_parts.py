@@ -0,0 +1,32 @@
+"""Add file_metadata part counters
+
+Revision ID: f2c5d8a17b3e
+Revises: e81f3a6c2d47
+Create Date: 2025-07-16 11:27:44.609152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c5d8a17b3e'
+down_revision: Union[str, Sequence[str], None] = 'e81f3a6c2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file_metadata', sa.Column('parts_total', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('file_metadata', sa.Column('parts_done', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('file_metadata', sa.Column('parts_failed', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file_metadata', 'parts_failed')
+    op.drop_column('file_metadata', 'parts_done')
+    op.drop_column('file_metadata', 'parts_total')
@@ -0,0 +1,56 @@
+# app/api/v1/dependencies.py
+import datetime
+from decimal import Decimal
+from typing import Literal
+
+from fastapi import Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.schemas.transaction import TransactionFilter
+
+
+def get_transaction_filter(
+    start_date: datetime.date | None = Query(
+        None, description="开始日期 (北京时间，包含当天)"
+    ),
+    end_date: datetime.date | None = Query(
+        None, description="结束日期 (北京时间，包含当天)"
+    ),
+    transaction_type: list[Literal["CREDIT", "DEBIT"]] | None = Query(
+        None, description="交易类型，可重复传入多个"
+    ),
+    keyword: str | None = Query(
+        None,
+        max_length=100,
+        description=TransactionFilter.model_fields["keyword"].description,
+    ),
+    counterparty_name: str | None = Query(
+        None, max_length=200, description="对手方名称，精确匹配"
+    ),
+    min_amount: Decimal | None = Query(
+        None, ge=0, description="最小金额 (按绝对值比较，包含)"
+    ),
+    max_amount: Decimal | None = Query(
+        None, ge=0, description="最大金额 (按绝对值比较，包含)"
+    ),
+    is_cash: bool | None = Query(None, description="是否为现金交易"),
+) -> TransactionFilter:
+    """
+    从查询参数构造交易筛选条件，交易列表和看板分析接口共用。
+    列表类型的参数无法用查询参数模型声明，因此逐个声明后再组装。
+    """
+    try:
+        return TransactionFilter(
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            keyword=keyword,
+            counterparty_name=counterparty_name,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            is_cash=is_cash,
+        )
+    except ValidationError as e:
+        # 与其他参数校验失败一样返回 422
+        raise RequestValidationError(e.errors())
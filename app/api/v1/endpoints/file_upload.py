@@ -6,6 +6,9 @@ from fastapi import (
     File,
     Form,
     HTTPException,
+    Path,
+    Query,
+    Request,
     status,
     Response,
 )
@@ -14,11 +17,21 @@ from loguru import logger
 
 from app.core.database import get_db
 from app.services.file_service import file_service, FileService
-from app.schemas.file_metadata import FileMetadataPublic
+from app.services.upload_session_service import UploadSessionService
+from app.schemas.file_metadata import FileHashCheckPublic, FileMetadataPublic
+from app.schemas.upload_session import UploadSessionCreate, UploadSessionPublic
+from app.schemas.upload_batch import UploadBatchPublic, UploadBatchStatus
 
 # 创建一个新的路由器，用于管理文件上传相关的端点
 router = APIRouter(prefix="/files", tags=["File Upload"])
 
+ALLOWED_MIME_TYPES = [
+    "text/csv",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+]
+UNSUPPORTED_TYPE_DETAIL = "文件类型不支持。请上传 Excel (.xls, .xlsx) 或 CSV (.csv) 文件。"
+
 
 @router.post(
     "/upload",
@@ -41,17 +54,9 @@ async def upload_transaction_file(
     - **file**: 要上传的 Excel 或 CSV 文件。
     """
     # 校验文件类型
-    allowed_mime_types = [
-        "text/csv",
-        "application/vnd.ms-excel",
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    ]
-    if file.content_type not in allowed_mime_types:
+    if file.content_type not in ALLOWED_MIME_TYPES:
         logger.warning(f"上传了不支持的文件类型: {file.content_type}")
-        raise HTTPException(
-            status_code=400,
-            detail="文件类型不支持。请上传 Excel (.xls, .xlsx) 或 CSV (.csv) 文件。",
-        )
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_TYPE_DETAIL)
 
     try:
         # 调用服务层处理核心逻辑
@@ -75,6 +80,149 @@ async def upload_transaction_file(
         raise HTTPException(status_code=500, detail="处理文件时发生内部错误。")
 
 
+@router.post(
+    "/batches",
+    response_model=UploadBatchPublic,
+    status_code=status.HTTP_201_CREATED,
+    summary="批量上传多个流水文件或 ZIP 压缩包",
+)
+async def upload_file_batch(
+    session: AsyncSession = Depends(get_db),
+    account_id: int = Form(...),
+    files: list[UploadFile] = File(...),
+    service: FileService = Depends(),
+):
+    """
+    一次上传多个 Excel/CSV 文件，或包含这些文件的 ZIP 压缩包。
+
+    - 已上传过的文件和格式不支持的文件会被跳过，并在 **skipped** 中说明原因；
+    - 每个新文件各自创建后台处理任务，可通过批次状态接口轮询整体进度。
+    """
+    logger.info(f"开始处理批量上传: {len(files)} 个文件 for account_id: {account_id}")
+    return await service.handle_batch_upload(
+        session, files=files, account_id=account_id
+    )
+
+
+@router.get(
+    "/batches/{batch_id}",
+    response_model=UploadBatchStatus,
+    summary="查询批量上传的整体处理状态",
+)
+async def get_upload_batch_status(
+    batch_id: int,
+    session: AsyncSession = Depends(get_db),
+    service: FileService = Depends(),
+):
+    return await service.get_batch_status(session, batch_id=batch_id)
+
+
+@router.post(
+    "/uploads",
+    response_model=UploadSessionPublic,
+    status_code=status.HTTP_201_CREATED,
+    summary="创建可续传的上传会话",
+)
+async def create_upload_session(
+    upload_in: UploadSessionCreate,
+    session: AsyncSession = Depends(get_db),
+    service: UploadSessionService = Depends(),
+):
+    """
+    适用于大文件或不稳定的网络。创建会话后按偏移量分块上传，最后调用 complete 结束。
+    """
+    if upload_in.mime_type not in ALLOWED_MIME_TYPES:
+        logger.warning(f"上传了不支持的文件类型: {upload_in.mime_type}")
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_TYPE_DETAIL)
+    return await service.create_session(session, upload_in=upload_in)
+
+
+@router.get(
+    "/uploads/{upload_id}",
+    response_model=UploadSessionPublic,
+    summary="查询上传会话已接收的字节数",
+)
+async def get_upload_session(
+    upload_id: str,
+    session: AsyncSession = Depends(get_db),
+    service: UploadSessionService = Depends(),
+):
+    """
+    断线重连后先调用此接口，从返回的 received_bytes 处继续上传。
+    """
+    return await service.get_session(session, upload_id=upload_id)
+
+
+@router.put(
+    "/uploads/{upload_id}",
+    response_model=UploadSessionPublic,
+    summary="上传一个数据块",
+)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="数据块在文件中的起始字节位置"),
+    session: AsyncSession = Depends(get_db),
+    service: UploadSessionService = Depends(),
+):
+    """
+    请求体为数据块的原始字节 (application/octet-stream)。
+    offset 必须等于服务器已接收的字节数，否则返回 409。
+    """
+    return await service.append_chunk(
+        session, upload_id=upload_id, offset=offset, chunks=request.stream()
+    )
+
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=FileMetadataPublic,
+    summary="完成上传并创建后台处理任务",
+)
+async def complete_upload_session(
+    upload_id: str,
+    session: AsyncSession = Depends(get_db),
+    service: UploadSessionService = Depends(),
+):
+    return await service.complete(session, upload_id=upload_id)
+
+
+@router.delete(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="放弃上传会话",
+)
+async def abort_upload_session(
+    upload_id: str,
+    session: AsyncSession = Depends(get_db),
+    service: UploadSessionService = Depends(),
+):
+    await service.abort(session, upload_id=upload_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get(
+    "/by_hash/{file_hash}",
+    response_model=FileHashCheckPublic,
+    summary="上传前按 SHA256 检查文件是否已存在",
+)
+async def check_file_hash(
+    file_hash: str = Path(..., pattern=r"^[0-9a-fA-F]{64}$"),
+    session: AsyncSession = Depends(get_db),
+    service: FileService = Depends(),
+):
+    """
+    客户端先在本地计算文件的 SHA256 并调用此接口，
+    如果文件已存在则直接使用返回的处理状态，不必再上传文件内容。
+    """
+    existing_file = await service.find_file_by_hash(session, file_hash=file_hash)
+    return {
+        "file_hash": file_hash.lower(),
+        "exists": existing_file is not None,
+        "file": existing_file,
+    }
+
+
 @router.get(
     "/by_account/{account_id}",
     response_model=list[FileMetadataPublic],
@@ -0,0 +1,68 @@
+# app/api/v1/endpoints/parser_plan.py
+from fastapi import APIRouter, Depends, status, Response
+
+from app.services.parser_plan_service import ParserPlanService
+from app.schemas.parser_plan import (
+    HeaderSignatureRequest,
+    HeaderSignaturePublic,
+    ParserPlan,
+    ParserPlanOverride,
+)
+
+router = APIRouter(prefix="/parser-plans", tags=["Parser Plans"])
+
+
+@router.post(
+    "/signature",
+    response_model=HeaderSignaturePublic,
+    summary="计算表头签名",
+)
+async def compute_signature(
+    header_in: HeaderSignatureRequest,
+    service: ParserPlanService = Depends(),
+):
+    """
+    根据文件表头（按原始顺序的全部列名）计算签名。
+    """
+    return {"signature": service.get_signature(header_in.columns)}
+
+
+@router.get(
+    "/{signature}",
+    response_model=ParserPlan,
+    summary="获取指定表头签名当前生效的解析计划",
+)
+async def get_parser_plan(
+    signature: str,
+    service: ParserPlanService = Depends(),
+):
+    return await service.get_plan(signature)
+
+
+@router.put(
+    "/{signature}",
+    response_model=ParserPlan,
+    summary="强制指定表头签名使用的解析计划",
+)
+async def override_parser_plan(
+    signature: str,
+    plan_in: ParserPlanOverride,
+    service: ParserPlanService = Depends(),
+):
+    """
+    为格式特殊的导出文件设置覆盖计划，优先于自动检测的结果。
+    """
+    return await service.set_override(signature, plan_in)
+
+
+@router.delete(
+    "/{signature}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="删除覆盖计划，恢复自动检测",
+)
+async def delete_parser_plan_override(
+    signature: str,
+    service: ParserPlanService = Depends(),
+):
+    await service.delete_override(signature)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,11 +1,26 @@
 # app/api/v1/endpoints/person.py
-from fastapi import APIRouter, Depends, status, Response
+import datetime
+
+from fastapi import APIRouter, Depends, Query, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.dependencies import get_transaction_filter
 from app.core.database import get_db
+from app.core.responses import typed_json_response
 from app.services.person_service import PersonService
+from app.repository.account_daily_rollup import Granularity
+from app.schemas.analysis import DashboardKpis, FlowPoint, TypeBreakdown
+from app.services.analytics_service import AnalyticsService
 from app.services.transaction_service import TransactionService
-from app.schemas.transaction import TransactionPublic
+from app.schemas.transaction import (
+    TransactionFilter,
+    TransactionPage,
+    TransactionPublic,
+    TransactionRowPage,
+    transaction_list_adapter,
+    transaction_page_adapter,
+    transaction_row_page_adapter,
+)
 from app.services.counterparty_service import CounterpartyService
 from app.schemas.counterparty import CounterpartySummary, CounterpartyAnalysisSummary
 from app.schemas.person import (
@@ -88,14 +103,146 @@ async def get_transactions_for_person(
     person_id: int,
     session: AsyncSession = Depends(get_db),
     service: TransactionService = Depends(),
+    filters: TransactionFilter = Depends(get_transaction_filter),
     skip: int = 0,
     limit: int = 100,
 ):
     """
     获取一个用户所有账户下的全部交易记录，按交易时间升序排序。
+    使用 OFFSET 分页，越往后越慢；逐页读取全部数据时请使用 /transactions/page。
+    """
+    transactions = await service.get_transactions_for_person(
+        session, person_id=person_id, skip=skip, limit=limit, filters=filters
+    )
+    return typed_json_response(
+        transaction_list_adapter, transactions, from_attributes=True
+    )
+
+
+@router.get(
+    "/{person_id}/transactions/page",
+    response_model=TransactionPage,
+    summary="按游标分页获取一个用户所有账户的交易记录",
+)
+async def get_transaction_page_for_person(
+    person_id: int,
+    session: AsyncSession = Depends(get_db),
+    service: TransactionService = Depends(),
+    filters: TransactionFilter = Depends(get_transaction_filter),
+    cursor: str | None = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    按交易时间升序返回一页符合筛选条件的交易记录。
+    每一页的查询代价与页码无关，next_cursor 为空时表示已读完；翻页时请保持筛选条件不变。
+    """
+    page = await service.get_transaction_page_for_person(
+        session, person_id=person_id, cursor=cursor, limit=limit, filters=filters
+    )
+    return typed_json_response(transaction_page_adapter, page)
+
+
+@router.get(
+    "/{person_id}/transactions/rows",
+    response_model=TransactionRowPage,
+    summary="按游标分页获取一个用户所有账户的扁平交易记录",
+)
+async def get_transaction_rows_for_person(
+    person_id: int,
+    session: AsyncSession = Depends(get_db),
+    service: TransactionService = Depends(),
+    filters: TransactionFilter = Depends(get_transaction_filter),
+    cursor: str | None = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """
+    与 /transactions/page 的分页和筛选方式相同，但每条交易是扁平的一行，
+    账户和对手方只给出 id 与名称，适合看板和导出这类一次读取大量交易的场景。
+    """
+    page = await service.get_transaction_rows(
+        session, person_id=person_id, cursor=cursor, limit=limit, filters=filters
+    )
+    return typed_json_response(transaction_row_page_adapter, page)
+
+
+@router.get(
+    "/{person_id}/timeseries",
+    response_model=list[FlowPoint],
+    summary="获取一个用户全部账户按日或按月的收支序列",
+)
+async def get_timeseries_for_person(
+    person_id: int,
+    session: AsyncSession = Depends(get_db),
+    service: AnalyticsService = Depends(),
+    granularity: Granularity = "day",
+    start_date: datetime.date | None = None,
+    end_date: datetime.date | None = None,
+):
+    """
+    读取账户日汇总表并汇总该用户的全部账户，日期按北京时间划分，起止日期均包含在内。
+    """
+    return await service.get_person_timeseries(
+        session,
+        person_id=person_id,
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+@router.get(
+    "/{person_id}/analytics/kpis",
+    response_model=DashboardKpis,
+    summary="获取一个用户所有账户的看板关键指标",
+)
+async def get_kpis_for_person(
+    person_id: int,
+    session: AsyncSession = Depends(get_db),
+    service: AnalyticsService = Depends(),
+    filters: TransactionFilter = Depends(get_transaction_filter),
+):
+    """
+    在数据库中聚合总收入、总支出、交易笔数和期末余额，筛选条件与交易列表相同。
+    """
+    return await service.get_kpis(session, filters=filters, person_id=person_id)
+
+
+@router.get(
+    "/{person_id}/analytics/top-counterparties",
+    response_model=list[CounterpartyAnalysisSummary],
+    summary="获取一个用户所有账户收支最多的对手方",
+)
+async def get_top_counterparties_for_person(
+    person_id: int,
+    session: AsyncSession = Depends(get_db),
+    service: AnalyticsService = Depends(),
+    filters: TransactionFilter = Depends(get_transaction_filter),
+    limit: int = Query(5, ge=1, le=50, description="收入和支出各取前几名"),
+):
+    """
+    按对手方名称聚合，返回收入前 limit 名与支出前 limit 名的并集。
+    """
+    return await service.get_top_counterparties(
+        session, filters=filters, person_id=person_id, limit=limit
+    )
+
+
+@router.get(
+    "/{person_id}/analytics/type-breakdown",
+    response_model=list[TypeBreakdown],
+    summary="获取一个用户所有账户按交易类型的收支构成",
+)
+async def get_type_breakdown_for_person(
+    person_id: int,
+    session: AsyncSession = Depends(get_db),
+    service: AnalyticsService = Depends(),
+    filters: TransactionFilter = Depends(get_transaction_filter),
+):
+    """
+    按交易类型汇总金额与笔数。
     """
-    return await service.get_transactions_for_person(
-        session, person_id=person_id, skip=skip, limit=limit
+    return await service.get_type_breakdown(
+        session, filters=filters, person_id=person_id
     )
 
 
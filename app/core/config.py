@@ -33,6 +33,78 @@ class Settings(BaseSettings):
 
     # 上传文件路径配置
     LOCAL_STORAGE_PATH: str = "uploads/"
+    # 流式接收上传文件时每次读取和写入的字节数
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # 一次批量上传（含 ZIP 解压后）最多接收的文件数
+    UPLOAD_BATCH_MAX_FILES: int = 200
+
+    # 任务队列：小文件进入交互队列并按预估成本设置优先级，大文件、分片和批量上传进入批量队列。
+    # 两个队列由各自的 worker 消费（见 scripts/start_worker.sh），并发可以分别设置
+    TASK_INTERACTIVE_QUEUE: str = "mirror.interactive"
+    TASK_BULK_QUEUE: str = "mirror.bulk"
+    # 预估成本（按格式折算后的字节数）达到此值的文件进入批量队列
+    TASK_BULK_MIN_COST: int = 5 * 1024 * 1024
+    # 交互队列的最高优先级，成本越低优先级越高
+    TASK_MAX_PRIORITY: int = 9
+    # 每个 worker 从队列预取的消息数
+    TASK_INTERACTIVE_PREFETCH: int = 10
+    TASK_BULK_PREFETCH: int = 2
+
+    # 流水入库配置：流式处理时每个数据块的行数
+    INGEST_CHUNK_SIZE: int = 20000
+    # 超过此大小（字节）的文件拆分为多个分片，由不同 worker 并行入库，0 表示不拆分
+    INGEST_PARALLEL_MIN_BYTES: int = 20 * 1024 * 1024
+    # 每个分片大约包含的行数
+    INGEST_PART_ROWS: int = 100000
+    # 拆分后超过此时间（秒）仍未全部结束的文件，其余分片视为丢失，文件标记为失败
+    INGEST_PART_TIMEOUT_SECONDS: int = 2 * 3600
+    # 检查超时分片的定时任务 (cron 表达式)，由 taskiq scheduler 触发
+    INGEST_PART_RECONCILE_CRON: str = "*/10 * * * *"
+    # 交易入库方式："copy" 使用 COPY 暂存表合并，"insert" 使用多行 INSERT
+    TRANSACTION_LOADER: str = "copy"
+    # 交易表按月分区：定时任务提前创建当前月份之后几个月的分区，以及该任务的 cron 表达式
+    PARTITION_PRECREATE_MONTHS: int = 3
+    PARTITION_PRECREATE_CRON: str = "0 3 * * *"
+    # Worker 中用于解析和清洗文件的进程数，0 表示在事件循环中直接执行
+    PARSER_PROCESS_WORKERS: int = 2
+    # Excel 读取引擎："auto" 优先使用已安装的 calamine，也可指定 "calamine" / "openpyxl" / "xlrd"
+    EXCEL_ENGINE: str = "auto"
+    # 自动生成的解析计划在 Redis 中的缓存时间（秒）
+    PARSER_PLAN_CACHE_TTL: int = 30 * 24 * 3600
+    # 是否在上传文件旁边缓存解析出的原始表格和清洗结果 (Parquet)
+    PARQUET_CACHE_ENABLED: bool = True
+
+    # 对手方分类关键词，可通过环境变量以 JSON 数组覆盖，例如 COUNTERPARTY_BANK_KEYWORDS='["银行","信用社"]'
+    # 名称命中商户关键词后，再根据支付平台/银行关键词细分类型
+    COUNTERPARTY_MERCHANT_KEYWORDS: list[str] = [
+        "公司",
+        "机构",
+        "科技",
+        "网络",
+        "支付",
+        "技术",
+        "银行",
+        "物业",
+        "管理",
+        "财付通",
+        "支付宝",
+        "银联",
+        "唯品会",
+        "钱袋宝",
+        "微众",
+        "抖音",
+        "电商",
+        "商户",
+        "平台",
+        "快递",
+        "服饰",
+        "股份",
+        "商业",
+        "便购",
+        "餐饮",
+    ]
+    COUNTERPARTY_PAYMENT_KEYWORDS: list[str] = ["支付", "财付通", "支付宝"]
+    COUNTERPARTY_BANK_KEYWORDS: list[str] = ["银行", "银联"]
     
     # 前端URL配置
     API_BASE_URL: str = "http://127.0.0.1:8000/api/v1"
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
     AsyncEngine,
 )
+from sqlalchemy import text
 from sqlalchemy.orm import DeclarativeBase
 from loguru import logger
 from taskiq import TaskiqDepends
@@ -109,4 +110,6 @@ async def create_db_and_tables():
     if not _engine:
         raise Exception("无法创建表，因为数据库引擎未初始化。")
     async with _engine.begin() as conn:
+        # 关键字搜索的 gin_trgm_ops 索引依赖 pg_trgm 扩展
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
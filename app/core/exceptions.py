@@ -1,6 +1,13 @@
 from fastapi import HTTPException, status
 
 
+class BadRequestException(HTTPException):
+    """Base exception for invalid request errors."""
+
+    def __init__(self, detail: str = "Bad request"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
 class NotFoundException(HTTPException):
     """Base exception for resource not found errors."""
 
@@ -26,4 +33,12 @@ class ForbiddenException(HTTPException):
     """Base exception for forbidden access errors."""
 
     def __init__(self, detail: str = "Access forbidden"):
-        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+class ServiceUnavailableException(HTTPException):
+    """Base exception for unavailable dependency errors."""
+
+    def __init__(self, detail: str = "Service unavailable"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail
+        )
@@ -0,0 +1,47 @@
+# app/core/responses.py
+from decimal import Decimal
+from typing import Any, TypeVar
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+
+def _orjson_default(obj: Any) -> Any:
+    """orjson 原生支持 datetime、date、UUID 等类型，其余需要在这里转换"""
+    # 金额在数据库中是 numeric，与 Pydantic 模型中的 float 字段输出保持一致
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    使用 orjson 渲染的 JSON 响应，作为应用的默认响应类。
+
+    输出格式与 FastAPI 默认的 JSONResponse 相同（紧凑、非 ASCII 字符不转义），
+    只是编码更快；另外支持直接传入 Decimal。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+def typed_json_response(
+    adapter: TypeAdapter[T], content: Any, *, from_attributes: bool = False
+) -> Response:
+    """
+    用 TypeAdapter 一次性把整个响应序列化为 JSON 字节。
+
+    FastAPI 会按 response_model 再校验一遍返回值、转成 Python 字典后再编码；
+    对成千上万行的交易列表，这部分开销远大于查询本身。这里直接返回编码好的字节，
+    路由上的 response_model 只用于生成文档，输出与它描述的结构完全一致。
+    content 是 ORM 对象时传 from_attributes=True，只在这里校验一次。
+    """
+    if from_attributes:
+        content = adapter.validate_python(content, from_attributes=True)
+    return Response(content=adapter.dump_json(content), media_type="application/json")
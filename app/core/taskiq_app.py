@@ -1,37 +1,91 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 from loguru import logger
+from taskiq import AsyncTaskiqDecoratedTask, TaskiqScheduler
+from taskiq.schedule_sources import LabelScheduleSource
 from taskiq_aio_pika import AioPikaBroker
 from taskiq_redis import RedisAsyncResultBackend
 
 from app.core.config import settings
 from app.core.database import setup_database_connection, shutdown_database_connection
+from app.tasks.utils.parser_plan import parser_plan_registry
 
 
 class CustomAioPikaBroker(AioPikaBroker):
+    # Worker 进程中用于 CPU 密集型解析的进程池，在 startup 中创建
+    process_pool: ProcessPoolExecutor | None = None
+
+    def _register_task(
+        self, task_name: str, task: AsyncTaskiqDecoratedTask
+    ) -> None:
+        """
+        任务同时登记到全局注册表，这样批量队列的 worker 也能按名称找到
+        用 @broker.task 声明的任务，无需在两个 broker 上重复声明。
+        """
+        super()._register_task(task_name, task)
+        self.global_task_registry[task_name] = task
+
     async def startup(self) -> None:
         """
         TaskIQ worker 启动时调用此方法。
-        在此处初始化数据库引擎和会话。
+        在此处初始化数据库引擎和会话，以及用于解析文件的进程池。
         """
         await super().startup()  # 首先调用父类的启动方法，确保 AioPika 连接建立
         await setup_database_connection()  # 调用通用的数据库设置函数
         logger.info("TaskIQ worker: 数据库引擎和会话工厂已初始化。")
 
+        # 只有 worker 进程需要进程池，FastAPI 应用中的 broker 只负责发送任务
+        if self.is_worker_process and settings.PARSER_PROCESS_WORKERS > 0:
+            # 使用 spawn 启动子进程，避免 fork 继承事件循环和网络连接
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=settings.PARSER_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(
+                f"TaskIQ worker: 解析进程池已创建 ({settings.PARSER_PROCESS_WORKERS} 个进程)。"
+            )
+
     async def shutdown(self) -> None:
         """
         TaskIQ worker 关闭时调用此方法。
-        在此处关闭数据库引擎。
+        在此处等待进程池中的解析任务完成，并关闭数据库引擎和解析计划缓存的 Redis 连接。
         """
         await super().shutdown()  # 首先调用父类的关闭方法，确保 AioPika 连接关闭
+        if self.process_pool is not None:
+            # shutdown(wait=True) 会阻塞，放到线程中执行以免卡住事件循环
+            await asyncio.to_thread(self.process_pool.shutdown, wait=True)
+            self.process_pool = None
+            logger.info("TaskIQ worker: 解析进程池已关闭。")
         await shutdown_database_connection()  # 调用通用的数据库关闭函数
         logger.info("TaskIQ worker: 数据库引擎连接池已关闭。")
+        await parser_plan_registry.close()
 
 
-# 使用您的自定义 broker 类创建 broker 实例
-broker = CustomAioPikaBroker(
+RABBITMQ_URL = (
     f"amqp://{settings.RABBITMQ_USER}:{settings.RABBITMQ_PASSWORD}"
     f"@{settings.RABBITMQ_HOST}:{settings.RABBITMQ_PORT}//"
 )
 
+# 使用您的自定义 broker 类创建 broker 实例
+# 交互队列：用户上传的小文件，队列支持优先级，预估成本越低越先处理
+broker = CustomAioPikaBroker(
+    RABBITMQ_URL,
+    exchange_name=settings.TASK_INTERACTIVE_QUEUE,
+    queue_name=settings.TASK_INTERACTIVE_QUEUE,
+    max_priority=settings.TASK_MAX_PRIORITY,
+    qos=settings.TASK_INTERACTIVE_PREFETCH,
+)
+# 批量队列：大文件、大文件的分片和批量上传，由单独的 worker 消费，不会堵住交互队列。
+# 使用独立的 exchange，两个队列各自只收到发给自己的消息
+bulk_broker = CustomAioPikaBroker(
+    RABBITMQ_URL,
+    exchange_name=settings.TASK_BULK_QUEUE,
+    queue_name=settings.TASK_BULK_QUEUE,
+    qos=settings.TASK_BULK_PREFETCH,
+)
+
 # 创建使用 Redis 的结果后端
 result_backend = RedisAsyncResultBackend(
     f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/2",
@@ -39,6 +93,11 @@ result_backend = RedisAsyncResultBackend(
 
 # 配置 broker
 broker.result_backend = result_backend
+bulk_broker.result_backend = result_backend
+
+# 定时任务：按任务上声明的 schedule 标签（cron）发送到交互队列，
+# 由单独的 scheduler 进程运行（见 scripts/start_scheduler.sh），只能启动一个实例
+scheduler = TaskiqScheduler(broker, sources=[LabelScheduleSource(broker)])
 
 # 导入任务模块 (确保任务被 TaskIQ 发现，防止循环引用)
 # 如果启用任务发现就不需要
@@ -50,3 +109,9 @@ broker.result_backend = result_backend
 
 # 另一个可用的命令
 # uv run taskiq worker app.core.taskiq_app:broker --log-level INFO --tasks-pattern "app/tasks/*.py"
+
+# 批量队列的 worker
+# uv run taskiq worker app.core.taskiq_app:bulk_broker --log-level INFO --fs-discover --max-async-tasks 2
+
+# 定时任务的 scheduler
+# uv run taskiq scheduler app.core.taskiq_app:scheduler --fs-discover
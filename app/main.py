@@ -5,13 +5,21 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.responses import ORJSONResponse
 from app.core.database import (
     setup_database_connection,
     shutdown_database_connection,
 )
-from app.core.taskiq_app import broker
+from app.core.taskiq_app import broker, bulk_broker
 from app.api.v1 import health
-from app.api.v1.endpoints import person, account, transaction, counterparty, file_upload
+from app.api.v1.endpoints import (
+    person,
+    account,
+    transaction,
+    counterparty,
+    file_upload,
+    parser_plan,
+)
 
 
 @asynccontextmanager
@@ -26,6 +34,7 @@ async def lifespan(app: FastAPI):
         logger.critical(f"❌ 数据库初始化失败: {e}")
         raise
     await broker.startup()
+    await bulk_broker.startup()
     logger.info("所有资源加载完毕，应用准备就绪。🚀")
 
     yield
@@ -39,10 +48,16 @@ async def lifespan(app: FastAPI):
         logger.error(f"⚠️ 关闭数据库时出错: {e}")
         raise
     await broker.shutdown()
+    await bulk_broker.shutdown()
     logger.info("资源释放完毕。")
 
 
-app = FastAPI(title=settings.APP_NAME, version="0.1.0", lifespan=lifespan)
+app = FastAPI(
+    title=settings.APP_NAME,
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 
 app.add_middleware(
@@ -60,6 +75,7 @@ app.include_router(account.router, prefix="/api/v1")
 app.include_router(transaction.router, prefix="/api/v1")
 app.include_router(counterparty.router, prefix="/api/v1")
 app.include_router(file_upload.router, prefix="/api/v1")
+app.include_router(parser_plan.router, prefix="/api/v1")
 
 
 @app.exception_handler(Exception)
@@ -1,8 +1,24 @@
 from .account import Account
+from .account_daily_rollup import AccountDailyRollup
 from .counterparty import Counterparty
 from .file_metadata import FileMetadata
 from .person import Person
+from .person_counterparty_summary import PersonCounterpartySummary
 from .transaction import Transaction
+from .transaction_dedup import TransactionDedup
+from .upload_batch import UploadBatch
+from .upload_session import UploadSession
 
 # 可选：声明公开接口（清晰化模块导出）
-__all__ = ["Account", "Counterparty", "FileMetadata", "Person", "Transaction"]
\ No newline at end of file
+__all__ = [
+    "Account",
+    "AccountDailyRollup",
+    "Counterparty",
+    "FileMetadata",
+    "Person",
+    "PersonCounterpartySummary",
+    "Transaction",
+    "TransactionDedup",
+    "UploadBatch",
+    "UploadSession",
+]
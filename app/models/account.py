@@ -35,7 +35,7 @@ class Account(Base):
     )
 
     # Relationship to Person
-    owner_id: Mapped[int] = mapped_column(ForeignKey("person.id"))
+    owner_id: Mapped[int] = mapped_column(ForeignKey("person.id"), index=True)
     owner: Mapped["Person"] = relationship(back_populates="accounts")
 
     # Relationship to Transaction
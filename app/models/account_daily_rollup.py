@@ -0,0 +1,51 @@
+# app/models/account_daily_rollup.py
+import datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+# 按北京时间划分自然日；修改后需要重建汇总表
+ROLLUP_TIMEZONE = "Asia/Shanghai"
+
+
+class AccountDailyRollup(Base):
+    """
+    每个账户每个自然日（北京时间）的收支汇总。
+
+    交易入库时在同一事务中累加，账户删除时随之级联删除，
+    收支趋势等时间序列接口直接读取这张表，而不必扫描全部交易。
+    """
+
+    __tablename__ = "account_daily_rollup"
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("account.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[datetime.date] = mapped_column(
+        Date, primary_key=True, comment="北京时间的自然日"
+    )
+    credit_total: Mapped[float] = mapped_column(
+        Numeric(16, 2), default=0, comment="当日收入合计"
+    )
+    debit_total: Mapped[float] = mapped_column(
+        Numeric(16, 2), default=0, comment="当日支出合计（负数）"
+    )
+    transaction_count: Mapped[int] = mapped_column(Integer, default=0)
+    cash_count: Mapped[int] = mapped_column(
+        Integer, default=0, comment="当日现金交易笔数"
+    )
+    closing_balance: Mapped[float | None] = mapped_column(
+        Numeric(12, 2), nullable=True, comment="当日最后一笔带余额的交易之后的余额"
+    )
+    closing_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="closing_balance 对应交易的时间，增量累加时据此判断哪一笔更晚",
+    )
+    closing_transaction_id: Mapped[int | None] = mapped_column(
+        Integer,
+        nullable=True,
+        comment="closing_balance 对应交易的 id，交易时间相同时按 id 判断先后",
+    )
@@ -1,7 +1,7 @@
 # app/models/counterparty.py
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Integer, String
+from sqlalchemy import Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -16,6 +16,29 @@ class Counterparty(Base):
     """
 
     __tablename__ = "counterparty"
+    __table_args__ = (
+        # 对手方的两条身份规则：有账号时以账号唯一，无账号时以名称唯一。
+        # 批量 upsert 依赖这两个部分唯一索引作为冲突目标。
+        Index(
+            "uq_counterparty_account_number",
+            "account_number",
+            unique=True,
+            postgresql_where=text("account_number IS NOT NULL"),
+        ),
+        Index(
+            "uq_counterparty_name_without_account",
+            "name",
+            unique=True,
+            postgresql_where=text("account_number IS NULL"),
+        ),
+        # 交易的关键字搜索也会按对手方名称做子串匹配
+        Index(
+            "ix_counterparty_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(
@@ -1,6 +1,6 @@
 # app/models/file_metadata.py
 import datetime
-from sqlalchemy import Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import JSON, Integer, String, ForeignKey, DateTime, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -8,6 +8,7 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.models.account import Account
+    from app.models.upload_batch import UploadBatch
 
 
 class FileMetadata(Base):
@@ -26,7 +27,23 @@ class FileMetadata(Base):
         String, default="PENDING"
     )  # PENDING, PROCESSING, SUCCESS, FAILED
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # 入库过程各阶段耗时和行数，结构见 app/tasks/utils/ingestion_metrics.py
+    metrics: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # 大文件拆分为分片并行入库时的进度，未拆分的文件均为 0
+    parts_total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    parts_done: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    parts_failed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # 分片任务开始派发的时间，用于判断分片是否超时
+    parts_started_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
 
     # 关系：这个文件属于哪个银行账户
-    account_id: Mapped[int] = mapped_column(ForeignKey("account.id"))
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id"), index=True)
     account: Mapped["Account"] = relationship(back_populates="files")
+
+    # 关系：通过批量上传创建的文件所属的批次
+    batch_id: Mapped[int | None] = mapped_column(
+        ForeignKey("upload_batch.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    batch: Mapped["UploadBatch | None"] = relationship(back_populates="files")
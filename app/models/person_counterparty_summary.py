@@ -0,0 +1,29 @@
+# app/models/person_counterparty_summary.py
+from sqlalchemy import ForeignKey, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class PersonCounterpartySummary(Base):
+    """
+    按 (用户, 对手方名称) 预先聚合的资金往来汇总。
+
+    交易入库时在同一事务中累加，删除账户时扣减，
+    对手方分析接口直接读取这张表，而不必每次重新聚合该用户的全部交易。
+    数据不一致时可以用 scripts/rebuild_counterparty_summary.py 重建。
+    """
+
+    __tablename__ = "person_counterparty_summary"
+
+    person_id: Mapped[int] = mapped_column(
+        ForeignKey("person.id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String, primary_key=True, comment="对手方名称")
+    total_income: Mapped[float] = mapped_column(
+        Numeric(16, 2), default=0, comment="收入合计（CREDIT 交易金额之和）"
+    )
+    total_expense: Mapped[float] = mapped_column(
+        Numeric(16, 2), default=0, comment="支出合计（DEBIT 交易金额之和）"
+    )
+    transaction_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -2,7 +2,7 @@
 import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Integer, String, ForeignKey, Numeric, DateTime, Boolean
+from sqlalchemy import Index, Integer, String, ForeignKey, Numeric, DateTime, Boolean
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -13,20 +13,64 @@ if TYPE_CHECKING:
     from app.models.counterparty import Counterparty
 
 
+# 关键字搜索匹配的文本列（另外还会匹配对手方名称），每列都有一个 pg_trgm 索引
+KEYWORD_SEARCH_COLUMNS = (
+    "description",
+    "transaction_method",
+    "location",
+    "branch_name",
+)
+
+
 class Transaction(Base):
     """
     事实表，存储每一笔交易的核心事实和元数据。
     字段已按逻辑重要性重新排序。
+
+    按 transaction_date 以自然月（UTC）做范围分区，之后几个月的分区由定时任务提前创建，
+    其余月份在入库事务开始之前按需创建，见 TransactionRepository.ensure_partitions。分区表的主键和唯一约束都必须包含分区键，
+    因此主键为 (id, transaction_date)，流水号的全局去重由 transaction_dedup 表负责。
     """
 
     __tablename__ = "transaction"
+    __table_args__ = (
+        # 交易列表按 (transaction_date, id) 做键集分页，
+        # 单账户查询和跨账户查询各自需要一个与排序一致的复合索引。
+        Index("ix_transaction_account_date_id", "account_id", "transaction_date", "id"),
+        Index("ix_transaction_date_id", "transaction_date", "id"),
+        # 对手方汇总按账户过滤、按对手方聚合，只需要金额和收支类型，
+        # 覆盖索引让这类聚合可以只扫描索引而不回表。
+        Index(
+            "ix_transaction_account_counterparty_summary",
+            "account_id",
+            "counterparty_id",
+            postgresql_include=["transaction_type", "amount"],
+        ),
+        # 关键字搜索是 ILIKE '%关键字%' 的子串匹配，B-tree 索引无能为力；
+        # pg_trgm 的 GIN 索引按三字符切分，中文等非 ASCII 文本同样适用。
+        *(
+            Index(
+                f"ix_transaction_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+            for column in KEYWORD_SEARCH_COLUMNS
+        ),
+        {"postgresql_partition_by": "RANGE (transaction_date)"},
+    )
 
     # --- 身份标识 ---
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True, index=True
+    )
 
     # --- 核心交易事实 ---
     transaction_date: Mapped[datetime.datetime] = mapped_column(
-        DateTime(timezone=True), index=True, comment="交易发生的精确日期和时间"
+        DateTime(timezone=True),
+        primary_key=True,
+        index=True,
+        comment="交易发生的精确日期和时间",
     )
     amount: Mapped[float] = mapped_column(
         Numeric(12, 2), comment="交易金额。正数为收入，负数为支出。"
@@ -49,7 +93,9 @@ class Transaction(Base):
         Numeric(12, 2), nullable=True, comment="此次交易发生后，本方账户的余额"
     )
     bank_transaction_id: Mapped[str] = mapped_column(
-        String, unique=True, index=True, comment="银行系统生成的唯一交易流水号"
+        String,
+        index=True,
+        comment="银行系统生成的唯一交易流水号，由 transaction_dedup 保证唯一",
     )
 
     # --- 法证元数据 (Forensic Metadata) ---
@@ -70,7 +116,9 @@ class Transaction(Base):
 
     # --- 关系外键 (Relationships) ---
     account_id: Mapped[int] = mapped_column(ForeignKey("account.id"))
-    counterparty_id: Mapped[int] = mapped_column(ForeignKey("counterparty.id"))
+    counterparty_id: Mapped[int] = mapped_column(
+        ForeignKey("counterparty.id"), index=True
+    )
 
     # --- ORM 关系属性 ---
     account: Mapped["Account"] = relationship(back_populates="transactions")
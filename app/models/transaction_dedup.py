@@ -0,0 +1,27 @@
+# app/models/transaction_dedup.py
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class TransactionDedup(Base):
+    """
+    交易流水号的去重表。
+
+    transaction 按月分区后，流水号上无法再建立跨分区的唯一索引，
+    入库时先把流水号写入这张表（ON CONFLICT DO NOTHING），只有写入成功的流水号才插入交易表。
+    记录所属账户，账户被删除时随之级联删除，之后重新导入同一份流水不会被误判为重复。
+    """
+
+    __tablename__ = "transaction_dedup"
+
+    bank_transaction_id: Mapped[str] = mapped_column(String, primary_key=True)
+    transaction_date: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), comment="对应交易的日期，按流水号查找交易时可用于分区裁剪"
+    )
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("account.id", ondelete="CASCADE"), index=True
+    )
@@ -0,0 +1,30 @@
+# app/models/upload_batch.py
+import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Integer, ForeignKey, DateTime
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.database import Base
+
+if TYPE_CHECKING:
+    from app.models.file_metadata import FileMetadata
+
+
+class UploadBatch(Base):
+    """
+    一次批量上传（多个文件或一个 ZIP 压缩包）。批次内的每个文件各自创建后台任务，
+    批次的整体状态由其下文件的处理状态汇总得出。
+    """
+
+    __tablename__ = "upload_batch"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC)
+    )
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("account.id", ondelete="CASCADE")
+    )
+    files: Mapped[list["FileMetadata"]] = relationship(back_populates="batch")
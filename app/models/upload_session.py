@@ -0,0 +1,40 @@
+# app/models/upload_session.py
+import datetime
+import uuid
+from sqlalchemy import BigInteger, Integer, String, ForeignKey, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class UploadSession(Base):
+    """
+    可续传上传的会话。客户端按偏移量分块上传，已接收的数据暂存在本地磁盘，
+    全部接收完成后再走与普通上传相同的文件登记流程。
+    """
+
+    __tablename__ = "upload_session"
+
+    id: Mapped[str] = mapped_column(
+        String(32), primary_key=True, default=lambda: uuid.uuid4().hex
+    )
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    mime_type: Mapped[str] = mapped_column(String)
+    filesize: Mapped[int] = mapped_column(BigInteger, comment="客户端声明的文件总大小")
+    received_bytes: Mapped[int] = mapped_column(
+        BigInteger, default=0, comment="已连续写入磁盘的字节数，即下一个数据块的偏移量"
+    )
+    status: Mapped[str] = mapped_column(
+        String, default="UPLOADING"
+    )  # UPLOADING, COMPLETED
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC)
+    )
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("account.id", ondelete="CASCADE")
+    )
+    # 完成后登记的文件
+    file_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("file_metadata.id", ondelete="SET NULL"), nullable=True
+    )
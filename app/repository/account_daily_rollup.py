@@ -0,0 +1,189 @@
+# app/repository/account_daily_rollup.py
+import datetime
+from typing import Any, Literal
+
+from sqlalchemy import Date, Numeric, cast, func, literal, select, text, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.account import Account
+from app.models.account_daily_rollup import ROLLUP_TIMEZONE, AccountDailyRollup
+
+
+def rollup_upsert_sql(source: str, *, where: str = "") -> str:
+    """
+    把一组交易按 (账户, 北京时间自然日) 聚合后累加到日汇总表。
+
+    source 是别名为 d、提供 id、account_id、transaction_date、transaction_type、
+    amount、is_cash、balance_after_txn 七列的数据源。期末余额取当日按
+    (transaction_date, id) 排序最晚的一笔带余额的交易，与 get_kpis 的口径一致，
+    与表中已有的值比较 (closing_at, closing_transaction_id)，保留更晚的那一个。
+
+    与对手方汇总一样，入库时应在提交前对整个事务的新交易只执行一次。
+    """
+    latest = "ORDER BY d.transaction_date DESC, d.id DESC"
+    has_balance = "FILTER (WHERE d.balance_after_txn IS NOT NULL)"
+    is_later = """EXCLUDED.closing_at IS NOT NULL AND (
+                r.closing_at IS NULL
+                OR (EXCLUDED.closing_at, EXCLUDED.closing_transaction_id)
+                    >= (r.closing_at, r.closing_transaction_id)
+            )"""
+    return f"""
+    INSERT INTO account_daily_rollup AS r (
+        account_id, day, credit_total, debit_total, transaction_count, cash_count,
+        closing_balance, closing_at, closing_transaction_id
+    )
+    SELECT
+        d.account_id,
+        (d.transaction_date AT TIME ZONE '{ROLLUP_TIMEZONE}')::date,
+        sum(CASE WHEN d.transaction_type = 'CREDIT' THEN d.amount ELSE 0 END),
+        sum(CASE WHEN d.transaction_type = 'DEBIT' THEN d.amount ELSE 0 END),
+        count(*),
+        count(*) FILTER (WHERE d.is_cash),
+        (array_agg(d.balance_after_txn {latest}) {has_balance})[1],
+        (array_agg(d.transaction_date {latest}) {has_balance})[1],
+        (array_agg(d.id {latest}) {has_balance})[1]
+    FROM {source}
+    {where}
+    GROUP BY 1, 2
+    -- 按主键顺序写入，并发入库时加锁顺序一致
+    ORDER BY 1, 2
+    ON CONFLICT (account_id, day) DO UPDATE SET
+        credit_total = r.credit_total + EXCLUDED.credit_total,
+        debit_total = r.debit_total + EXCLUDED.debit_total,
+        transaction_count = r.transaction_count + EXCLUDED.transaction_count,
+        cash_count = r.cash_count + EXCLUDED.cash_count,
+        closing_balance = CASE
+            WHEN {is_later} THEN EXCLUDED.closing_balance ELSE r.closing_balance
+        END,
+        closing_at = CASE
+            WHEN {is_later} THEN EXCLUDED.closing_at ELSE r.closing_at
+        END,
+        closing_transaction_id = CASE
+            WHEN {is_later}
+            THEN EXCLUDED.closing_transaction_id
+            ELSE r.closing_transaction_id
+        END
+    """
+
+
+Granularity = Literal["day", "month"]
+
+
+class AccountDailyRollupRepository:
+    """
+    AccountDailyRollup 的仓库层。
+
+    与对手方汇总表一样只通过集合式 SQL 增量维护，写入方法都不提交事务。
+    """
+
+    def __init__(self):
+        self.model = AccountDailyRollup
+
+    async def add_from(self, session: AsyncSession, *, source: str) -> None:
+        """【内部方法】把 source 中的交易累加进日汇总表，source 的要求见 rollup_upsert_sql"""
+        await session.execute(text(rollup_upsert_sql(source)))
+
+    async def rebuild(
+        self, session: AsyncSession, *, account_id: int | None = None
+    ) -> int:
+        """
+        【内部方法】根据交易表重新计算日汇总，不传 account_id 时重建全部账户。
+        返回重建后的汇总行数。
+        """
+        if account_id is None:
+            await session.execute(text("DELETE FROM account_daily_rollup"))
+            await session.execute(text(rollup_upsert_sql('"transaction" AS d')))
+        else:
+            await session.execute(
+                text("DELETE FROM account_daily_rollup WHERE account_id = :id"),
+                {"id": account_id},
+            )
+            await session.execute(
+                text(
+                    rollup_upsert_sql(
+                        '"transaction" AS d', where="WHERE d.account_id = :account_id"
+                    )
+                ),
+                {"account_id": account_id},
+            )
+        count_statement = select(func.count()).select_from(self.model)
+        if account_id is not None:
+            count_statement = count_statement.where(
+                self.model.account_id == account_id
+            )
+        return (await session.execute(count_statement)).scalar_one()
+
+    async def get_series(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int | None = None,
+        person_id: int | None = None,
+        granularity: Granularity = "day",
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        按日或按月返回收支序列，可以针对单个账户，也可以汇总一个用户的全部账户。
+
+        先按 (账户, 周期) 聚合并取每个账户在该周期最后的期末余额，
+        再按周期汇总；多个账户时期末余额为本周期内有余额记录的各账户余额之和。
+        """
+        rollup = self.model
+        # 周期以字面量渲染，SELECT 与 GROUP BY 中的表达式才完全一致
+        period = cast(
+            func.date_trunc(literal(granularity, literal_execute=True), rollup.day),
+            Date,
+        ).label("period")
+        last_closing = type_coerce(
+            array_agg(
+                aggregate_order_by(
+                    rollup.closing_balance,
+                    rollup.closing_at.desc(),
+                    rollup.closing_transaction_id.desc(),
+                )
+            ).filter(rollup.closing_balance.is_not(None)),
+            ARRAY(Numeric(12, 2)),
+        )[1]
+
+        per_account = select(
+            rollup.account_id,
+            period,
+            func.sum(rollup.credit_total).label("credit_total"),
+            func.sum(rollup.debit_total).label("debit_total"),
+            func.sum(rollup.transaction_count).label("transaction_count"),
+            func.sum(rollup.cash_count).label("cash_count"),
+            last_closing.label("closing_balance"),
+        )
+        if account_id is not None:
+            per_account = per_account.where(rollup.account_id == account_id)
+        if person_id is not None:
+            per_account = per_account.where(
+                rollup.account_id.in_(
+                    select(Account.id).where(Account.owner_id == person_id)
+                )
+            )
+        if start_date is not None:
+            per_account = per_account.where(rollup.day >= start_date)
+        if end_date is not None:
+            per_account = per_account.where(rollup.day <= end_date)
+        per_account = per_account.group_by(rollup.account_id, period).subquery()
+
+        statement = (
+            select(
+                per_account.c.period,
+                func.sum(per_account.c.credit_total).label("credit_total"),
+                func.sum(per_account.c.debit_total).label("debit_total"),
+                func.sum(per_account.c.transaction_count).label("transaction_count"),
+                func.sum(per_account.c.cash_count).label("cash_count"),
+                func.sum(per_account.c.closing_balance).label("closing_balance"),
+            )
+            .group_by(per_account.c.period)
+            .order_by(per_account.c.period)
+        )
+        result = await session.execute(statement)
+        return [row._asdict() for row in result.all()]
+
+
+account_daily_rollup_repository = AccountDailyRollupRepository()
@@ -3,6 +3,7 @@ from typing import Any
 
 from loguru import logger
 from sqlalchemy import select, and_, func, case
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
@@ -81,6 +82,159 @@ class CounterpartyRepository(
             result = await session.scalars(statement)
             return result.one()
 
+    async def bulk_get_or_create(
+        self,
+        session: AsyncSession,
+        *,
+        counterparties: list[dict[str, Any]],
+        chunk_size: int = 1000,
+    ) -> dict[tuple[str, str | None], int]:
+        """
+        批量获取或创建对手方，返回 (名称, 账号) -> 对手方ID 的映射。
+
+        与 get_or_create 的规则保持一致：
+        1. 有账号时以账号为准，同一账号的不同名称都映射到同一个对手方；
+        2. 没有账号时，按“同名且账号为空”匹配；
+        3. 已有记录的类型会被更新为最新的已知类型，但不会被 UNKNOWN 覆盖。
+
+        只有类型确实需要更新时才改写已有记录，其余已存在的对手方再用只读查询取回ID。
+        文件内的全部数据块在同一事务中提交，改写过的行会一直锁到提交，
+        因此不能让银行、支付宝等各文件共用的对手方每次都被改写。
+
+        参数:
+            counterparties: 由 name / account_number / counterparty_type 组成的字典列表，
+                account_number 为空时必须传 None。
+        """
+        unknown = CounterpartyType.UNKNOWN.value
+
+        # 1. 先在内存中按身份规则去重，同一身份保留第一次出现的名称和最后一个已知类型
+        by_account: dict[str, dict[str, Any]] = {}
+        by_name: dict[str, dict[str, Any]] = {}
+        for item in counterparties:
+            if item["account_number"] is not None:
+                bucket, key = by_account, item["account_number"]
+            else:
+                bucket, key = by_name, item["name"]
+            entry = bucket.get(key)
+            if entry is None:
+                bucket[key] = dict(item)
+            elif item["counterparty_type"] != unknown:
+                entry["counterparty_type"] = item["counterparty_type"]
+
+        # 2. 分别对两类身份执行 upsert，RETURNING 一次性拿回所有ID
+        ids_by_account: dict[str, int] = {}
+        ids_by_name: dict[str, int] = {}
+        for bucket, column, index_where, target in (
+            (
+                by_account,
+                self.model.account_number,
+                self.model.account_number.is_not(None),
+                ids_by_account,
+            ),
+            (
+                by_name,
+                self.model.name,
+                self.model.account_number.is_(None),
+                ids_by_name,
+            ),
+        ):
+            # 按键排序后再写入，保证并发写入时加锁顺序一致，避免死锁
+            rows = [bucket[key] for key in sorted(bucket)]
+            for i in range(0, len(rows), chunk_size):
+                chunk = rows[i : i + chunk_size]
+                statement = insert(self.model).values(chunk)
+                excluded_type = statement.excluded.counterparty_type
+                statement = statement.on_conflict_do_update(
+                    index_elements=[column],
+                    index_where=index_where,
+                    set_={"counterparty_type": excluded_type},
+                    # 类型没有变化或新类型为 UNKNOWN 时不改写，也就不会锁住已有记录
+                    where=and_(
+                        excluded_type != unknown,
+                        self.model.counterparty_type.is_distinct_from(excluded_type),
+                    ),
+                ).returning(self.model.id, column)
+                result = await session.execute(statement)
+                target.update({key: id_ for id_, key in result.all()})
+
+        # 3. 未被改写的已有记录不会出现在 RETURNING 中，按身份只读地查回它们的ID
+        missing = [
+            (entry["name"], account_number)
+            for account_number, entry in by_account.items()
+            if account_number not in ids_by_account
+        ] + [(name, None) for name in by_name if name not in ids_by_name]
+        if missing:
+            found = await self.bulk_get_ids(
+                session, keys=missing, chunk_size=chunk_size
+            )
+            for (name, account_number), id_ in found.items():
+                if account_number is not None:
+                    ids_by_account[account_number] = id_
+                else:
+                    ids_by_name[name] = id_
+
+        logger.info(
+            f"对手方批量解析完成: {len(ids_by_account)} 个按账号, {len(ids_by_name)} 个按名称。"
+        )
+
+        # 4. 将每个输入键映射回对应的ID
+        return {
+            (item["name"], item["account_number"]): (
+                ids_by_account[item["account_number"]]
+                if item["account_number"] is not None
+                else ids_by_name[item["name"]]
+            )
+            for item in counterparties
+        }
+
+    async def bulk_get_ids(
+        self,
+        session: AsyncSession,
+        *,
+        keys: list[tuple[str, str | None]],
+        chunk_size: int = 1000,
+    ) -> dict[tuple[str, str | None], int]:
+        """
+        只读地批量查找已存在的对手方，返回 (名称, 账号) -> 对手方ID 的映射，
+        不存在的键不会出现在结果中。身份规则与 bulk_get_or_create 一致。
+
+        与 upsert 不同，这里不会锁住对手方记录，适合多个事务并行写入同一文件的交易。
+        """
+        account_numbers = sorted(
+            {account_number for _, account_number in keys if account_number is not None}
+        )
+        names = sorted(
+            {name for name, account_number in keys if account_number is None}
+        )
+
+        ids_by_account: dict[str, int] = {}
+        ids_by_name: dict[str, int] = {}
+        for values, column, condition, target in (
+            (
+                account_numbers,
+                self.model.account_number,
+                self.model.account_number.is_not(None),
+                ids_by_account,
+            ),
+            (names, self.model.name, self.model.account_number.is_(None), ids_by_name),
+        ):
+            for i in range(0, len(values), chunk_size):
+                statement = select(self.model.id, column).where(
+                    condition, column.in_(values[i : i + chunk_size])
+                )
+                result = await session.execute(statement)
+                target.update({key: id_ for id_, key in result.all()})
+
+        found: dict[tuple[str, str | None], int] = {}
+        for name, account_number in keys:
+            if account_number is not None:
+                id_ = ids_by_account.get(account_number)
+            else:
+                id_ = ids_by_name.get(name)
+            if id_ is not None:
+                found[(name, account_number)] = id_
+        return found
+
     async def get_summary_by_person_id_grouped_by_name(
         self, session: AsyncSession, *, person_id: int
     ) -> list[dict[str, Any]]:
@@ -1,6 +1,8 @@
 # app/repository/file_metadata.py
+import datetime
 from typing import List
-from sqlalchemy import select
+from sqlalchemy import JSON, Text, cast, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repository.base import BaseRepository
@@ -24,6 +26,118 @@ class FileMetadataRepository(
         result = await session.scalars(statement)
         return result.one_or_none()
 
+    async def get_existing_hashes(
+        self, session: AsyncSession, *, file_hashes: list[str]
+    ) -> set[str]:
+        """
+        一次查询返回给定哈希中已存在于数据库的那些，用于批量上传时的查重。
+        """
+        if not file_hashes:
+            return set()
+        statement = select(self.model.file_hash).where(
+            self.model.file_hash.in_(file_hashes)
+        )
+        result = await session.scalars(statement)
+        return set(result.all())
+
+    async def create_many(
+        self, session: AsyncSession, *, objs_in: list[FileMetadataCreate]
+    ) -> List[FileMetadata]:
+        """
+        【内部方法】用一条多行 INSERT ... RETURNING 批量创建记录，但不提交事务，
+        由服务层在文件落盘后统一提交。
+        """
+        if not objs_in:
+            return []
+        result = await session.scalars(
+            insert(self.model).returning(self.model),
+            [obj_in.model_dump() for obj_in in objs_in],
+        )
+        return list(result.all())
+
+    async def record_part_result(
+        self,
+        session: AsyncSession,
+        *,
+        file_id: int,
+        part_index: int,
+        metrics: dict,
+        failed: bool,
+        error_message: str | None = None,
+    ) -> tuple[int, int, int] | None:
+        """
+        原子地记录一个分片的结果并提交，返回更新后的 (parts_total, parts_done, parts_failed)。
+        计数在数据库中自增，多个 worker 同时完成分片也不会丢失更新；
+        分片的指标按序号写入 metrics["parts"]，由最后结束的分片合并。
+        失败时只保留第一个错误信息。文件已被删除，或分片已全部结束
+        （例如超时后被判定为失败）时不做修改并返回 None。
+        """
+        current = func.coalesce(cast(self.model.metrics, JSONB), literal({}, JSONB))
+        parts = func.coalesce(current.op("->")("parts"), literal({}, JSONB))
+        part = literal({str(part_index): metrics}, JSONB)
+        values = {
+            "metrics": cast(
+                func.jsonb_set(
+                    current, literal(["parts"], ARRAY(Text)), parts.op("||")(part)
+                ),
+                JSON,
+            )
+        }
+        if failed:
+            values |= {
+                "parts_failed": self.model.parts_failed + 1,
+                "error_message": func.coalesce(self.model.error_message, error_message),
+            }
+        else:
+            values["parts_done"] = self.model.parts_done + 1
+        statement = (
+            update(self.model)
+            .where(
+                self.model.id == file_id,
+                self.model.parts_done + self.model.parts_failed
+                < self.model.parts_total,
+            )
+            .values(**values)
+            .returning(
+                self.model.parts_total, self.model.parts_done, self.model.parts_failed
+            )
+        )
+        row = (await session.execute(statement)).one_or_none()
+        await session.commit()
+        return tuple(row) if row is not None else None
+
+    async def fail_stalled_parts(
+        self, session: AsyncSession, *, started_before: datetime.datetime
+    ) -> list[int]:
+        """
+        把在 started_before 之前开始派发、分片仍未全部结束的文件标记为失败并提交，
+        未结束的分片计入 parts_failed，之后迟到的分片结果不会再改变文件状态。
+        条件判断和更新在同一条 UPDATE 中完成，不会与最后一个分片同时结束文件。
+        返回被标记的文件 ID。
+        """
+        finished = self.model.parts_done + self.model.parts_failed
+        unfinished = self.model.parts_total - finished
+        statement = (
+            update(self.model)
+            .where(
+                self.model.processing_status == "PROCESSING",
+                self.model.parts_started_at < started_before,
+                finished < self.model.parts_total,
+            )
+            .values(
+                processing_status="FAILED",
+                error_message=func.coalesce(
+                    self.model.error_message,
+                    func.concat(unfinished, " 个分片超时未完成"),
+                ),
+                parts_failed=self.model.parts_failed + unfinished,
+            )
+            .returning(self.model.id)
+        )
+        file_ids = list((await session.scalars(statement)).all())
+        await session.commit()
+        return file_ids
+
     # --- 查询多个文件 ---
     async def get_multi_by_account_id(
         self, session: AsyncSession, *, account_id: int, skip: int = 0, limit: int = 100
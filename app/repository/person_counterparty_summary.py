@@ -0,0 +1,116 @@
+# app/repository/person_counterparty_summary.py
+from typing import Any
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.person_counterparty_summary import PersonCounterpartySummary
+
+
+def summary_upsert_sql(source: str, *, sign: int = 1, where: str = "") -> str:
+    """
+    把一组交易按 (用户, 对手方名称) 聚合后累加（sign=1）或扣减（sign=-1）到汇总表。
+
+    source 是别名为 d、提供 account_id、counterparty_id、transaction_type、amount
+    四列的数据源，例如入库时暂存新交易的临时表。
+
+    语句内按主键顺序加锁，只能保证单条语句之间不会互相死锁；
+    入库时应在提交前对整个事务的新交易只执行一次，使汇总行上的锁只短暂持有。
+    """
+    sign_prefix = "-" if sign < 0 else ""
+    return f"""
+    INSERT INTO person_counterparty_summary AS s
+        (person_id, name, total_income, total_expense, transaction_count)
+    SELECT
+        a.owner_id,
+        c.name,
+        {sign_prefix}sum(CASE WHEN d.transaction_type = 'CREDIT' THEN d.amount ELSE 0 END),
+        {sign_prefix}sum(CASE WHEN d.transaction_type = 'DEBIT' THEN d.amount ELSE 0 END),
+        {sign_prefix}count(*)
+    FROM {source}
+    JOIN account AS a ON a.id = d.account_id
+    JOIN counterparty AS c ON c.id = d.counterparty_id
+    {where}
+    GROUP BY a.owner_id, c.name
+    -- 按主键顺序写入，多个入库任务并发累加同一用户时加锁顺序一致
+    ORDER BY a.owner_id, c.name
+    ON CONFLICT (person_id, name) DO UPDATE SET
+        total_income = s.total_income + EXCLUDED.total_income,
+        total_expense = s.total_expense + EXCLUDED.total_expense,
+        transaction_count = s.transaction_count + EXCLUDED.transaction_count
+    """
+
+
+_SUBTRACT_ACCOUNT_SQL = summary_upsert_sql(
+    '"transaction" AS d', sign=-1, where="WHERE d.account_id = :account_id"
+)
+_PRUNE_EMPTY_SQL = """
+DELETE FROM person_counterparty_summary
+WHERE person_id = :person_id AND transaction_count <= 0
+"""
+
+
+class PersonCounterpartySummaryRepository:
+    """
+    PersonCounterpartySummary 的仓库层。
+
+    汇总表只通过集合式的 SQL 增量维护，不提供逐行的增删改，
+    因此不继承 BaseRepository。以下方法都不提交事务，由调用方与交易的写入一起提交。
+    """
+
+    def __init__(self):
+        self.model = PersonCounterpartySummary
+
+    async def get_by_person_id(
+        self, session: AsyncSession, *, person_id: int
+    ) -> list[dict[str, Any]]:
+        statement = select(
+            self.model.name,
+            self.model.total_income,
+            self.model.total_expense,
+            self.model.transaction_count,
+        ).where(self.model.person_id == person_id)
+        result = await session.execute(statement)
+        return [row._asdict() for row in result.all()]
+
+    async def add_from(self, session: AsyncSession, *, source: str) -> None:
+        """【内部方法】把 source 中的交易累加进汇总表，source 的要求见 summary_upsert_sql"""
+        await session.execute(text(summary_upsert_sql(source)))
+
+    async def subtract_account(
+        self, session: AsyncSession, *, account_id: int, person_id: int
+    ) -> None:
+        """【内部方法】在删除账户前扣减该账户的全部交易，并清理已经归零的汇总行"""
+        await session.execute(text(_SUBTRACT_ACCOUNT_SQL), {"account_id": account_id})
+        await session.execute(text(_PRUNE_EMPTY_SQL), {"person_id": person_id})
+
+    async def rebuild(
+        self, session: AsyncSession, *, person_id: int | None = None
+    ) -> int:
+        """
+        【内部方法】根据交易表重新计算汇总，不传 person_id 时重建全部用户。
+        返回重建后的汇总行数。
+        """
+        if person_id is None:
+            await session.execute(text("DELETE FROM person_counterparty_summary"))
+            await session.execute(text(summary_upsert_sql('"transaction" AS d')))
+        else:
+            await session.execute(
+                text("DELETE FROM person_counterparty_summary WHERE person_id = :id"),
+                {"id": person_id},
+            )
+            await session.execute(
+                text(
+                    summary_upsert_sql(
+                        '"transaction" AS d', where="WHERE a.owner_id = :person_id"
+                    )
+                ),
+                {"person_id": person_id},
+            )
+        count_statement = select(func.count()).select_from(self.model)
+        if person_id is not None:
+            count_statement = count_statement.where(self.model.person_id == person_id)
+        return (await session.execute(count_statement)).scalar_one()
+
+
+person_counterparty_summary_repository = PersonCounterpartySummaryRepository()
@@ -1,20 +1,238 @@
 # app/repository/transaction.py
-from sqlalchemy import select
+import asyncio
+import datetime
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Float, Select, and_, cast, func, or_, select, text, tuple_
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, subqueryload
 from typing import Any
 
 from app.repository.base import BaseRepository
-from app.models.transaction import Transaction
+from app.models.account_daily_rollup import ROLLUP_TIMEZONE
+from app.models.counterparty import Counterparty
+from app.models.transaction import KEYWORD_SEARCH_COLUMNS, Transaction
+from app.models.transaction_dedup import TransactionDedup
+from app.repository.account_daily_rollup import account_daily_rollup_repository
+from app.repository.person_counterparty_summary import (
+    person_counterparty_summary_repository,
+)
 from app.models.person import Person
 from app.models.account import Account
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.transaction import (
+    TransactionCreate,
+    TransactionFilter,
+    TransactionUpdate,
+)
+
+
+# 键集分页的位置：上一页最后一条记录的 (transaction_date, id)
+KeysetPosition = tuple[datetime.datetime, int]
+
+
+# --- COPY 导入相关的 SQL ---
+# 暂存表中的金额先以 double precision 存放（asyncpg 可直接二进制编码 float），
+# 合并时再统一转换为 numeric(12, 2)。
+_STAGING_TABLE = "transaction_staging"
+_COPY_COLUMNS = (
+    "transaction_date",
+    "amount",
+    "currency",
+    "transaction_type",
+    "description",
+    "transaction_method",
+    "balance_after_txn",
+    "bank_transaction_id",
+    "is_cash",
+    "location",
+    "branch_name",
+    "category",
+    "account_id",
+    "counterparty_id",
+)
+_STAGING_DDL = f"""
+CREATE TEMPORARY TABLE {_STAGING_TABLE} (
+    transaction_date timestamptz,
+    amount double precision,
+    currency varchar(3),
+    transaction_type varchar,
+    description varchar,
+    transaction_method varchar,
+    balance_after_txn double precision,
+    bank_transaction_id varchar,
+    is_cash boolean,
+    location varchar,
+    branch_name varchar,
+    category varchar,
+    account_id integer,
+    counterparty_id integer
+) ON COMMIT DROP
+"""
+# 新插入的交易先记入事务内的临时表，提交前由 apply_pending_aggregates 统一累加进
+# 对手方汇总表和账户日汇总表。汇总行是多个入库任务共同写入的热点行，若每个数据块都直接累加，
+# 行锁会一直持有到整个文件提交，并发的文件和分片之间互相等待，跨块加锁顺序不一致时还会死锁。
+_PENDING_TABLE = "transaction_pending_aggregate"
+_PENDING_DDL = f"""
+CREATE TEMPORARY TABLE IF NOT EXISTS {_PENDING_TABLE} (
+    id integer,
+    account_id integer,
+    counterparty_id integer,
+    transaction_date timestamptz,
+    transaction_type varchar,
+    amount numeric(12, 2),
+    is_cash boolean,
+    balance_after_txn numeric(12, 2)
+) ON COMMIT DROP
+"""
+# bulk_create 插入后由 RETURNING 取回新交易，以数组参数写回临时表
+_PENDING_INSERT_SQL = f"""
+INSERT INTO {_PENDING_TABLE}
+SELECT * FROM unnest(
+    CAST(:ids AS integer[]),
+    CAST(:account_ids AS integer[]),
+    CAST(:counterparty_ids AS integer[]),
+    CAST(:transaction_dates AS timestamptz[]),
+    CAST(:transaction_types AS text[]),
+    CAST(:amounts AS numeric[]),
+    CAST(:is_cash AS boolean[]),
+    CAST(:balances AS numeric[])
+)
+"""
+# 先把流水号写入去重表，只有写入成功（此前不存在）的流水号才合并进交易表；
+# 同一批数据内部的重复流水号由 DISTINCT ON 只保留一条。
+# 新插入的交易在同一条语句中记入临时表，最后返回插入的行数。
+_MERGE_SQL = f"""
+WITH new_keys AS (
+    INSERT INTO transaction_dedup (bank_transaction_id, transaction_date, account_id)
+    SELECT DISTINCT ON (bank_transaction_id)
+        bank_transaction_id, transaction_date, account_id
+    FROM {_STAGING_TABLE}
+    ORDER BY bank_transaction_id, transaction_date
+    ON CONFLICT (bank_transaction_id) DO NOTHING
+    RETURNING bank_transaction_id
+),
+inserted AS (
+INSERT INTO "transaction" ({", ".join(_COPY_COLUMNS)})
+SELECT DISTINCT ON (bank_transaction_id)
+    transaction_date,
+    amount::numeric(12, 2),
+    currency,
+    transaction_type,
+    description,
+    transaction_method,
+    balance_after_txn::numeric(12, 2),
+    bank_transaction_id,
+    is_cash,
+    location,
+    branch_name,
+    category,
+    account_id,
+    counterparty_id
+FROM {_STAGING_TABLE}
+JOIN new_keys USING (bank_transaction_id)
+ORDER BY bank_transaction_id, transaction_date
+RETURNING
+    id, account_id, counterparty_id, transaction_date, transaction_type, amount,
+    is_cash, balance_after_txn
+),
+pending AS (INSERT INTO {_PENDING_TABLE} SELECT * FROM inserted)
+SELECT count(*) FROM inserted
+"""
+
+# --- 按月分区 ---
+# 分区边界按 UTC 的自然月划分，分区名形如 transaction_p202401。
+# 创建分区前先取得事务级咨询锁，避免多个入库任务同时创建同一个分区。
+_PARTITION_LOCK_KEY = 20240101
+# 建分区要在交易表上加排他锁，排队等锁期间后来的查询也会被挡住，
+# 因此限制等锁时间，等不到时回滚，稍后重试
+_PARTITION_LOCK_TIMEOUT = "5s"
+_PARTITION_LOCK_RETRIES = 5
+_LOCK_NOT_AVAILABLE = "55P03"
+_MISSING_PARTITIONS_SQL = """
+SELECT name FROM unnest(CAST(:names AS text[])) AS name
+WHERE to_regclass(name) IS NULL
+"""
+
+
+def _month_start(value: datetime.datetime) -> datetime.date:
+    """取 UTC 时间所在月份的第一天"""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.UTC)
+    return datetime.date(value.year, value.month, 1)
+
+
+def _next_month(month: datetime.date) -> datetime.date:
+    return datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"transaction_p{month.year:04d}{month.month:02d}"
+
+
+def _create_partition_sql(month: datetime.date) -> str:
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" '
+        f'PARTITION OF "transaction" FOR VALUES '
+        f"FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+    )
 
 
 class TransactionRepository(
     BaseRepository[Transaction, TransactionCreate, TransactionUpdate]
 ):
+    async def ensure_partitions(
+        self,
+        session: AsyncSession,
+        *,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> list[str]:
+        """
+        确保 [start, end] 覆盖的每个月都有对应的分区，在一个短事务中创建并提交，返回新建的分区名。
+
+        建分区会在交易表上加排他锁，必须使用没有其他未提交操作的会话，
+        并在写入交易之前调用，不能放在入库事务中。大多数情况下分区已由定时任务提前建好，
+        只需一次目录查询；等不到锁时回滚并按指数退避重试。
+        """
+        months = []
+        month, last = _month_start(start), _month_start(end)
+        while month <= last:
+            months.append(month)
+            month = _next_month(month)
+        names = [partition_name(month) for month in months]
+
+        for attempt in range(_PARTITION_LOCK_RETRIES):
+            result = await session.execute(
+                text(_MISSING_PARTITIONS_SQL), {"names": names}
+            )
+            missing = set(result.scalars())
+            if not missing:
+                await session.commit()
+                return []
+            try:
+                await session.execute(
+                    text(f"SET LOCAL lock_timeout = '{_PARTITION_LOCK_TIMEOUT}'")
+                )
+                await session.execute(
+                    text("SELECT pg_advisory_xact_lock(:key)"),
+                    {"key": _PARTITION_LOCK_KEY},
+                )
+                for month in months:
+                    if partition_name(month) in missing:
+                        await session.execute(text(_create_partition_sql(month)))
+                await session.commit()
+                return sorted(missing)
+            except DBAPIError as e:
+                await session.rollback()
+                lock_timeout = getattr(e.orig, "sqlstate", None) == _LOCK_NOT_AVAILABLE
+                if not lock_timeout or attempt == _PARTITION_LOCK_RETRIES - 1:
+                    raise
+                await asyncio.sleep(2**attempt)
+        return []
+
     async def get_with_details(
         self, session: AsyncSession, *, transaction_id: int
     ) -> Transaction | None:
@@ -28,8 +246,118 @@ class TransactionRepository(
         result = await session.scalars(statement)
         return result.one_or_none()
 
+    def _scoped(
+        self,
+        statement: Select,
+        *,
+        account_id: int | None = None,
+        person_id: int | None = None,
+    ) -> Select:
+        """限定在单个账户，或一个用户的全部账户内"""
+        if account_id is not None:
+            statement = statement.where(self.model.account_id == account_id)
+        if person_id is not None:
+            statement = statement.where(
+                self.model.account_id.in_(
+                    select(Account.id).where(Account.owner_id == person_id)
+                )
+            )
+        return statement
+
+    def _filtered(self, statement: Select, filters: TransactionFilter | None) -> Select:
+        """
+        把看板上的筛选条件加到查询上。
+        日期换算成北京时间零点起的时间范围，可以直接用于分区裁剪和索引；
+        对手方名称通过子查询匹配，查询本身不需要 JOIN 对手方表。
+        """
+        if filters is None:
+            return statement
+        tz = ZoneInfo(ROLLUP_TIMEZONE)
+        if filters.start_date is not None:
+            start = datetime.datetime.combine(filters.start_date, datetime.time(), tz)
+            statement = statement.where(self.model.transaction_date >= start)
+        if filters.end_date is not None:
+            end = datetime.datetime.combine(
+                filters.end_date + datetime.timedelta(days=1), datetime.time(), tz
+            )
+            statement = statement.where(self.model.transaction_date < end)
+        if filters.transaction_type:
+            statement = statement.where(
+                self.model.transaction_type.in_(filters.transaction_type)
+            )
+        if filters.min_amount is not None:
+            statement = statement.where(
+                func.abs(self.model.amount) >= filters.min_amount
+            )
+        if filters.max_amount is not None:
+            statement = statement.where(
+                func.abs(self.model.amount) <= filters.max_amount
+            )
+        if filters.is_cash is not None:
+            statement = statement.where(self.model.is_cash == filters.is_cash)
+        if filters.counterparty_name is not None:
+            statement = statement.where(
+                self.model.counterparty_id.in_(
+                    select(Counterparty.id).where(
+                        Counterparty.name == filters.counterparty_name
+                    )
+                )
+            )
+        if filters.keyword:
+            # 各列上都有 pg_trgm 的 GIN 索引，多个 ILIKE 条件由 BitmapOr 合并；
+            # 少于三个字符的关键字无法切出三元组，TransactionFilter 要求它们同时带有
+            # 较短的日期范围，由分区裁剪限制扫描的数据量。
+            # 转义 LIKE 通配符，关键字按字面匹配
+            escaped = (
+                filters.keyword.replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            pattern = f"%{escaped}%"
+            statement = statement.where(
+                or_(
+                    *(
+                        getattr(self.model, column).ilike(pattern, escape="\\")
+                        for column in KEYWORD_SEARCH_COLUMNS
+                    ),
+                    self.model.counterparty_id.in_(
+                        select(Counterparty.id).where(
+                            Counterparty.name.ilike(pattern, escape="\\")
+                        )
+                    ),
+                )
+            )
+        return statement
+
+    def _paginate(
+        self, statement: Select, *, skip: int, limit: int, after: KeysetPosition | None
+    ) -> Select:
+        """
+        按 (transaction_date, id) 排序并分页。
+        传入 after 时使用键集分页，只取排在该位置之后的记录，配合复合索引无需扫描前面的行；
+        否则退回 OFFSET 分页。id 作为排序的第二键，保证同一时间的交易顺序稳定。
+        """
+        if after is not None:
+            statement = statement.where(
+                tuple_(self.model.transaction_date, self.model.id) > tuple_(*after),
+                # 与行比较等价的冗余条件，让规划器可以裁剪掉更早月份的分区
+                self.model.transaction_date >= after[0],
+            )
+        else:
+            statement = statement.offset(skip)
+        return statement.order_by(
+            self.model.transaction_date.asc(), self.model.id.asc()
+        ).limit(limit)
+
     async def get_multi_by_account_id(
-        self, session: AsyncSession, *, account_id: int, skip: int = 0, limit: int = 100
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: KeysetPosition | None = None,
+        filters: TransactionFilter | None = None,
     ) -> list[Transaction]:
         statement = (
             select(self.model)
@@ -37,15 +365,21 @@ class TransactionRepository(
             .options(
                 selectinload(self.model.account), selectinload(self.model.counterparty)
             )
-            .order_by(self.model.transaction_date.asc())
-            .offset(skip)
-            .limit(limit)
         )
+        statement = self._filtered(statement, filters)
+        statement = self._paginate(statement, skip=skip, limit=limit, after=after)
         result = await session.scalars(statement)
         return list(result.all())
 
     async def get_multi_by_person_id(
-        self, session: AsyncSession, *, person_id: int, skip: int = 0, limit: int = 100
+        self,
+        session: AsyncSession,
+        *,
+        person_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: KeysetPosition | None = None,
+        filters: TransactionFilter | None = None,
     ) -> list[Transaction]:
         """
         获取一个用户所有账户下的全部交易记录。
@@ -61,40 +395,373 @@ class TransactionRepository(
                 selectinload(self.model.account),
                 selectinload(self.model.counterparty),
             )
-            .order_by(self.model.transaction_date.asc())  # 在数据库层面完成排序
-            .offset(skip)  # 在数据库层面完成分页
-            .limit(limit)
         )
+        statement = self._filtered(statement, filters)
+        # 在数据库层面完成排序和分页
+        statement = self._paginate(statement, skip=skip, limit=limit, after=after)
         result = await session.scalars(statement)
         return list(result.all())
 
+    async def get_rows(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int | None = None,
+        person_id: int | None = None,
+        limit: int = 100,
+        after: KeysetPosition | None = None,
+        filters: TransactionFilter | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        以扁平投影读取交易列表，字段与 TransactionRow 一致。
+        一条 JOIN 查询同时取回账户和对手方名称，只选需要的列，不构造 ORM 实体，
+        也不经过会话的 identity map；金额在数据库中转换为 double precision，
+        省去逐行构造 Decimal 再转换为 float。
+        """
+        statement = (
+            select(
+                self.model.id,
+                self.model.transaction_date,
+                cast(self.model.amount, Float).label("amount"),
+                self.model.currency,
+                self.model.transaction_type,
+                cast(self.model.balance_after_txn, Float).label("balance_after_txn"),
+                self.model.description,
+                self.model.transaction_method,
+                self.model.bank_transaction_id,
+                self.model.is_cash,
+                self.model.category,
+                self.model.location,
+                self.model.branch_name,
+                self.model.account_id,
+                Account.account_name,
+                self.model.counterparty_id,
+                Counterparty.name.label("counterparty_name"),
+            )
+            .join(Account, Account.id == self.model.account_id)
+            .join(Counterparty, Counterparty.id == self.model.counterparty_id)
+        )
+        statement = self._scoped(statement, account_id=account_id, person_id=person_id)
+        statement = self._filtered(statement, filters)
+        statement = self._paginate(statement, skip=0, limit=limit, after=after)
+        result = await session.execute(statement)
+        return [row._asdict() for row in result]
+
+    # --- 看板分析：以下聚合都在数据库中完成，只返回汇总结果 ---
+
+    async def get_kpis(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int | None = None,
+        person_id: int | None = None,
+        filters: TransactionFilter | None = None,
+    ) -> dict[str, Any]:
+        """
+        计算筛选范围内的总收入、总支出、笔数、起止时间和期末余额。
+        期末余额为每个账户在筛选范围内最后一笔带余额的交易的余额之和，
+        与账户日汇总表的 closing_balance 口径一致。
+        """
+        is_credit = self.model.transaction_type == "CREDIT"
+        is_debit = self.model.transaction_type == "DEBIT"
+        statement = select(
+            func.coalesce(func.sum(self.model.amount).filter(is_credit), 0).label(
+                "total_income"
+            ),
+            func.coalesce(func.sum(self.model.amount).filter(is_debit), 0).label(
+                "total_expense"
+            ),
+            func.count().label("transaction_count"),
+            func.min(self.model.transaction_date).label("first_transaction_date"),
+            func.max(self.model.transaction_date).label("last_transaction_date"),
+        ).select_from(self.model)
+        statement = self._scoped(statement, account_id=account_id, person_id=person_id)
+        statement = self._filtered(statement, filters)
+        kpis = (await session.execute(statement)).one()._asdict()
+
+        # DISTINCT ON 取每个账户最后一笔带余额的交易，沿 (account_id, date, id) 索引倒序读取
+        latest = (
+            select(self.model.balance_after_txn)
+            .where(self.model.balance_after_txn.is_not(None))
+            .distinct(self.model.account_id)
+            .order_by(
+                self.model.account_id,
+                self.model.transaction_date.desc(),
+                self.model.id.desc(),
+            )
+        )
+        latest = self._scoped(latest, account_id=account_id, person_id=person_id)
+        latest = self._filtered(latest, filters).subquery()
+        kpis["closing_balance"] = await session.scalar(
+            select(func.coalesce(func.sum(latest.c.balance_after_txn), 0))
+        )
+        return kpis
+
+    async def get_top_counterparties(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int | None = None,
+        person_id: int | None = None,
+        filters: TransactionFilter | None = None,
+        limit: int = 5,
+    ) -> list[dict[str, Any]]:
+        """
+        按对手方名称聚合，返回收入最多的 limit 个与支出最多的 limit 个对手方（合并去重），
+        按总流水降序排列。
+        """
+        income = func.coalesce(
+            func.sum(self.model.amount).filter(self.model.transaction_type == "CREDIT"),
+            0,
+        )
+        expense = func.coalesce(
+            func.sum(self.model.amount).filter(self.model.transaction_type == "DEBIT"),
+            0,
+        )
+        per_name = (
+            select(
+                Counterparty.name,
+                income.label("total_income"),
+                expense.label("total_expense"),
+                func.count().label("transaction_count"),
+                func.row_number()
+                .over(order_by=(income.desc(), Counterparty.name))
+                .label("income_rank"),
+                func.row_number()
+                .over(order_by=(expense.asc(), Counterparty.name))
+                .label("expense_rank"),
+            )
+            .select_from(self.model)
+            .join(Counterparty, Counterparty.id == self.model.counterparty_id)
+            .group_by(Counterparty.name)
+        )
+        per_name = self._scoped(per_name, account_id=account_id, person_id=person_id)
+        per_name = self._filtered(per_name, filters).subquery()
+
+        statement = (
+            select(
+                per_name.c.name,
+                per_name.c.total_income,
+                per_name.c.total_expense,
+                per_name.c.transaction_count,
+            )
+            .where(
+                or_(
+                    and_(per_name.c.income_rank <= limit, per_name.c.total_income > 0),
+                    and_(
+                        per_name.c.expense_rank <= limit, per_name.c.total_expense < 0
+                    ),
+                )
+            )
+            .order_by(
+                (per_name.c.total_income - per_name.c.total_expense).desc(),
+                per_name.c.name,
+            )
+        )
+        result = await session.execute(statement)
+        return [row._asdict() for row in result.all()]
+
+    async def get_type_breakdown(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int | None = None,
+        person_id: int | None = None,
+        filters: TransactionFilter | None = None,
+    ) -> list[dict[str, Any]]:
+        """按交易类型汇总金额与笔数"""
+        statement = (
+            select(
+                self.model.transaction_type,
+                func.sum(self.model.amount).label("total_amount"),
+                func.count().label("transaction_count"),
+            )
+            .group_by(self.model.transaction_type)
+            .order_by(self.model.transaction_type)
+        )
+        statement = self._scoped(statement, account_id=account_id, person_id=person_id)
+        statement = self._filtered(statement, filters)
+        result = await session.execute(statement)
+        return [row._asdict() for row in result.all()]
+
     async def bulk_create(
         self,
         session: AsyncSession,
         *,
         transactions_data: list[dict[str, Any]],
         chunk_size: int = 500,
-    ):
+        commit: bool = True,
+    ) -> dict[str, int]:
         """
         批量插入交易数据，并使用分块处理以避免参数数量限制。
+
+        参数:
+            commit: 是否在插入后立即提交。流式入库时由调用方在所有数据块
+                写入完毕后调用 apply_pending_aggregates 并统一提交。
+
+        交易日期所在月份的分区必须已经存在，由调用方在入库事务之前用 ensure_partitions 创建。
+
+        返回:
+            {"inserted": 实际插入的行数, "skipped": 因流水号重复而跳过的行数}
         """
         if not transactions_data:
-            return
+            return {"inserted": 0, "skipped": 0}
 
         # --- 分块处理 ---
+        inserted = 0
         for i in range(0, len(transactions_data), chunk_size):
             chunk = transactions_data[i : i + chunk_size]
             if not chunk:
                 continue
 
-            statement = insert(Transaction).values(chunk)
-            statement = statement.on_conflict_do_nothing(
-                index_elements=["bank_transaction_id"]
+            # 先登记流水号，只插入此前不存在的交易（同一块内重复的只保留第一条）
+            dedup_statement = (
+                insert(TransactionDedup)
+                .values(
+                    [
+                        {
+                            "bank_transaction_id": row["bank_transaction_id"],
+                            "transaction_date": row["transaction_date"],
+                            "account_id": row["account_id"],
+                        }
+                        for row in chunk
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=["bank_transaction_id"])
+                .returning(TransactionDedup.bank_transaction_id)
+            )
+            new_keys = set(await session.scalars(dedup_statement))
+            new_rows = []
+            for row in chunk:
+                if row["bank_transaction_id"] in new_keys:
+                    new_keys.discard(row["bank_transaction_id"])
+                    new_rows.append(row)
+            if not new_rows:
+                continue
+
+            result = await session.execute(
+                insert(Transaction)
+                .values(new_rows)
+                .returning(
+                    Transaction.id,
+                    Transaction.account_id,
+                    Transaction.counterparty_id,
+                    Transaction.transaction_date,
+                    Transaction.transaction_type,
+                    Transaction.amount,
+                    Transaction.is_cash,
+                    Transaction.balance_after_txn,
+                )
+            )
+            new_transactions = result.all()
+            # 新交易记入临时表，提交前统一累加对手方汇总和账户日汇总
+            await self._add_pending(session, new_transactions)
+            inserted += len(new_transactions)
+
+        # 在所有批次都执行完毕后，统一累加汇总并提交事务
+        if commit:
+            await self.apply_pending_aggregates(session)
+            await session.commit()
+
+        return {"inserted": inserted, "skipped": len(transactions_data) - inserted}
+
+    async def bulk_copy(
+        self,
+        session: AsyncSession,
+        *,
+        transactions_data: list[dict[str, Any]],
+        commit: bool = True,
+    ) -> dict[str, int]:
+        """
+        基于 COPY 的批量导入：先用 asyncpg 的二进制 COPY 写入临时暂存表，
+        再通过一条语句登记去重表并把新流水合并进交易表。
+        相比 bulk_create 的多行 VALUES，省去了大语句的编译和参数绑定开销。
+        commit 为 False 时，调用方需要在提交前调用 apply_pending_aggregates。
+        与 bulk_create 一样，所需的分区必须事先用 ensure_partitions 建好。
+
+        返回:
+            {"inserted": 实际插入的行数, "skipped": 因流水号重复而跳过的行数}
+        """
+        if not transactions_data:
+            return {"inserted": 0, "skipped": 0}
+
+        # 1. 通过会话执行建表语句，确保事务已开启，后续 COPY 与合并都在同一事务内
+        await session.execute(text(_STAGING_DDL))
+        await session.execute(text(_PENDING_DDL))
+
+        # 2. 取出底层的 asyncpg 连接，以二进制格式 COPY 到暂存表
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        records = [
+            (
+                row["transaction_date"],
+                row["amount"],
+                row["currency"],
+                row["transaction_type"],
+                row["description"],
+                row["transaction_method"],
+                row["balance_after_txn"],
+                row["bank_transaction_id"],
+                bool(row["is_cash"]),
+                row["location"],
+                row["branch_name"],
+                row["category"],
+                row["account_id"],
+                row["counterparty_id"],
             )
-            await session.execute(statement)
+            for row in transactions_data
+        ]
+        await raw_connection.driver_connection.copy_records_to_table(
+            _STAGING_TABLE, records=records, columns=list(_COPY_COLUMNS)
+        )
 
-        # 在所有批次都执行完毕后，统一提交事务
-        await session.commit()
+        # 3. 一次性合并，重复的流水号由去重表直接跳过
+        result = await session.execute(text(_MERGE_SQL))
+        inserted = result.scalar_one()
+        await session.execute(text(f"DROP TABLE {_STAGING_TABLE}"))
+
+        if commit:
+            await self.apply_pending_aggregates(session)
+            await session.commit()
+
+        return {"inserted": inserted, "skipped": len(records) - inserted}
+
+    async def _add_pending(self, session: AsyncSession, rows: list[Any]) -> None:
+        """把 bulk_create 新插入的交易记入临时表"""
+        if not rows:
+            return
+        await session.execute(text(_PENDING_DDL))
+        await session.execute(
+            text(_PENDING_INSERT_SQL),
+            {
+                "ids": [row.id for row in rows],
+                "account_ids": [row.account_id for row in rows],
+                "counterparty_ids": [row.counterparty_id for row in rows],
+                "transaction_dates": [row.transaction_date for row in rows],
+                "transaction_types": [row.transaction_type for row in rows],
+                "amounts": [row.amount for row in rows],
+                "is_cash": [row.is_cash for row in rows],
+                "balances": [row.balance_after_txn for row in rows],
+            },
+        )
+
+    async def apply_pending_aggregates(self, session: AsyncSession) -> None:
+        """
+        【内部方法】把本事务中新插入的交易一次性累加进对手方汇总表和账户日汇总表，
+        不提交事务。
+
+        以 commit=False 调用 bulk_create / bulk_copy 后，必须在提交前调用一次；
+        临时表在提交时删除，漏掉这一步会使汇总与交易不一致。
+        汇总行上的锁只从这里持有到随后的提交，并发入库之间不再长时间互相等待。
+        """
+        await session.execute(text(_PENDING_DDL))
+        await person_counterparty_summary_repository.add_from(
+            session, source=f"{_PENDING_TABLE} AS d"
+        )
+        await account_daily_rollup_repository.add_from(
+            session, source=f"{_PENDING_TABLE} AS d"
+        )
+        await session.execute(text(f"DROP TABLE {_PENDING_TABLE}"))
 
 
 # 创建仓库单例
@@ -0,0 +1,69 @@
+# app/repository/upload_batch.py
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repository.base import BaseRepository
+from app.models.file_metadata import FileMetadata
+from app.models.upload_batch import UploadBatch
+from app.schemas.upload_batch import UploadBatchCreate, UploadBatchUpdate
+
+
+class UploadBatchRepository(
+    BaseRepository[UploadBatch, UploadBatchCreate, UploadBatchUpdate]
+):
+    """
+    UploadBatch 模型的仓库层。
+    """
+
+    async def add(
+        self, session: AsyncSession, *, obj_in: UploadBatchCreate
+    ) -> UploadBatch:
+        """
+        【内部方法】创建批次并 flush 以获得 ID，但不提交事务，
+        以便与批次内的文件元数据在同一个事务中提交。
+        """
+        db_obj = self.model(**obj_in.model_dump())
+        session.add(db_obj)
+        await session.flush()
+        return db_obj
+
+    async def get_status_summary(
+        self, session: AsyncSession, *, batch_id: int
+    ) -> dict[str, Any] | None:
+        """
+        用一条 LEFT JOIN + GROUP BY 查询批次信息和批次内各处理状态的文件数。
+        批次不存在时返回 None。
+        """
+        statement = (
+            select(
+                self.model.id,
+                self.model.account_id,
+                self.model.created_at,
+                FileMetadata.processing_status,
+                func.count(FileMetadata.id),
+            )
+            .outerjoin(FileMetadata, FileMetadata.batch_id == self.model.id)
+            .where(self.model.id == batch_id)
+            .group_by(self.model.id, FileMetadata.processing_status)
+        )
+        rows = (await session.execute(statement)).all()
+        if not rows:
+            return None
+
+        status_counts = {
+            processing_status: count
+            for _, _, _, processing_status, count in rows
+            if processing_status is not None
+        }
+        return {
+            "id": rows[0].id,
+            "account_id": rows[0].account_id,
+            "created_at": rows[0].created_at,
+            "status_counts": status_counts,
+        }
+
+
+# 创建仓库的单例
+upload_batch_repository = UploadBatchRepository(UploadBatch)
@@ -0,0 +1,30 @@
+# app/repository/upload_session.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repository.base import BaseRepository
+from app.models.upload_session import UploadSession
+from app.schemas.upload_session import UploadSessionCreate, UploadSessionUpdate
+
+
+class UploadSessionRepository(
+    BaseRepository[UploadSession, UploadSessionCreate, UploadSessionUpdate]
+):
+    """
+    UploadSession 模型的仓库层。
+    """
+
+    async def get_for_update(
+        self, session: AsyncSession, *, id: str
+    ) -> UploadSession | None:
+        """
+        获取上传会话并加行锁，同一会话的数据块写入和完成操作因此串行执行，
+        锁在调用方提交或回滚事务时释放。
+        """
+        statement = select(self.model).where(self.model.id == id).with_for_update()
+        result = await session.scalars(statement)
+        return result.one_or_none()
+
+
+# 创建仓库的单例
+upload_session_repository = UploadSessionRepository(UploadSession)
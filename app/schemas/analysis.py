@@ -1,4 +1,6 @@
 # app/schemas/analysis.py
+import datetime
+
 from pydantic import Field, computed_field
 from app.schemas.base import BaseSchema
 
@@ -20,3 +22,50 @@ class CounterpartySummary(BaseSchema):
     def net_flow(self) -> float:
         """计算净流入/流出金额"""
         return self.total_income + self.total_expense
+
+
+class FlowPoint(BaseSchema):
+    """
+    收支时间序列中的一个周期（日或月），由账户日汇总表计算得出。
+    """
+    period: datetime.date = Field(..., description="周期的第一天")
+    credit_total: float = Field(..., description="收入合计")
+    debit_total: float = Field(..., description="支出合计 (负数)")
+    transaction_count: int
+    cash_count: int = Field(..., description="现金交易笔数")
+    closing_balance: float | None = Field(
+        None, description="期末余额；多个账户时为本周期内有余额记录的各账户余额之和"
+    )
+
+    @computed_field
+    @property
+    def net_flow(self) -> float:
+        return self.credit_total + self.debit_total
+
+
+class DashboardKpis(BaseSchema):
+    """
+    看板关键指标，按筛选条件在数据库中聚合得出。
+    """
+    total_income: float = Field(..., description="总收入金额")
+    total_expense: float = Field(..., description="总支出金额 (负数)")
+    transaction_count: int = Field(..., description="总交易笔数")
+    closing_balance: float = Field(
+        ..., description="期末余额，即每个账户在筛选范围内最后一笔交易的余额之和"
+    )
+    first_transaction_date: datetime.datetime | None = None
+    last_transaction_date: datetime.datetime | None = None
+
+    @computed_field
+    @property
+    def net_flow(self) -> float:
+        return self.total_income + self.total_expense
+
+
+class TypeBreakdown(BaseSchema):
+    """
+    按交易类型汇总的金额与笔数，用于收支构成图。
+    """
+    transaction_type: str
+    total_amount: float
+    transaction_count: int
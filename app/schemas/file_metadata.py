@@ -1,5 +1,6 @@
 # app/schemas/file_metadata.py
 from datetime import datetime
+from typing import Any
 
 from app.schemas.base import BaseSchema
 
@@ -18,7 +19,7 @@ class FileMetadataBase(BaseSchema):
 # 在创建新的文件元数据记录时，服务层将使用这个模型。
 # 它继承了Base的所有字段，是创建新记录所需数据的完整集合。
 class FileMetadataCreate(FileMetadataBase):
-    pass
+    batch_id: int | None = None
 
 
 # --- 更新模型 ---
@@ -27,6 +28,7 @@ class FileMetadataCreate(FileMetadataBase):
 class FileMetadataUpdate(BaseSchema):
     processing_status: str | None = None
     error_message: str | None = None
+    metrics: dict[str, Any] | None = None
 
 
 # --- 数据库模型（用于读取） ---
@@ -38,6 +40,11 @@ class FileMetadataInDB(FileMetadataBase):
     upload_timestamp: datetime
     processing_status: str
     error_message: str | None = None
+    metrics: dict[str, Any] | None = None
+    batch_id: int | None = None
+    parts_total: int = 0
+    parts_done: int = 0
+    parts_failed: int = 0
 
 
 # --- 公开模型（API返回）---
@@ -50,3 +57,16 @@ class FileMetadataPublic(BaseSchema):
     upload_timestamp: datetime
     processing_status: str
     error_message: str | None = None
+    metrics: dict[str, Any] | None = None
+    batch_id: int | None = None
+    parts_total: int = 0
+    parts_done: int = 0
+    parts_failed: int = 0
+
+
+# --- 哈希预检结果 ---
+# 客户端在上传前先提交本地计算的 SHA256，已存在的文件无需再次上传。
+class FileHashCheckPublic(BaseSchema):
+    file_hash: str
+    exists: bool
+    file: FileMetadataPublic | None = None
@@ -0,0 +1,48 @@
+# app/schemas/parser_plan.py
+from typing import Literal
+
+from pydantic import Field
+
+from app.schemas.base import BaseSchema
+
+
+# --- 覆盖模型（API请求）---
+# 对于格式特殊的导出文件，可以通过API强制指定解析方式。
+class ParserPlanOverride(BaseSchema):
+    """
+    手动指定的解析计划。columns 必须与文件表头完全一致（包括顺序），
+    服务端据此校验它与路径中的表头签名是否匹配。
+    """
+
+    columns: list[str] = Field(..., min_length=1, description="文件表头的全部列名")
+    column_picks: dict[str, str | None] = Field(
+        ..., description="标准字段 -> 原始列名，未出现的标准字段视为缺失"
+    )
+    date_mode: Literal["separate", "combined", "none"] = Field(
+        ..., description="separate: 日期与时间分列；combined: 日期时间合一"
+    )
+    amount_mode: Literal["separate", "single", "none"] = Field(
+        ..., description="separate: 收支分列；single: 单金额列 + 借贷标志"
+    )
+    cash_rules: list[Literal["is_cash_flag", "description", "transaction_method"]] = (
+        Field(default_factory=list, description="用于判断现金交易的标准字段")
+    )
+
+
+# --- 解析计划（缓存和API返回）---
+class ParserPlan(ParserPlanOverride):
+    """
+    某一种表头格式的“编译后”解析方式。
+    首次遇到该表头时根据数据自动生成，之后按表头签名直接复用，跳过格式检测。
+    """
+
+    signature: str = Field(..., description="表头签名")
+    source: Literal["auto", "override"] = "auto"
+
+
+class HeaderSignatureRequest(BaseSchema):
+    columns: list[str] = Field(..., min_length=1)
+
+
+class HeaderSignaturePublic(BaseSchema):
+    signature: str
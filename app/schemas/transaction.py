@@ -1,6 +1,9 @@
 # app/schemas/transaction.py
 import datetime
-from pydantic import Field
+from decimal import Decimal
+from typing import Literal, TypedDict
+
+from pydantic import Field, TypeAdapter, model_validator
 from app.schemas.base import BaseSchema
 
 # 导入其他模型的公开Schema，用于嵌套
@@ -74,3 +77,117 @@ class TransactionPublic(BaseSchema):
     # 嵌套关联对象的公开信息
     account: AccountPublic
     counterparty: CounterpartyPublic
+
+
+# --- 分页结果（键集分页）---
+class TransactionPage(BaseSchema):
+    """
+    按 (transaction_date, id) 键集分页的一页交易。
+    next_cursor 是不透明的游标，原样传回即可获取下一页；为 None 时表示已经没有更多数据。
+    """
+    items: list[TransactionPublic]
+    next_cursor: str | None = None
+
+
+# 交易列表直接从 ORM 对象校验一次后序列化，见 app.core.responses.typed_json_response
+transaction_list_adapter = TypeAdapter(list[TransactionPublic])
+transaction_page_adapter = TypeAdapter(TransactionPage)
+
+
+# --- 扁平投影（大批量读取）---
+class TransactionRow(TypedDict):
+    """
+    交易列表的扁平投影：一条 JOIN 查询直接取出的列，账户和对手方只保留 id 与名称。
+    用 TypedDict 而不是 BaseSchema，数据库行以字典形式直接序列化，
+    不经过 ORM 实体，也不为每一行构造 Pydantic 模型。
+    """
+    id: int
+    transaction_date: datetime.datetime
+    amount: float
+    currency: str
+    transaction_type: str
+    balance_after_txn: float | None
+    description: str
+    transaction_method: str | None
+    bank_transaction_id: str
+    is_cash: bool
+    category: str | None
+    location: str | None
+    branch_name: str | None
+    account_id: int
+    account_name: str
+    counterparty_id: int
+    counterparty_name: str
+
+
+class TransactionRowPage(TypedDict):
+    """按 (transaction_date, id) 键集分页的一页扁平交易，游标与 TransactionPage 通用"""
+    items: list[TransactionRow]
+    next_cursor: str | None
+
+
+# 整页一次性序列化为 JSON，序列化在 pydantic-core 中完成
+transaction_row_page_adapter = TypeAdapter(TransactionRowPage)
+
+
+# --- 筛选条件（查询参数）---
+# pg_trgm 只能为至少三个字符的关键字切出三元组，更短的关键字用不上索引，
+# 只有同时把日期范围限制在 SHORT_KEYWORD_MAX_DAYS 天以内（只扫描一两个月分区）时才允许
+KEYWORD_MIN_LENGTH = 3
+SHORT_KEYWORD_MAX_DAYS = 31
+
+
+class TransactionFilter(BaseSchema):
+    """
+    交易列表与看板分析共用的筛选条件，对应前端看板上的筛选器，所有条件都是可选的。
+    日期按北京时间的自然日理解，起止日期均包含在内。
+    """
+    start_date: datetime.date | None = None
+    end_date: datetime.date | None = None
+    transaction_type: list[Literal["CREDIT", "DEBIT"]] | None = Field(
+        None, description="交易类型，可重复传入多个"
+    )
+    keyword: str | None = Field(
+        None,
+        max_length=100,
+        description=(
+            "关键字，在摘要、对手方、交易渠道、地点和网点中模糊匹配；"
+            f"少于 {KEYWORD_MIN_LENGTH} 个字符时必须同时指定不超过 "
+            f"{SHORT_KEYWORD_MAX_DAYS} 天的日期范围"
+        ),
+    )
+    counterparty_name: str | None = Field(
+        None, max_length=200, description="对手方名称，精确匹配"
+    )
+    min_amount: Decimal | None = Field(
+        None, ge=0, description="最小金额 (按绝对值比较，包含)"
+    )
+    max_amount: Decimal | None = Field(
+        None, ge=0, description="最大金额 (按绝对值比较，包含)"
+    )
+    is_cash: bool | None = Field(None, description="是否为现金交易")
+
+    @model_validator(mode="after")
+    def check_ranges(self) -> "TransactionFilter":
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            raise ValueError("开始日期不能晚于结束日期")
+        if (
+            self.min_amount is not None
+            and self.max_amount is not None
+            and self.min_amount > self.max_amount
+        ):
+            raise ValueError("最小金额不能大于最大金额")
+        if (
+            self.keyword
+            and len(self.keyword) < KEYWORD_MIN_LENGTH
+            and not (
+                self.start_date
+                and self.end_date
+                and (self.end_date - self.start_date).days < SHORT_KEYWORD_MAX_DAYS
+            )
+        ):
+            raise ValueError(
+                f"关键字少于 {KEYWORD_MIN_LENGTH} 个字符时无法使用索引，"
+                f"请输入更长的关键字，或同时指定不超过 {SHORT_KEYWORD_MAX_DAYS} 天的日期范围"
+            )
+        return self
@@ -0,0 +1,45 @@
+# app/schemas/upload_batch.py
+from datetime import datetime
+
+from app.schemas.base import BaseSchema
+from app.schemas.file_metadata import FileMetadataPublic
+
+
+# --- 创建模型 ---
+class UploadBatchCreate(BaseSchema):
+    account_id: int
+
+
+# --- 更新模型 ---
+# 批次创建后不再修改，保留以满足仓库基类的泛型参数。
+class UploadBatchUpdate(BaseSchema):
+    pass
+
+
+# --- 未被处理的文件 ---
+# 例如与已上传文件重复、或压缩包中格式不支持的成员。
+class SkippedFile(BaseSchema):
+    filename: str
+    reason: str
+
+
+# --- 公开模型（API返回）---
+# 批量上传的结果：新建的文件和被跳过的文件。
+class UploadBatchPublic(BaseSchema):
+    id: int
+    account_id: int
+    created_at: datetime
+    files: list[FileMetadataPublic]
+    skipped: list[SkippedFile] = []
+
+
+# --- 批次状态 ---
+# status 汇总规则：仍有文件在排队或处理中为 PROCESSING；
+# 全部成功为 SUCCESS，全部失败为 FAILED，部分失败为 PARTIAL_FAILED。
+class UploadBatchStatus(BaseSchema):
+    id: int
+    account_id: int
+    created_at: datetime
+    total: int
+    status_counts: dict[str, int]
+    status: str
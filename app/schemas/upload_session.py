@@ -0,0 +1,35 @@
+# app/schemas/upload_session.py
+from datetime import datetime
+
+from pydantic import Field
+
+from app.schemas.base import BaseSchema
+
+
+# --- 创建模型 ---
+# 客户端发起可续传上传时提交的文件信息。
+class UploadSessionCreate(BaseSchema):
+    filename: str = Field(..., min_length=1)
+    filesize: int = Field(..., gt=0, description="文件总字节数")
+    mime_type: str
+    account_id: int
+
+
+# --- 更新模型 ---
+class UploadSessionUpdate(BaseSchema):
+    received_bytes: int | None = None
+    status: str | None = None
+    file_id: int | None = None
+
+
+# --- 公开模型（API返回）---
+# 客户端根据 received_bytes 决定下一个数据块从哪里开始上传。
+class UploadSessionPublic(BaseSchema):
+    id: str
+    filename: str
+    filesize: int
+    received_bytes: int
+    status: str
+    account_id: int
+    file_id: int | None = None
+    created_at: datetime
@@ -4,6 +4,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repository.account import account_repository
 from app.repository.person import person_repository
+from app.repository.person_counterparty_summary import (
+    person_counterparty_summary_repository,
+)
 from app.schemas.account import AccountCreate, AccountUpdate
 from app.models.account import Account
 from app.core.exceptions import NotFoundException, AlreadyExistsException
@@ -93,11 +96,16 @@ class AccountService:
             # 这个调用不会commit
             await file_service.delete_file(session, file_id=file_meta.id)
 
-        # 3. 删除账户本身（这会级联删除所有Transaction）
+        # 3. 从对手方汇总中扣减这个账户的交易，与删除操作在同一事务中提交
+        await person_counterparty_summary_repository.subtract_account(
+            session, account_id=account_id, person_id=account_to_delete.owner_id
+        )
+
+        # 4. 删除账户本身（这会级联删除所有Transaction）
         logger.info(f"准备删除账户 {account_id} 及其所有交易记录...")
         await self.repository.delete_obj(session, db_obj=account_to_delete)
 
-        # 4. 所有操作都已加入session，在最后进行一次总提交！
+        # 5. 所有操作都已加入session，在最后进行一次总提交！
         await session.commit()
         logger.success(f"账户 {account_id} 已被彻底删除。")
 
@@ -0,0 +1,120 @@
+# app/services/analytics_service.py
+import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import BadRequestException
+from app.repository.account_daily_rollup import (
+    Granularity,
+    account_daily_rollup_repository,
+)
+from app.repository.transaction import transaction_repository
+from app.schemas.analysis import DashboardKpis, FlowPoint, TypeBreakdown
+from app.schemas.counterparty import CounterpartyAnalysisSummary
+from app.schemas.transaction import TransactionFilter
+
+
+class AnalyticsService:
+    def __init__(self):
+        self.rollup_repository = account_daily_rollup_repository
+        self.transaction_repository = transaction_repository
+
+    @staticmethod
+    def _check_date_range(
+        start_date: datetime.date | None, end_date: datetime.date | None
+    ) -> None:
+        if start_date and end_date and start_date > end_date:
+            raise BadRequestException(detail="开始日期不能晚于结束日期。")
+
+    async def get_account_timeseries(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int,
+        granularity: Granularity = "day",
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+    ) -> list[FlowPoint]:
+        """获取单个账户按日或按月的收支序列"""
+        self._check_date_range(start_date, end_date)
+        rows = await self.rollup_repository.get_series(
+            session,
+            account_id=account_id,
+            granularity=granularity,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return [FlowPoint.model_validate(row) for row in rows]
+
+    async def get_person_timeseries(
+        self,
+        session: AsyncSession,
+        *,
+        person_id: int,
+        granularity: Granularity = "day",
+        start_date: datetime.date | None = None,
+        end_date: datetime.date | None = None,
+    ) -> list[FlowPoint]:
+        """获取一个用户全部账户汇总后按日或按月的收支序列"""
+        self._check_date_range(start_date, end_date)
+        rows = await self.rollup_repository.get_series(
+            session,
+            person_id=person_id,
+            granularity=granularity,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return [FlowPoint.model_validate(row) for row in rows]
+
+    # --- 看板分析：account_id 与 person_id 二选一，筛选条件与交易列表一致 ---
+
+    async def get_kpis(
+        self,
+        session: AsyncSession,
+        *,
+        filters: TransactionFilter,
+        account_id: int | None = None,
+        person_id: int | None = None,
+    ) -> DashboardKpis:
+        """获取筛选范围内的关键指标"""
+        kpis = await self.transaction_repository.get_kpis(
+            session, account_id=account_id, person_id=person_id, filters=filters
+        )
+        return DashboardKpis.model_validate(kpis)
+
+    async def get_top_counterparties(
+        self,
+        session: AsyncSession,
+        *,
+        filters: TransactionFilter,
+        account_id: int | None = None,
+        person_id: int | None = None,
+        limit: int = 5,
+    ) -> list[CounterpartyAnalysisSummary]:
+        """获取筛选范围内收入和支出最多的对手方"""
+        rows = await self.transaction_repository.get_top_counterparties(
+            session,
+            account_id=account_id,
+            person_id=person_id,
+            filters=filters,
+            limit=limit,
+        )
+        return [CounterpartyAnalysisSummary.model_validate(row) for row in rows]
+
+    async def get_type_breakdown(
+        self,
+        session: AsyncSession,
+        *,
+        filters: TransactionFilter,
+        account_id: int | None = None,
+        person_id: int | None = None,
+    ) -> list[TypeBreakdown]:
+        """获取筛选范围内按交易类型汇总的收支构成"""
+        rows = await self.transaction_repository.get_type_breakdown(
+            session, account_id=account_id, person_id=person_id, filters=filters
+        )
+        return [TypeBreakdown.model_validate(row) for row in rows]
+
+
+# 创建服务单例
+analytics_service = AnalyticsService()
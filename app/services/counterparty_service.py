@@ -3,6 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.repository.counterparty import counterparty_repository
+from app.repository.person_counterparty_summary import (
+    person_counterparty_summary_repository,
+)
 from app.models.counterparty import Counterparty
 from app.schemas.counterparty import CounterpartySummary, CounterpartyAnalysisSummary
 from app.core.exceptions import NotFoundException
@@ -32,8 +35,8 @@ class CounterpartyService:
     async def get_analysis_summary_by_person_id(
         self, session: AsyncSession, *, person_id: int
     ) -> List[CounterpartyAnalysisSummary]:
-        """获取按名称聚合的对手方分析汇总"""
-        summary_data = await self.repository.get_summary_by_person_id_grouped_by_name(
+        """获取按名称聚合的对手方分析汇总（读取增量维护的汇总表）"""
+        summary_data = await person_counterparty_summary_repository.get_by_person_id(
             session, person_id=person_id
         )
         return [CounterpartyAnalysisSummary.model_validate(row) for row in summary_data]
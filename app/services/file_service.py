@@ -1,17 +1,58 @@
 # app/services/file_service.py
 import os
+import asyncio
 import hashlib
-from pathlib import Path
+import uuid
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, NamedTuple
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from app.core.config import settings
+from app.repository.account import account_repository
 from app.repository.file_metadata import file_metadata_repository
+from app.repository.upload_batch import upload_batch_repository
 from app.schemas.file_metadata import FileMetadataCreate
+from app.schemas.upload_batch import SkippedFile, UploadBatchCreate
 from app.models.file_metadata import FileMetadata
 from app.core.exceptions import AlreadyExistsException, NotFoundException
-from app.tasks.tasks import process_file_task
+from app.tasks.routing import enqueue_file_processing
+from app.tasks.utils.parquet_cache import ParsedFileCache
+
+# 支持解析的文件扩展名及其 MIME 类型，用于识别 ZIP 压缩包中的成员
+SUPPORTED_FILE_TYPES = {
+    ".csv": "text/csv",
+    ".xls": "application/vnd.ms-excel",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+ZIP_MIME_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+
+class StagedFile(NamedTuple):
+    """已写入临时文件、等待登记的上传文件"""
+
+    temp_path: Path
+    file_hash: str
+    filename: str
+    filesize: int
+    mime_type: str
+
+
+def _zip_member_name(info: zipfile.ZipInfo) -> str:
+    """
+    Windows 上创建的压缩包通常以 GBK 保存中文文件名且不设置 UTF-8 标志，
+    zipfile 会按 cp437 解码成乱码，这里还原为正确的文件名。
+    """
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("gbk")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
 
 
 class FileService:
@@ -24,78 +65,178 @@ class FileService:
         self.upload_path = Path(settings.LOCAL_STORAGE_PATH)
         self.upload_path.mkdir(parents=True, exist_ok=True)
 
-    def _calculate_file_hash(self, content: bytes) -> str:
-        """计算文件的 SHA256 哈希值"""
+    def _open_temp_file(self) -> tuple[Path, BinaryIO]:
+        """在上传目录中创建一个临时文件，与最终文件位于同一文件系统，便于原子重命名"""
+        temp_path = self.upload_path / f".upload-{uuid.uuid4().hex}.part"
+        return temp_path, temp_path.open("wb")
+
+    def _write_chunk(self, target: BinaryIO, sha256_hash, chunk: bytes) -> None:
+        """写入一个数据块并更新增量哈希（在线程池中执行）"""
+        sha256_hash.update(chunk)
+        target.write(chunk)
+
+    def _copy_to_temp_file(self, source: BinaryIO) -> tuple[Path, str, int]:
+        """
+        _stream_to_temp_file 的同步版本（在线程池中执行），
+        用于 ZIP 压缩包成员等同步文件对象：边解压边写入临时文件并计算哈希。
+        """
+        temp_path, target = self._open_temp_file()
         sha256_hash = hashlib.sha256()
-        sha256_hash.update(content)
-        return sha256_hash.hexdigest()
-
-    def _save_file_locally(
-        self, file_content: bytes, file_hash: str, extension: str
-    ) -> str:
-        """将文件同步保存到本地，并以文件哈希值命名"""
-        file_location = self.upload_path / f"{file_hash}{extension}"
+        filesize = 0
         try:
-            file_location.write_bytes(file_content)
-            return str(file_location)
-        except IOError as e:
-            logger.error(f"无法将文件写入磁盘: {e}")
-            raise HTTPException(status_code=500, detail="服务器无法保存上传的文件。")
+            with target:
+                while chunk := source.read(settings.UPLOAD_CHUNK_SIZE):
+                    self._write_chunk(target, sha256_hash, chunk)
+                    filesize += len(chunk)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return temp_path, sha256_hash.hexdigest(), filesize
 
-    async def handle_file_upload(
-        self, session: AsyncSession, *, file: UploadFile, account_id: int
-    ) -> FileMetadata:
+    async def _stream_to_temp_file(self, file: UploadFile) -> tuple[Path, str, int]:
         """
-        处理文件上传的核心逻辑。
+        将上传内容按块写入临时文件，同时增量计算 SHA256。
+        任何时候内存中只保留一个数据块，磁盘写入都在线程池中执行，不阻塞事件循环。
+
+        返回:
+            (临时文件路径, 文件哈希, 文件大小)
         """
+        temp_path, target = await run_in_threadpool(self._open_temp_file)
+        sha256_hash = hashlib.sha256()
+        filesize = 0
         try:
-            # --- 使用 assert 进行类型收窄 ---
-            # 我们断言这些值必须存在，否则就是无效的上传请求。
-            # Pylance 会理解 assert 语句，并在后续代码中认为这些变量是非 None 类型。
-            assert file.filename is not None, "缺少文件名。"
-            assert file.size is not None, "缺少文件大小信息。"
-            assert file.content_type is not None, "缺少文件类型信息。"
-        except AssertionError as e:
-            # 捕获断言错误，并将其转换为对前端友好的400错误。
-            raise HTTPException(status_code=400, detail=f"上传的文件元数据不完整: {e}")
+            try:
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    await run_in_threadpool(
+                        self._write_chunk, target, sha256_hash, chunk
+                    )
+                    filesize += len(chunk)
+            finally:
+                await run_in_threadpool(target.close)
+        except Exception:
+            await run_in_threadpool(temp_path.unlink, missing_ok=True)
+            raise
+        return temp_path, sha256_hash.hexdigest(), filesize
 
-        # 1. 读取文件内容并计算哈希
-        file_content = await file.read()
-        file_hash = self._calculate_file_hash(file_content)
+    def _final_path(self, file_hash: str, filename: str) -> Path:
+        """上传文件以内容哈希命名，保留原始扩展名供解析器识别格式"""
+        return self.upload_path / f"{file_hash}{Path(filename).suffix.lower()}"
 
-        # 2. 检查文件是否已存在
+    async def register_file(
+        self,
+        session: AsyncSession,
+        *,
+        temp_path: Path,
+        file_hash: str,
+        filename: str,
+        filesize: int,
+        mime_type: str,
+        account_id: int,
+        commit: bool = True,
+    ) -> FileMetadata:
+        """
+        登记一个已完整落盘的上传文件：查重、创建元数据、以哈希值命名并创建后台处理任务。
+        调用方负责在失败时清理 temp_path。
+
+        参数:
+            commit: 是否立即提交并创建后台任务。为 False 时元数据只 flush 不提交，
+                调用方可以在同一事务中更新其他记录，提交后再调用 enqueue_processing；
+                提交失败时需要用 restore_staged_file 把文件移回 temp_path
+                （回滚后元数据对象已过期，应事先取出 file_path）。
+        """
+        # 1. 检查文件是否已存在
         existing_file = await self.repository.get_by_file_hash(
             session, file_hash=file_hash
         )
         if existing_file:
             raise AlreadyExistsException(
-                detail=f"文件 '{file.filename}' 已于 {existing_file.upload_timestamp} 上传。"
+                detail=f"文件 '{filename}' 已于 {existing_file.upload_timestamp} 上传。"
             )
 
-        # 3. 保存文件到本地
-        # 经过 assert 后，file.filename 在这里已经被Pylance认为是 str 类型
-        file_extension = Path(file.filename).suffix
-        file_path = self._save_file_locally(file_content, file_hash, file_extension)
-
-        # 4. 准备要存入数据库的元数据
+        # 2. 创建元数据但不提交，文件就位后再统一提交
+        file_location = self._final_path(file_hash, filename)
         file_meta_in = FileMetadataCreate(
-            filename=file.filename,
-            file_path=file_path,
+            filename=filename,
+            file_path=str(file_location),
             file_hash=file_hash,
-            filesize=file.size,
-            mime_type=file.content_type,
+            filesize=filesize,
+            mime_type=mime_type,
             account_id=account_id,
         )
+        try:
+            [db_file_meta] = await self.repository.create_many(
+                session, objs_in=[file_meta_in]
+            )
+        except IntegrityError:
+            await session.rollback()
+            raise AlreadyExistsException(
+                detail=f"文件 '{filename}' 刚刚被其他请求上传。"
+            )
 
-        # 5. 调用仓库层，创建数据库记录
-        db_file_meta = await self.repository.create(session, obj_in=file_meta_in)
+        # 3. 将临时文件原子地重命名为以内容哈希命名的正式文件
+        try:
+            await run_in_threadpool(os.replace, temp_path, file_location)
+        except OSError as e:
+            await session.rollback()
+            logger.error(f"无法将文件写入磁盘: {e}")
+            raise HTTPException(status_code=500, detail="服务器无法保存上传的文件。")
+        if not commit:
+            return db_file_meta
+
+        # 4. 提交元数据并创建后台处理任务
+        try:
+            await session.commit()
+        except Exception:
+            await self.restore_staged_file(file_location, temp_path)
+            raise
+        await self.enqueue_processing(db_file_meta)
+        return db_file_meta
+
+    async def restore_staged_file(self, file_path: str | Path, temp_path: Path) -> None:
+        """元数据提交失败时把正式文件移回临时路径，调用方可以原样重试"""
+        await run_in_threadpool(os.replace, file_path, temp_path)
 
-        # 6. 创建后台处理任务
-        logger.info(f"准备为文件 ID {db_file_meta.id} 创建后台处理任务...")
-        task = await process_file_task.kiq(file_id=db_file_meta.id)
+    async def enqueue_processing(self, file_meta: FileMetadata) -> None:
+        """为已提交的文件创建后台处理任务"""
+        logger.info(f"准备为文件 ID {file_meta.id} 创建后台处理任务...")
+        task = await enqueue_file_processing(
+            file_meta.id, filesize=file_meta.filesize, mime_type=file_meta.mime_type
+        )
         logger.success(f"后台任务 {task.task_id} 已成功创建！")
 
-        return db_file_meta
+    async def handle_file_upload(
+        self, session: AsyncSession, *, file: UploadFile, account_id: int
+    ) -> FileMetadata:
+        """
+        处理文件上传的核心逻辑。
+        """
+        try:
+            # --- 使用 assert 进行类型收窄 ---
+            # 我们断言这些值必须存在，否则就是无效的上传请求。
+            # Pylance 会理解 assert 语句，并在后续代码中认为这些变量是非 None 类型。
+            assert file.filename is not None, "缺少文件名。"
+            assert file.content_type is not None, "缺少文件类型信息。"
+        except AssertionError as e:
+            # 捕获断言错误，并将其转换为对前端友好的400错误。
+            raise HTTPException(status_code=400, detail=f"上传的文件元数据不完整: {e}")
+
+        # 1. 流式写入临时文件，同时计算哈希和大小
+        temp_path, file_hash, filesize = await self._stream_to_temp_file(file)
+
+        # 2. 查重、重命名、创建元数据和后台任务
+        try:
+            return await self.register_file(
+                session,
+                temp_path=temp_path,
+                file_hash=file_hash,
+                filename=file.filename,
+                filesize=filesize,
+                mime_type=file.content_type,
+                account_id=account_id,
+            )
+        finally:
+            # 成功时临时文件已被重命名，这里只会清理失败留下的临时文件
+            await run_in_threadpool(temp_path.unlink, missing_ok=True)
 
     async def get_files_by_account(
         self, session: AsyncSession, *, account_id: int, skip: int = 0, limit: int = 100
@@ -105,6 +246,238 @@ class FileService:
             session, account_id=account_id, skip=skip, limit=limit
         )
 
+    def _too_many_files(self) -> HTTPException:
+        return HTTPException(
+            status_code=400,
+            detail=f"一次最多上传 {settings.UPLOAD_BATCH_MAX_FILES} 个文件。",
+        )
+
+    def _extract_zip(
+        self,
+        archive: BinaryIO,
+        archive_name: str,
+        skipped: list[SkippedFile],
+        max_files: int,
+    ) -> list[StagedFile]:
+        """
+        逐个成员流式解压 ZIP 压缩包（在线程池中执行），每个成员边解压边写入临时文件，
+        不会把整个成员读入内存。格式不支持的成员记入 skipped。
+
+        max_files 为本批次剩余的文件名额，支持的成员超出名额时在解压该成员之前就拒绝，
+        不会把成员很多的压缩包整个写到磁盘上再报错。
+        """
+        staged: list[StagedFile] = []
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    name = _zip_member_name(info)
+                    basename = PurePosixPath(name).name
+                    # 跳过目录以及 macOS 打包时附带的元数据文件
+                    if (
+                        info.is_dir()
+                        or basename.startswith(".")
+                        or name.startswith("__MACOSX/")
+                    ):
+                        continue
+                    mime_type = SUPPORTED_FILE_TYPES.get(
+                        PurePosixPath(basename).suffix.lower()
+                    )
+                    if mime_type is None:
+                        skipped.append(
+                            SkippedFile(
+                                filename=f"{archive_name}/{name}", reason="文件类型不支持"
+                            )
+                        )
+                        continue
+                    if len(staged) >= max_files:
+                        raise self._too_many_files()
+                    with zf.open(info) as member:
+                        temp_path, file_hash, filesize = self._copy_to_temp_file(
+                            member
+                        )
+                    staged.append(
+                        StagedFile(temp_path, file_hash, name, filesize, mime_type)
+                    )
+        except zipfile.BadZipFile:
+            self._discard_staged_files(staged)
+            raise HTTPException(
+                status_code=400, detail=f"'{archive_name}' 不是有效的 ZIP 压缩包。"
+            )
+        except Exception:
+            self._discard_staged_files(staged)
+            raise
+        return staged
+
+    def _discard_staged_files(self, staged: list[StagedFile]) -> None:
+        """删除残留的临时文件，已被重命名为正式文件的会被忽略"""
+        for item in staged:
+            item.temp_path.unlink(missing_ok=True)
+
+    def _move_staged_files(self, staged: list[StagedFile]) -> None:
+        """将临时文件重命名为以内容哈希命名的正式文件（在线程池中执行）"""
+        for item in staged:
+            os.replace(item.temp_path, self._final_path(item.file_hash, item.filename))
+
+    async def _stage_upload(
+        self, file: UploadFile, skipped: list[SkippedFile], max_files: int
+    ) -> list[StagedFile]:
+        """
+        将批量上传中的一个文件写入临时文件；ZIP 压缩包会被展开为多个文件。
+        max_files 为本批次剩余的文件名额，超出时在写入临时文件之前抛出 400。
+        """
+        filename = file.filename or ""
+        suffix = Path(filename).suffix.lower()
+        if file.content_type in ZIP_MIME_TYPES or suffix == ".zip":
+            return await run_in_threadpool(
+                self._extract_zip, file.file, filename, skipped, max_files
+            )
+
+        mime_type = SUPPORTED_FILE_TYPES.get(suffix)
+        if not filename or mime_type is None:
+            skipped.append(SkippedFile(filename=filename, reason="文件类型不支持"))
+            return []
+        if max_files <= 0:
+            raise self._too_many_files()
+        temp_path, file_hash, filesize = await self._stream_to_temp_file(file)
+        return [StagedFile(temp_path, file_hash, filename, filesize, mime_type)]
+
+    async def handle_batch_upload(
+        self, session: AsyncSession, *, files: list[UploadFile], account_id: int
+    ) -> dict[str, Any]:
+        """
+        批量上传多个文件或 ZIP 压缩包。
+
+        1. 所有文件（含压缩包成员）先流式写入临时文件并计算哈希；
+        2. 一次查询完成查重，与已上传文件或批次内其他文件重复的文件被跳过；
+        3. 在同一个事务中创建批次和全部文件元数据（一条多行 INSERT），文件就位后提交；
+        4. 为每个文件创建一个后台处理任务，各文件并行处理。
+        """
+        # 上传的文件数本身超出上限时，不必写入任何临时文件
+        if len(files) > settings.UPLOAD_BATCH_MAX_FILES:
+            raise self._too_many_files()
+        if not await account_repository.get(session, account_id):
+            raise NotFoundException(detail=f"ID为 {account_id} 的账户不存在。")
+
+        staged: list[StagedFile] = []
+        skipped: list[SkippedFile] = []
+        try:
+            # 1. 写入临时文件
+            for file in files:
+                staged.extend(
+                    await self._stage_upload(
+                        file, skipped, settings.UPLOAD_BATCH_MAX_FILES - len(staged)
+                    )
+                )
+
+            # 2. 查重
+            existing_hashes = await self.repository.get_existing_hashes(
+                session, file_hashes=[item.file_hash for item in staged]
+            )
+            new_files: list[StagedFile] = []
+            for item in staged:
+                if item.file_hash in existing_hashes:
+                    skipped.append(
+                        SkippedFile(filename=item.filename, reason="文件已上传过")
+                    )
+                else:
+                    existing_hashes.add(item.file_hash)
+                    new_files.append(item)
+            if not new_files:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "message": "没有需要处理的新文件。",
+                        "skipped": [item.model_dump() for item in skipped],
+                    },
+                )
+
+            # 3. 创建批次和文件元数据，文件就位后统一提交
+            try:
+                batch = await upload_batch_repository.add(
+                    session, obj_in=UploadBatchCreate(account_id=account_id)
+                )
+                db_files = await self.repository.create_many(
+                    session,
+                    objs_in=[
+                        FileMetadataCreate(
+                            filename=item.filename,
+                            file_path=str(
+                                self._final_path(item.file_hash, item.filename)
+                            ),
+                            file_hash=item.file_hash,
+                            filesize=item.filesize,
+                            mime_type=item.mime_type,
+                            account_id=account_id,
+                            batch_id=batch.id,
+                        )
+                        for item in new_files
+                    ],
+                )
+                await run_in_threadpool(self._move_staged_files, new_files)
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                raise AlreadyExistsException(
+                    detail="批次中的部分文件刚刚被其他请求上传，请重试。"
+                )
+        finally:
+            # 成功时临时文件已被重命名，这里只会清理被跳过或失败留下的临时文件
+            await run_in_threadpool(self._discard_staged_files, staged)
+
+        # 4. 为每个文件创建后台处理任务
+        # 批量上传属于后台导入，全部进入批量队列，不占用交互队列
+        tasks = await asyncio.gather(
+            *(
+                enqueue_file_processing(
+                    db_file.id,
+                    filesize=db_file.filesize,
+                    mime_type=db_file.mime_type,
+                    bulk=True,
+                )
+                for db_file in db_files
+            )
+        )
+        logger.success(
+            f"批次 {batch.id} 已创建 {len(tasks)} 个后台任务，跳过 {len(skipped)} 个文件。"
+        )
+        return {
+            "id": batch.id,
+            "account_id": batch.account_id,
+            "created_at": batch.created_at,
+            "files": db_files,
+            "skipped": skipped,
+        }
+
+    async def get_batch_status(
+        self, session: AsyncSession, *, batch_id: int
+    ) -> dict[str, Any]:
+        """汇总批次内各文件的处理状态"""
+        summary = await upload_batch_repository.get_status_summary(
+            session, batch_id=batch_id
+        )
+        if not summary:
+            raise NotFoundException(detail=f"ID为 {batch_id} 的上传批次不存在。")
+
+        counts = summary["status_counts"]
+        total = sum(counts.values())
+        if counts.get("PENDING", 0) + counts.get("PROCESSING", 0) > 0:
+            status = "PROCESSING"
+        elif counts.get("FAILED", 0) == 0:
+            status = "SUCCESS"
+        elif counts.get("FAILED", 0) == total:
+            status = "FAILED"
+        else:
+            status = "PARTIAL_FAILED"
+        return {**summary, "total": total, "status": status}
+
+    async def find_file_by_hash(
+        self, session: AsyncSession, *, file_hash: str
+    ) -> FileMetadata | None:
+        """上传前的哈希预检：返回内容相同的已上传文件，不存在时返回 None"""
+        return await self.repository.get_by_file_hash(
+            session, file_hash=file_hash.lower()
+        )
+
     async def get_file_by_id(
         self, session: AsyncSession, *, file_id: int
     ) -> FileMetadata:
@@ -129,7 +502,13 @@ class FileService:
             # 即使物理文件删除失败，也只记录错误，继续删除数据库记录
             logger.error(f"删除物理文件失败: {file_to_delete.file_path}. 错误: {e}")
 
-        # 3. 删除数据库记录
+        # 3. 删除解析时生成的 Parquet 缓存
+        try:
+            ParsedFileCache(file_to_delete.file_hash).remove()
+        except Exception as e:
+            logger.error(f"删除 Parquet 缓存失败: {file_to_delete.file_hash}. 错误: {e}")
+
+        # 4. 删除数据库记录
         await self.repository.delete_obj(session, db_obj=file_to_delete)
 
 
@@ -0,0 +1,97 @@
+# app/services/parser_plan_service.py
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from app.core.exceptions import NotFoundException, ServiceUnavailableException
+from app.schemas.parser_plan import ParserPlan, ParserPlanOverride
+from app.tasks.utils.parser_plan import compute_header_signature, parser_plan_registry
+from app.tasks.utils.parser_service import parser_service
+
+
+class ParserPlanService:
+    """
+    查看和覆盖按表头签名缓存的解析计划。
+    """
+
+    def __init__(self):
+        self.registry = parser_plan_registry
+
+    def get_signature(self, columns: list[str]) -> str:
+        """计算一个表头的签名，便于为尚未上传过的格式预先设置覆盖计划"""
+        return compute_header_signature(columns)
+
+    async def get_plan(self, signature: str) -> ParserPlan:
+        plan = await self.registry.get(signature)
+        if not plan:
+            raise NotFoundException(detail=f"签名为 {signature} 的解析计划不存在。")
+        return plan
+
+    def _validate_override(self, signature: str, plan_in: ParserPlanOverride) -> None:
+        """校验覆盖计划与表头一致，且选择的模式所需的列都已指定"""
+        if compute_header_signature(plan_in.columns) != signature:
+            raise HTTPException(status_code=400, detail="表头与签名不匹配。")
+
+        unknown_fields = set(plan_in.column_picks) - set(parser_service.COLUMN_MAPPING)
+        if unknown_fields:
+            raise HTTPException(
+                status_code=400, detail=f"未知的标准字段: {sorted(unknown_fields)}"
+            )
+        missing_columns = {
+            column for column in plan_in.column_picks.values() if column
+        } - set(plan_in.columns)
+        if missing_columns:
+            raise HTTPException(
+                status_code=400, detail=f"表头中不存在这些列: {sorted(missing_columns)}"
+            )
+
+        required = list(plan_in.cash_rules)
+        if plan_in.date_mode == "separate":
+            required += ["transaction_date_str", "transaction_time_str"]
+        elif plan_in.date_mode == "combined":
+            required.append("transaction_date_str")
+        if plan_in.amount_mode == "single":
+            required += ["amount_single", "transaction_type_flag"]
+        not_picked = [field for field in required if not plan_in.column_picks.get(field)]
+        if plan_in.amount_mode == "separate" and not (
+            plan_in.column_picks.get("amount_in")
+            or plan_in.column_picks.get("amount_out")
+        ):
+            not_picked.append("amount_in/amount_out")
+        if not_picked:
+            raise HTTPException(
+                status_code=400, detail=f"所选模式需要指定这些字段: {not_picked}"
+            )
+
+    async def set_override(
+        self, signature: str, plan_in: ParserPlanOverride
+    ) -> ParserPlan:
+        """强制某种表头使用指定的解析计划，之后上传的同格式文件都会按它解析"""
+        self._validate_override(signature, plan_in)
+        plan_data = plan_in.model_dump()
+        plan_data["column_picks"] = {
+            std_name: plan_in.column_picks.get(std_name)
+            for std_name in parser_service.COLUMN_MAPPING
+        }
+        plan = ParserPlan(**plan_data, signature=signature, source="override")
+        try:
+            await self.registry.set_override(plan)
+        except RedisError as e:
+            raise ServiceUnavailableException(
+                detail=f"解析计划存储暂时不可用，覆盖计划未保存: {e}"
+            )
+        return plan
+
+    async def delete_override(self, signature: str) -> None:
+        """删除覆盖计划，恢复自动检测"""
+        try:
+            deleted = await self.registry.delete_override(signature)
+        except RedisError as e:
+            raise ServiceUnavailableException(
+                detail=f"解析计划存储暂时不可用，覆盖计划未删除: {e}"
+            )
+        if not deleted:
+            raise NotFoundException(detail=f"签名为 {signature} 的覆盖计划不存在。")
+
+
+# 创建服务单例
+parser_plan_service = ParserPlanService()
@@ -1,9 +1,44 @@
 # app/services/transaction_service.py
+import base64
+import binascii
+import datetime
+import json
+
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repository.transaction import transaction_repository
+from app.repository.transaction import KeysetPosition, transaction_repository
 from app.models.transaction import Transaction
 from app.core.exceptions import NotFoundException
+from app.schemas.transaction import (
+    TransactionFilter,
+    TransactionPage,
+    TransactionRow,
+    TransactionRowPage,
+)
+
+
+def encode_cursor(transaction_date: datetime.datetime, transaction_id: int) -> str:
+    """将一条交易的排序键 (transaction_date, id) 编码为不透明的游标字符串"""
+    payload = json.dumps(
+        [transaction_date.isoformat(), transaction_id], separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> KeysetPosition:
+    """解析游标，游标无效时返回 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        transaction_date = datetime.datetime.fromisoformat(date_str)
+        if not isinstance(transaction_id, int):
+            raise ValueError(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标。"
+        )
+    return transaction_date, transaction_id
 
 
 class TransactionService:
@@ -11,21 +46,116 @@ class TransactionService:
         self.repository = transaction_repository
 
     async def get_transactions_for_account(
-        self, session: AsyncSession, *, account_id: int, skip: int = 0, limit: int = 100
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        filters: TransactionFilter | None = None,
     ) -> list[Transaction]:
         """获取指定账户下的所有交易记录"""
         return await self.repository.get_multi_by_account_id(
-            session, account_id=account_id, skip=skip, limit=limit
+            session, account_id=account_id, skip=skip, limit=limit, filters=filters
         )
 
     async def get_transactions_for_person(
-        self, session: AsyncSession, *, person_id: int, skip: int = 0, limit: int = 100
+        self,
+        session: AsyncSession,
+        *,
+        person_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        filters: TransactionFilter | None = None,
     ) -> list[Transaction]:
         """
         获取一个用户所有账户下的全部交易记录。
         """
         return await self.repository.get_multi_by_person_id(
-            session, person_id=person_id, skip=skip, limit=limit
+            session, person_id=person_id, skip=skip, limit=limit, filters=filters
+        )
+
+    async def get_transaction_page_for_account(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int,
+        cursor: str | None = None,
+        limit: int = 100,
+        filters: TransactionFilter | None = None,
+    ) -> TransactionPage:
+        """按游标获取指定账户下的一页交易记录"""
+        transactions = await self.repository.get_multi_by_account_id(
+            session,
+            account_id=account_id,
+            limit=limit + 1,
+            after=decode_cursor(cursor) if cursor else None,
+            filters=filters,
+        )
+        return self._build_page(transactions, limit=limit)
+
+    async def get_transaction_page_for_person(
+        self,
+        session: AsyncSession,
+        *,
+        person_id: int,
+        cursor: str | None = None,
+        limit: int = 100,
+        filters: TransactionFilter | None = None,
+    ) -> TransactionPage:
+        """按游标获取一个用户所有账户下的一页交易记录"""
+        transactions = await self.repository.get_multi_by_person_id(
+            session,
+            person_id=person_id,
+            limit=limit + 1,
+            after=decode_cursor(cursor) if cursor else None,
+            filters=filters,
+        )
+        return self._build_page(transactions, limit=limit)
+
+    async def get_transaction_rows(
+        self,
+        session: AsyncSession,
+        *,
+        account_id: int | None = None,
+        person_id: int | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+        filters: TransactionFilter | None = None,
+    ) -> TransactionRowPage:
+        """
+        按游标获取一页扁平交易，account_id 与 person_id 二选一。
+        与 get_transaction_page_for_* 使用同一种游标，但返回的是字典而不是 ORM 实体。
+        """
+        rows: list[TransactionRow] = await self.repository.get_rows(
+            session,
+            account_id=account_id,
+            person_id=person_id,
+            limit=limit + 1,
+            after=decode_cursor(cursor) if cursor else None,
+            filters=filters,
+        )
+        has_more = len(rows) > limit
+        items = rows[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(
+                items[-1]["transaction_date"], items[-1]["id"]
+            )
+        return {"items": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _build_page(transactions: list[Transaction], *, limit: int) -> TransactionPage:
+        # 多取一条用来判断是否还有下一页，省去额外的 COUNT 查询
+        has_more = len(transactions) > limit
+        items = transactions[:limit]
+        return TransactionPage(
+            items=items,
+            next_cursor=(
+                encode_cursor(items[-1].transaction_date, items[-1].id)
+                if has_more
+                else None
+            ),
         )
 
     async def get_transaction_by_id(
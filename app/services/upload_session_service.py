@@ -0,0 +1,199 @@
+# app/services/upload_session_service.py
+import hashlib
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.core.config import settings
+from app.core.exceptions import AlreadyExistsException, NotFoundException
+from app.models.file_metadata import FileMetadata
+from app.models.upload_session import UploadSession
+from app.repository.account import account_repository
+from app.repository.upload_session import upload_session_repository
+from app.schemas.upload_session import UploadSessionCreate
+from app.services.file_service import file_service
+
+
+class UploadSessionService:
+    """
+    可续传分块上传的服务层。
+
+    流程：创建会话 -> 按偏移量 PUT 数据块（断线后先查询 received_bytes 再续传）-> 完成。
+    已接收的数据追加写入 {LOCAL_STORAGE_PATH}/.sessions/{id}.part，
+    完成时计算哈希并交给 FileService.register_file，之后与普通上传的流程完全一致。
+    """
+
+    def __init__(self):
+        self.repository = upload_session_repository
+        self.session_path = Path(settings.LOCAL_STORAGE_PATH) / ".sessions"
+        self.session_path.mkdir(parents=True, exist_ok=True)
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.session_path / f"{upload_id}.part"
+
+    def _hash_file(self, path: Path) -> str:
+        """分块读取已接收的文件计算 SHA256（在线程池中执行）"""
+        sha256_hash = hashlib.sha256()
+        with path.open("rb") as f:
+            while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+                sha256_hash.update(chunk)
+        return sha256_hash.hexdigest()
+
+    async def _get_locked(self, session: AsyncSession, upload_id: str) -> UploadSession:
+        upload = await self.repository.get_for_update(session, id=upload_id)
+        if not upload:
+            raise NotFoundException(detail=f"ID为 {upload_id} 的上传会话不存在。")
+        return upload
+
+    async def create_session(
+        self, session: AsyncSession, *, upload_in: UploadSessionCreate
+    ) -> UploadSession:
+        """创建上传会话，并在磁盘上准备一个空的暂存文件"""
+        if not await account_repository.get(session, upload_in.account_id):
+            raise NotFoundException(
+                detail=f"ID为 {upload_in.account_id} 的账户不存在。"
+            )
+        upload = await self.repository.create(session, obj_in=upload_in)
+        await run_in_threadpool(self._part_path(upload.id).touch)
+        logger.info(
+            f"已创建上传会话 {upload.id}: {upload.filename} ({upload.filesize} 字节)"
+        )
+        return upload
+
+    async def get_session(
+        self, session: AsyncSession, *, upload_id: str
+    ) -> UploadSession:
+        upload = await self.repository.get(session, upload_id)
+        if not upload:
+            raise NotFoundException(detail=f"ID为 {upload_id} 的上传会话不存在。")
+        return upload
+
+    async def append_chunk(
+        self,
+        session: AsyncSession,
+        *,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+    ) -> UploadSession:
+        """
+        从 offset 处写入一个数据块。
+
+        offset 必须等于已接收的字节数，否则返回 409 并告知当前偏移量，客户端据此续传。
+        连接中途断开时，已写入磁盘的部分同样会计入 received_bytes，续传时无需重发。
+        """
+        upload = await self._get_locked(session, upload_id)
+        if upload.status != "UPLOADING":
+            raise HTTPException(
+                status_code=409, detail="上传会话已完成，不能再写入数据。"
+            )
+        if offset != upload.received_bytes:
+            raise HTTPException(
+                status_code=409,
+                detail=f"偏移量不匹配，服务器已接收 {upload.received_bytes} 字节。",
+            )
+
+        part_path = self._part_path(upload_id)
+        if not await run_in_threadpool(part_path.exists):
+            raise HTTPException(
+                status_code=410, detail="暂存数据已丢失，请重新创建上传会话。"
+            )
+
+        def open_at_offset():
+            # 截掉上次中断时写入但未被记录的尾部数据，保证文件长度与 received_bytes 一致
+            target = part_path.open("r+b")
+            target.truncate(offset)
+            target.seek(offset)
+            return target
+
+        target = await run_in_threadpool(open_at_offset)
+        received = offset
+        try:
+            async for chunk in chunks:
+                if received + len(chunk) > upload.filesize:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"数据超出声明的文件大小 {upload.filesize} 字节。",
+                    )
+                await run_in_threadpool(target.write, chunk)
+                received += len(chunk)
+        finally:
+            await run_in_threadpool(target.close)
+            if received != offset:
+                upload = await self.repository.update(
+                    session, db_obj=upload, obj_in={"received_bytes": received}
+                )
+            else:
+                # 没有写入任何数据，只需结束事务以释放行锁
+                await session.rollback()
+        return upload
+
+    async def complete(self, session: AsyncSession, *, upload_id: str) -> FileMetadata:
+        """
+        结束上传：计算哈希并登记文件、创建后台处理任务。
+        文件元数据与会话的 COMPLETED 状态在同一个事务中提交，行锁一直持有到提交，
+        重复调用会返回同一个文件，客户端在响应丢失后可以安全地重试。
+        """
+        upload = await self._get_locked(session, upload_id)
+        if upload.status == "COMPLETED" and upload.file_id is not None:
+            await session.rollback()
+            return await file_service.get_file_by_id(session, file_id=upload.file_id)
+        if upload.received_bytes != upload.filesize:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"文件尚未上传完整：已接收 {upload.received_bytes} / "
+                    f"{upload.filesize} 字节。"
+                ),
+            )
+
+        part_path = self._part_path(upload_id)
+        if not await run_in_threadpool(part_path.exists):
+            raise HTTPException(
+                status_code=410, detail="暂存数据已丢失，请重新创建上传会话。"
+            )
+        file_hash = await run_in_threadpool(self._hash_file, part_path)
+        try:
+            file_meta = await file_service.register_file(
+                session,
+                temp_path=part_path,
+                file_hash=file_hash,
+                filename=upload.filename,
+                filesize=upload.filesize,
+                mime_type=upload.mime_type,
+                account_id=upload.account_id,
+                commit=False,
+            )
+        except AlreadyExistsException:
+            # 内容重复的文件不会再被登记，会话和暂存数据都没有保留的必要
+            await self.abort(session, upload_id=upload_id)
+            raise
+
+        # 会话状态与文件元数据一起提交，提交之前其他请求看不到中间状态
+        file_path = file_meta.file_path
+        upload.status = "COMPLETED"
+        upload.file_id = file_meta.id
+        try:
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            await file_service.restore_staged_file(file_path, part_path)
+            raise
+
+        await file_service.enqueue_processing(file_meta)
+        logger.success(f"上传会话 {upload_id} 已完成，文件 ID: {file_meta.id}")
+        return file_meta
+
+    async def abort(self, session: AsyncSession, *, upload_id: str) -> None:
+        """放弃上传，删除会话记录和已接收的数据"""
+        upload = await self._get_locked(session, upload_id)
+        await run_in_threadpool(self._part_path(upload_id).unlink, missing_ok=True)
+        await self.repository.delete_obj(session, db_obj=upload)
+        await session.commit()
+
+
+upload_session_service = UploadSessionService()
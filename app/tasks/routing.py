@@ -0,0 +1,63 @@
+# app/tasks/routing.py
+from loguru import logger
+from taskiq import AsyncBroker, AsyncTaskiqTask
+from taskiq.kicker import AsyncKicker
+
+from app.core.config import settings
+from app.core.taskiq_app import broker, bulk_broker
+from app.tasks.tasks import process_file_task
+
+# 各格式相对于 CSV 的处理成本系数：xlsx 是压缩过的 XML，
+# 同样的字节数对应更多的行，解析也更慢；xls 为未压缩的二进制格式
+COST_FACTORS = {
+    "text/csv": 1,
+    "application/vnd.ms-excel": 2,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": 6,
+}
+
+
+def estimate_ingest_cost(filesize: int, mime_type: str) -> int:
+    """按文件大小和格式估算处理成本，单位为折算成 CSV 后的字节数"""
+    return filesize * COST_FACTORS.get(mime_type, 1)
+
+
+def task_priority(cost: int) -> int:
+    """交互队列中的优先级：成本越低优先级越高，范围 0 ~ TASK_MAX_PRIORITY"""
+    ratio = min(cost / settings.TASK_BULK_MIN_COST, 1.0)
+    return round(settings.TASK_MAX_PRIORITY * (1 - ratio))
+
+
+def _file_task_kicker(target_broker: AsyncBroker, **labels) -> AsyncKicker:
+    """
+    构造发往指定 broker 的 kicker。
+    kicker().with_labels() 会原地修改任务自身的 labels，优先级因此会残留到之后的每次调用，
+    这里为每次调用复制一份 labels。
+    """
+    return AsyncKicker(
+        task_name=process_file_task.task_name,
+        broker=target_broker,
+        labels={**process_file_task.labels, **labels},
+        return_type=process_file_task.return_type,
+    )
+
+
+async def enqueue_file_processing(
+    file_id: int, *, filesize: int, mime_type: str, bulk: bool = False
+) -> AsyncTaskiqTask:
+    """
+    为文件创建后台处理任务，并按预估成本选择队列：
+
+    - 预估成本达到 TASK_BULK_MIN_COST 或明确指定 bulk（批量上传）时进入批量队列；
+    - 其余进入交互队列，成本越低优先级越高，单页的小文件不会排在大文件后面。
+    """
+    cost = estimate_ingest_cost(filesize, mime_type)
+    if bulk or cost >= settings.TASK_BULK_MIN_COST:
+        kicker = _file_task_kicker(bulk_broker)
+        queue = settings.TASK_BULK_QUEUE
+    else:
+        priority = task_priority(cost)
+        kicker = _file_task_kicker(broker, priority=priority)
+        queue = f"{settings.TASK_INTERACTIVE_QUEUE} (priority {priority})"
+    task = await kicker.kiq(file_id=file_id)
+    logger.info(f"文件 ID {file_id} 的处理任务已进入 {queue} 队列。")
+    return task
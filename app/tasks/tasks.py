@@ -1,18 +1,29 @@
 # app/tasks/tasks.py
+import time
+from datetime import UTC, datetime, timedelta
+
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import Context, TaskiqDepends
 
-from app.core.taskiq_app import broker
+from app.core.config import settings
+from app.core.taskiq_app import CustomAioPikaBroker, broker
 from app.core.database import get_db_for_taskiq
+from app.models.file_metadata import FileMetadata
+from app.tasks.utils.ingestion_metrics import IngestionMetrics
 from app.tasks.utils.parser_service import parser_service
 from app.repository.file_metadata import file_metadata_repository
+from app.repository.transaction import transaction_repository
 
 @broker.task
 async def process_file_task(
-    file_id: int, session: AsyncSession = get_db_for_taskiq
+    file_id: int,
+    session: AsyncSession = get_db_for_taskiq,
+    context: Context = TaskiqDepends(),
 ) -> dict:
     """
     负责处理上传文件的后台任务。
+    任务可能由交互队列或批量队列的 worker 执行，进程池和分片任务都使用当前 worker 的 broker。
     """
     logger.info(f"Taskiq 开始处理文件 ID: {file_id} ")
     
@@ -22,21 +33,73 @@ async def process_file_task(
         logger.error(f"任务失败：找不到文件 ID: {file_id}")
         return {"error": "File not found"}
 
+    worker_broker = context.broker
+    executor = (
+        worker_broker.process_pool
+        if isinstance(worker_broker, CustomAioPikaBroker)
+        else None
+    )
+
+    # 记录各阶段耗时和行数，无论成功还是失败都会保存到 file_meta.metrics
+    metrics = IngestionMetrics()
+    started = time.perf_counter()
+
     try:
         # 2. 更新状态为“处理中”
         file_meta.processing_status = "PROCESSING"
         session.add(file_meta)
         await session.commit()
 
-        # 3. 调用核心服务进行解析和入库
+        # 3. 大文件拆分为分片，交给多个 worker 并行入库，由最后完成的分片更新最终状态
+        if (
+            settings.INGEST_PARALLEL_MIN_BYTES > 0
+            and file_meta.filesize >= settings.INGEST_PARALLEL_MIN_BYTES
+        ):
+            split = await parser_service.prepare_file_parts(
+                session,
+                file_path=file_meta.file_path,
+                executor=executor,
+                file_hash=file_meta.file_hash,
+                metrics=metrics,
+            )
+            if split is not None:
+                clean_path, parts = split
+                file_meta.parts_total = len(parts)
+                file_meta.parts_done = 0
+                file_meta.parts_failed = 0
+                file_meta.parts_started_at = datetime.now(UTC)
+                file_meta.error_message = None
+                metrics.add_seconds("total", time.perf_counter() - started)
+                file_meta.metrics = metrics.to_dict()
+                session.add(file_meta)
+                await session.commit()
+
+                # 大文件由批量队列处理，分片任务发回同一队列
+                for part_index, row_groups in enumerate(parts):
+                    kicker = process_file_part_task.kicker().with_broker(worker_broker)
+                    await kicker.kiq(
+                        file_id=file_id,
+                        part_index=part_index,
+                        clean_path=str(clean_path),
+                        row_groups=row_groups,
+                    )
+                logger.info(f"文件 {file_id} 已拆分为 {len(parts)} 个分片任务。")
+                return {"parts_total": len(parts)}
+
+        # 4. 调用核心服务进行解析和入库
         result = await parser_service.process_and_save_transactions(
             session=session,
             file_path=file_meta.file_path,
-            account_id=file_meta.account_id
+            account_id=file_meta.account_id,
+            executor=executor,
+            file_hash=file_meta.file_hash,
+            metrics=metrics,
         )
         
-        # 4. 更新状态为“成功”
+        # 5. 更新状态为“成功”
         file_meta.processing_status = "SUCCESS"
+        metrics.add_seconds("total", time.perf_counter() - started)
+        file_meta.metrics = metrics.to_dict()
         session.add(file_meta)
         await session.commit()
         
@@ -45,10 +108,169 @@ async def process_file_task(
 
     except Exception as e:
         logger.exception(f"Taskiq 处理文件 {file_id} 失败: {e}")
-        # 5. 如果失败，更新状态并记录错误信息
+        # 6. 如果失败，更新状态并记录错误信息
         if file_meta:
+            # 入库失败后事务处于中止状态，先回滚才能写入失败状态和指标
+            await session.rollback()
             file_meta.processing_status = "FAILED"
             file_meta.error_message = str(e)
+            metrics.add_seconds("total", time.perf_counter() - started)
+            file_meta.metrics = metrics.to_dict()
             session.add(file_meta)
             await session.commit()
-        raise # 重新抛出异常，Taskiq会将其标记为失败
\ No newline at end of file
+        raise # 重新抛出异常，Taskiq会将其标记为失败
+
+
+@broker.task
+async def process_file_part_task(
+    file_id: int,
+    part_index: int,
+    clean_path: str,
+    row_groups: list[int],
+    session: AsyncSession = get_db_for_taskiq,
+) -> dict:
+    """
+    入库大文件的一个分片。每个分片在独立的事务中提交，并把自己的指标记录到文件上，
+    最后一个结束的分片（无论成功或失败）负责合并指标并更新文件的最终状态。
+    """
+    logger.info(f"Taskiq 开始处理文件 ID: {file_id} 的分片 {part_index}")
+    file_meta = await file_metadata_repository.get(session, id=file_id)
+    if not file_meta:
+        logger.error(f"分片任务失败：找不到文件 ID: {file_id}")
+        return {"error": "File not found"}
+    account_id = file_meta.account_id
+
+    metrics = IngestionMetrics()
+    try:
+        result = await parser_service.save_file_part(
+            session,
+            clean_path=clean_path,
+            row_groups=row_groups,
+            account_id=account_id,
+            metrics=metrics,
+        )
+    except Exception as e:
+        logger.exception(f"文件 {file_id} 的分片 {part_index} 入库失败: {e}")
+        await session.rollback()
+        counters = await file_metadata_repository.record_part_result(
+            session,
+            file_id=file_id,
+            part_index=part_index,
+            metrics=metrics.to_dict(),
+            failed=True,
+            error_message=f"分片 {part_index} 入库失败: {e}",
+        )
+        await _finish_if_last_part(session, file_id, part_index, counters)
+        raise
+
+    counters = await file_metadata_repository.record_part_result(
+        session,
+        file_id=file_id,
+        part_index=part_index,
+        metrics=metrics.to_dict(),
+        failed=False,
+    )
+    await _finish_if_last_part(session, file_id, part_index, counters)
+    logger.success(
+        f"文件 {file_id} 的分片 {part_index} 入库成功: {result}，"
+        f"阶段耗时: {metrics.to_dict()['stage_seconds']}"
+    )
+    return result
+
+
+@broker.task(schedule=[{"cron": settings.INGEST_PART_RECONCILE_CRON}])
+async def reconcile_file_parts_task(
+    session: AsyncSession = get_db_for_taskiq,
+) -> dict:
+    """
+    定时检查拆分入库的文件：分片任务丢失（worker 崩溃、消息丢失）时不会有分片来结束文件，
+    超过 INGEST_PART_TIMEOUT_SECONDS 仍未全部结束的文件标记为失败，并合并已结束分片的指标。
+    已提交的分片数据保留，重新上传同一文件时由去重跳过。
+    """
+    started_before = datetime.now(UTC) - timedelta(
+        seconds=settings.INGEST_PART_TIMEOUT_SECONDS
+    )
+    file_ids = await file_metadata_repository.fail_stalled_parts(
+        session, started_before=started_before
+    )
+    for file_id in file_ids:
+        await _save_part_metrics(session, file_id)
+        logger.warning(f"文件 {file_id} 的分片超时未全部完成，已标记为失败。")
+    return {"failed_files": file_ids}
+
+
+@broker.task(schedule=[{"cron": settings.PARTITION_PRECREATE_CRON}])
+async def ensure_upcoming_partitions_task(
+    session: AsyncSession = get_db_for_taskiq,
+) -> dict:
+    """
+    定时提前创建当前月份及之后 PARTITION_PRECREATE_MONTHS 个月的交易分区，
+    新的流水落在已有的分区中，入库前只需一次目录查询，不必在交易表上加排他锁。
+    """
+    now = datetime.now(UTC)
+    # 每月至少 28 天，按 31 天换算可以覆盖到目标月份
+    until = now + timedelta(days=31 * settings.PARTITION_PRECREATE_MONTHS)
+    created = await transaction_repository.ensure_partitions(
+        session, start=now, end=until
+    )
+    if created:
+        logger.info(f"已提前创建交易分区: {', '.join(created)}")
+    return {"created": created}
+
+
+async def _finish_if_last_part(
+    session: AsyncSession,
+    file_id: int,
+    part_index: int,
+    counters: tuple[int, int, int] | None,
+) -> None:
+    """所有分片都有结果后，根据失败的分片数设置文件的最终状态，并合并各分片的指标"""
+    if counters is None:
+        logger.warning(
+            f"文件 {file_id} 已删除或已结束（分片超时），分片 {part_index} 的结果未记录。"
+        )
+        return
+    parts_total, parts_done, parts_failed = counters
+    if parts_done + parts_failed < parts_total:
+        return
+
+    file_meta = await _save_part_metrics(
+        session,
+        file_id,
+        processing_status="SUCCESS" if parts_failed == 0 else "FAILED",
+    )
+    if file_meta:
+        logger.info(
+            f"文件 {file_id} 的 {parts_total} 个分片已全部结束，"
+            f"成功 {parts_done} 个，失败 {parts_failed} 个。"
+        )
+
+
+async def _save_part_metrics(
+    session: AsyncSession, file_id: int, processing_status: str | None = None
+) -> FileMetadata | None:
+    """
+    把拆分阶段和各分片的指标合并为与未拆分文件相同的结构并提交，可同时设置最终状态。
+    各阶段耗时为所有分片的累计值，total 为从开始处理到分片全部结束的墙钟时间。
+    """
+    file_meta = await file_metadata_repository.get(session, id=file_id)
+    if not file_meta:
+        return None
+    # 分片结果由 UPDATE 语句写入，会话中缓存的对象可能是旧值
+    await session.refresh(file_meta)
+
+    saved = dict(file_meta.metrics or {})
+    parts = saved.pop("parts", {})
+    metrics = IngestionMetrics.from_dict(saved)
+    for part in parts.values():
+        metrics.merge(IngestionMetrics.from_dict(part))
+    if file_meta.parts_started_at is not None:
+        elapsed = datetime.now(UTC) - file_meta.parts_started_at
+        metrics.add_seconds("total", elapsed.total_seconds())
+
+    if processing_status is not None:
+        file_meta.processing_status = processing_status
+    file_meta.metrics = metrics.to_dict()
+    session.add(file_meta)
+    await session.commit()
+    return file_meta
@@ -0,0 +1,128 @@
+# app/tasks/utils/counterparty_classifier.py
+from collections.abc import Iterable
+
+import ahocorasick
+import numpy as np
+import pandas as pd
+
+from app.models.enums import CounterpartyType
+
+# 每个关键词在自动机中携带的类别位，同一关键词可以同时属于多个类别
+MERCHANT_BIT = 1
+PAYMENT_BIT = 2
+BANK_BIT = 4
+
+# 拼接名称时使用的分隔符，关键词中不会出现，因此匹配不会跨越两个名称
+_SEPARATOR = "\x00"
+
+
+class CounterpartyClassifier:
+    """
+    基于 Aho–Corasick 自动机的对手方分类器。
+
+    所有关键词预先编译进同一个自动机，对一个名称只需扫描一遍，
+    即可同时得知它命中了商户、支付平台、银行中的哪些类别。分类规则与原先的逐词循环一致：
+    1. 空名称或“未知对手”为 UNKNOWN；
+    2. 命中商户关键词时，再看是否同时命中支付平台或银行关键词；
+    3. 未命中任何商户关键词时，名称长度超过阈值视为商户，否则视为个人。
+    """
+
+    def __init__(
+        self,
+        merchant_keywords: Iterable[str],
+        payment_keywords: Iterable[str],
+        bank_keywords: Iterable[str],
+        *,
+        unknown_name: str = "未知对手",
+        merchant_min_length: int = 8,
+    ):
+        self.unknown_name = unknown_name
+        self.merchant_min_length = merchant_min_length
+
+        masks: dict[str, int] = {}
+        for bit, keywords in (
+            (MERCHANT_BIT, merchant_keywords),
+            (PAYMENT_BIT, payment_keywords),
+            (BANK_BIT, bank_keywords),
+        ):
+            for keyword in keywords:
+                keyword = keyword.lower().strip()
+                if keyword:
+                    masks[keyword] = masks.get(keyword, 0) | bit
+
+        self._automaton = ahocorasick.Automaton()
+        for keyword, mask in masks.items():
+            self._automaton.add_word(keyword, mask)
+        if masks:
+            self._automaton.make_automaton()
+
+    def _match_mask(self, normalized_name: str) -> int:
+        mask = 0
+        if self._automaton.kind == ahocorasick.AHOCORASICK:
+            for _, bits in self._automaton.iter(normalized_name):
+                mask |= bits
+        return mask
+
+    def _category(self, mask: int, normalized_name: str) -> CounterpartyType:
+        if not normalized_name or normalized_name == self.unknown_name:
+            return CounterpartyType.UNKNOWN
+        if mask & MERCHANT_BIT:
+            if mask & PAYMENT_BIT:
+                return CounterpartyType.PAYMENT_PLATFORM
+            if mask & BANK_BIT:
+                return CounterpartyType.BANK
+            return CounterpartyType.MERCHANT
+        if len(normalized_name) >= self.merchant_min_length:
+            return CounterpartyType.MERCHANT
+        return CounterpartyType.PERSON
+
+    def classify(self, name: str) -> CounterpartyType:
+        """对单个名称分类"""
+        normalized_name = name.lower().strip()
+        return self._category(self._match_mask(normalized_name), normalized_name)
+
+    def classify_many(self, names: pd.Series) -> pd.Series:
+        """
+        批量分类，返回与输入索引一致的类型值 (CounterpartyType.value) 序列。
+
+        所有名称用分隔符拼成一个长字符串，自动机只扫描一遍，
+        再根据每个匹配的结束位置定位它属于哪个名称，按位或合并类别。
+        """
+        normalized = [str(name).lower().strip() for name in names]
+        lengths = np.fromiter(
+            map(len, normalized), dtype=np.int64, count=len(normalized)
+        )
+
+        # 每个名称在拼接字符串中的最后一个字符位置（不含分隔符）
+        name_ends = np.cumsum(lengths + 1) - 2
+        masks = np.zeros(len(normalized), dtype=np.int64)
+        if self._automaton.kind == ahocorasick.AHOCORASICK and normalized:
+            ends, bits = [], []
+            for end, mask in self._automaton.iter(_SEPARATOR.join(normalized)):
+                ends.append(end)
+                bits.append(mask)
+            owners = np.searchsorted(name_ends, ends)
+            np.bitwise_or.at(masks, owners, np.asarray(bits, dtype=np.int64))
+        is_unknown = np.fromiter(
+            (name == self.unknown_name for name in normalized),
+            dtype=bool,
+            count=len(normalized),
+        )
+
+        is_merchant = (masks & MERCHANT_BIT) != 0
+        result = np.select(
+            [
+                (lengths == 0) | is_unknown,
+                is_merchant & ((masks & PAYMENT_BIT) != 0),
+                is_merchant & ((masks & BANK_BIT) != 0),
+                is_merchant | (lengths >= self.merchant_min_length),
+            ],
+            [
+                CounterpartyType.UNKNOWN.value,
+                CounterpartyType.PAYMENT_PLATFORM.value,
+                CounterpartyType.BANK.value,
+                CounterpartyType.MERCHANT.value,
+            ],
+            default=CounterpartyType.PERSON.value,
+        )
+        return pd.Series(result, index=names.index, dtype=object)
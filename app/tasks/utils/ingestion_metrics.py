@@ -0,0 +1,63 @@
+# app/tasks/utils/ingestion_metrics.py
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+
+class IngestionMetrics:
+    """
+    记录一次文件入库过程中各阶段的耗时和行数，最终以 JSON 形式保存在 FileMetadata.metrics 中。
+
+    - stage_seconds：各阶段累计耗时（秒），分块处理时同一阶段的多次耗时会累加；
+    - counters：行数等计数；
+    - details：文件格式、表头签名、缓存命中情况等描述信息，便于按银行格式对比。
+    """
+
+    def __init__(self):
+        self.stage_seconds: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.details: dict[str, Any] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """计时一个阶段，可以包住 await 表达式"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_seconds(name, time.perf_counter() - started)
+
+    def add_seconds(self, name: str, seconds: float) -> None:
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def merge(self, other: "IngestionMetrics") -> None:
+        """合并在子进程中记录的指标"""
+        for name, seconds in other.stage_seconds.items():
+            self.add_seconds(name, seconds)
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> "IngestionMetrics":
+        """从 to_dict 的结果还原，用于合并各分片保存在数据库中的指标"""
+        metrics = cls()
+        data = dict(data or {})
+        for name, seconds in data.pop("stage_seconds", {}).items():
+            metrics.add_seconds(name, seconds)
+        for name, value in data.pop("counters", {}).items():
+            metrics.count(name, value)
+        metrics.details.update(data)
+        return metrics
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "stage_seconds": {
+                name: round(seconds, 3) for name, seconds in self.stage_seconds.items()
+            },
+            "counters": dict(self.counters),
+            **self.details,
+        }
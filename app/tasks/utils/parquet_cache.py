@@ -0,0 +1,165 @@
+# app/tasks/utils/parquet_cache.py
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from loguru import logger
+
+from app.core.config import settings
+
+# 清洗结果缓存保存的字段：入库需要的交易字段 + 解析对手方需要的两列
+CLEANED_SCHEMA = pa.schema(
+    [
+        ("transaction_date", pa.timestamp("ns", tz="UTC")),
+        ("amount", pa.float64()),
+        ("currency", pa.string()),
+        ("transaction_type", pa.string()),
+        ("balance_after_txn", pa.float64()),
+        ("description", pa.string()),
+        ("transaction_method", pa.string()),
+        ("bank_transaction_id", pa.string()),
+        ("is_cash", pa.bool_()),
+        ("location", pa.string()),
+        ("branch_name", pa.string()),
+        ("counterparty_name", pa.string()),
+        ("counterparty_account_number", pa.string()),
+    ]
+)
+
+
+class ParquetChunkWriter:
+    """
+    按数据块追加写入 Parquet，每个数据块为一个 row group。
+    先写入临时文件，只有在 with 块正常结束时才原子地重命名为正式文件，
+    中途失败或放弃时删除临时文件，因此缓存文件要么完整、要么不存在。
+    """
+
+    def __init__(self, path: Path, schema: pa.Schema):
+        self.path = path
+        self.schema = schema
+        self._part_path = path.with_name(f"{path.name}.part")
+        self._writer: pq.ParquetWriter | None = None
+        self.discarded = False
+
+    def __enter__(self) -> "ParquetChunkWriter":
+        self._writer = pq.ParquetWriter(self._part_path, self.schema)
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.discarded or self._writer is None:
+            return
+        table = pa.Table.from_pandas(
+            df[self.schema.names], schema=self.schema, preserve_index=False
+        )
+        # row group 不超过一个入库数据块，整表写入时同样可以按 row group 拆分处理
+        self._writer.write_table(table, row_group_size=settings.INGEST_CHUNK_SIZE)
+
+    def discard(self) -> None:
+        """放弃这份缓存，之后的写入都会被忽略"""
+        self.discarded = True
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if exc_type is None and not self.discarded:
+            os.replace(self._part_path, self.path)
+            logger.info(f"已写入 Parquet 缓存: {self.path}")
+        else:
+            self._part_path.unlink(missing_ok=True)
+
+
+class ParsedFileCache:
+    """
+    以 FileMetadata.file_hash 为键、保存在上传文件旁边的 Parquet 缓存。
+
+    - {hash}.raw.parquet：原始表格（全部为字符串列），重新处理时无需再解析 Excel/CSV；
+    - {hash}.clean.{fingerprint}.parquet：清洗结果，fingerprint 由解析器版本和解析计划决定，
+      解析逻辑或计划变化后旧的清洗结果自然失效，但原始缓存仍可复用。
+    """
+
+    def __init__(self, file_hash: str):
+        self.file_hash = file_hash
+        self.directory = Path(settings.LOCAL_STORAGE_PATH)
+
+    @property
+    def raw_path(self) -> Path:
+        return self.directory / f"{self.file_hash}.raw.parquet"
+
+    def clean_path(self, fingerprint: str) -> Path:
+        return self.directory / f"{self.file_hash}.clean.{fingerprint}.parquet"
+
+    def read_raw_header(self) -> list[str]:
+        return pq.read_schema(self.raw_path).names
+
+    def raw_writer(self, columns: list) -> ParquetChunkWriter:
+        # 原始表格按字符串读入，列名统一转为字符串以满足 Parquet 的要求
+        schema = pa.schema([(str(column), pa.string()) for column in columns])
+        return _RawChunkWriter(self.raw_path, schema)
+
+    def clean_writer(self, fingerprint: str) -> ParquetChunkWriter:
+        return ParquetChunkWriter(self.clean_path(fingerprint), CLEANED_SCHEMA)
+
+    def remove(self) -> None:
+        """删除这个文件的全部缓存（包括未完成的临时文件）"""
+        for path in self.directory.glob(f"{self.file_hash}.*.parquet*"):
+            path.unlink(missing_ok=True)
+            logger.info(f"已删除 Parquet 缓存: {path}")
+
+
+class _RawChunkWriter(ParquetChunkWriter):
+    """原始表格的列名可能不是字符串，按位置而不是按名称取列"""
+
+    def write(self, df: pd.DataFrame) -> None:
+        super().write(df.set_axis(self.schema.names, axis=1))
+
+
+def iter_parquet_chunks(
+    path: Path, chunk_size: int, columns: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    以内存映射方式打开 Parquet 文件，按固定行数逐块读出为 DataFrame。
+    传入 columns 时只读取这些列。
+    """
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def split_row_groups(path: Path, part_rows: int) -> list[list[int]]:
+    """
+    将 Parquet 文件的 row group 按顺序分成若干份，每份约 part_rows 行，
+    返回每份包含的 row group 序号。缓存按数据块写入，每个 row group 即一个数据块。
+    """
+    metadata = pq.read_metadata(path)
+    parts: list[list[int]] = []
+    current: list[int] = []
+    current_rows = 0
+    for index in range(metadata.num_row_groups):
+        current.append(index)
+        current_rows += metadata.row_group(index).num_rows
+        if current_rows >= part_rows:
+            parts.append(current)
+            current, current_rows = [], 0
+    if current:
+        parts.append(current)
+    return parts
+
+
+def iter_parquet_row_groups(
+    path: Path, row_groups: list[int]
+) -> Iterator[pd.DataFrame]:
+    """按 row group 逐个读出指定的部分"""
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for index in row_groups:
+        yield parquet_file.read_row_group(index).to_pandas()
+
+
+def column_range(path: Path, column: str) -> tuple:
+    """读取 Parquet 文件中一列的最小值和最大值，文件为空时均为 None"""
+    values = pq.read_table(path, columns=[column], memory_map=True).column(column)
+    result = pc.min_max(values)
+    return result["min"].as_py(), result["max"].as_py()
@@ -0,0 +1,95 @@
+# app/tasks/utils/parser_plan.py
+import hashlib
+import json
+from collections.abc import Iterable
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.schemas.parser_plan import ParserPlan
+
+
+def compute_header_signature(columns: Iterable) -> str:
+    """
+    根据表头（列名及其顺序）计算签名，同一家银行的同一种导出格式签名相同。
+    """
+    header = json.dumps([str(column) for column in columns], ensure_ascii=False)
+    return hashlib.sha256(header.encode("utf-8")).hexdigest()[:16]
+
+
+class ParserPlanRegistry:
+    """
+    解析计划的两级缓存：进程内字典 + Redis。
+
+    - 自动生成的计划写入 Redis 时带过期时间，Redis 不可用时退化为只用进程内缓存；
+    - 通过API设置的覆盖计划永久保存在 Redis 中，优先级高于自动生成的计划。
+    """
+
+    PLAN_KEY = "mirror:parser_plan:auto:{signature}"
+    OVERRIDE_KEY = "mirror:parser_plan:override:{signature}"
+
+    def __init__(self):
+        self._local: dict[str, ParserPlan] = {}
+        self._redis: Redis | None = None
+
+    @property
+    def redis(self) -> Redis:
+        # 延迟创建客户端，让连接绑定到实际使用它的事件循环
+        if self._redis is None:
+            self._redis = Redis.from_url(
+                f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
+                encoding="utf-8",
+                decode_responses=True,
+            )
+        return self._redis
+
+    async def get(self, signature: str) -> ParserPlan | None:
+        """获取生效的计划：覆盖计划 > Redis 中的自动计划 > 进程内缓存。"""
+        try:
+            override_json, plan_json = await self.redis.mget(
+                self.OVERRIDE_KEY.format(signature=signature),
+                self.PLAN_KEY.format(signature=signature),
+            )
+        except RedisError as e:
+            logger.warning(f"读取 Redis 中的解析计划失败，仅使用进程内缓存: {e}")
+            return self._local.get(signature)
+
+        if override_json is not None:
+            return ParserPlan.model_validate_json(override_json)
+        if plan_json is not None:
+            plan = ParserPlan.model_validate_json(plan_json)
+            self._local[signature] = plan
+            return plan
+        return self._local.get(signature)
+
+    async def save(self, plan: ParserPlan) -> None:
+        """缓存一个自动生成的计划。"""
+        self._local[plan.signature] = plan
+        try:
+            await self.redis.set(
+                self.PLAN_KEY.format(signature=plan.signature),
+                plan.model_dump_json(),
+                ex=settings.PARSER_PLAN_CACHE_TTL,
+            )
+        except RedisError as e:
+            logger.warning(f"解析计划写入 Redis 失败，仅保留在进程内: {e}")
+
+    async def set_override(self, plan: ParserPlan) -> None:
+        """保存一个强制使用的计划，不设置过期时间。"""
+        await self.redis.set(
+            self.OVERRIDE_KEY.format(signature=plan.signature), plan.model_dump_json()
+        )
+
+    async def delete_override(self, signature: str) -> bool:
+        deleted = await self.redis.delete(self.OVERRIDE_KEY.format(signature=signature))
+        return deleted > 0
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+parser_plan_registry = ParserPlanRegistry()
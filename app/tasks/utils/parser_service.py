@@ -1,4 +1,11 @@
 # app/tasks/utils/parser_service.py
+import asyncio
+import datetime
+import hashlib
+import importlib.util
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor
+from contextlib import ExitStack, aclosing, closing
 from pathlib import Path
 
 import pandas as pd
@@ -6,9 +13,50 @@ import numpy as np
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.database import get_session_local
 from app.models.enums import CounterpartyType
 from app.repository.counterparty import counterparty_repository
 from app.repository.transaction import transaction_repository
+from app.schemas.parser_plan import ParserPlan
+from app.tasks.utils.counterparty_classifier import CounterpartyClassifier
+from app.tasks.utils.ingestion_metrics import IngestionMetrics
+from app.tasks.utils.parquet_cache import (
+    ParsedFileCache,
+    column_range,
+    iter_parquet_chunks,
+    iter_parquet_row_groups,
+    split_row_groups,
+)
+from app.tasks.utils.parser_plan import compute_header_signature, parser_plan_registry
+
+
+# 写入 transaction 表时需要的字段
+TRANSACTION_COLUMNS = [
+    "transaction_date",
+    "amount",
+    "currency",
+    "transaction_type",
+    "balance_after_txn",
+    "description",
+    "transaction_method",
+    "bank_transaction_id",
+    "is_cash",
+    "location",
+    "branch_name",
+    "category",
+    "account_id",
+    "counterparty_id",
+]
+
+# 清洗逻辑发生变化时递增，使旧的清洗结果缓存失效
+PARSER_VERSION = 1
+
+# 可用于判断现金交易的标准字段，按检查顺序排列
+CASH_RULE_COLUMNS = ["is_cash_flag", "description", "transaction_method"]
+
+# 基于 Rust 的 calamine 读取器为可选依赖 (uv sync --extra fast-excel)
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
 
 
 class ParserService:
@@ -46,34 +94,25 @@ class ParserService:
             "branch_name": ["交易网点名称", "交易机构"],
         }
 
-        # 对手类型关键词
-        self.MERCHANT_KEYWORDS = [
-            "公司",
-            "机构",
-            "科技",
-            "网络",
-            "支付",
-            "技术",
-            "银行",
-            "物业",
-            "管理",
-            "财付通",
-            "支付宝",
-            "银联",
-            "唯品会",
-            "钱袋宝",
-            "微众",
-            "抖音",
-            "电商",
-            "商户",
-            "平台",
-            "快递",
-            "服饰",
-            "股份",
-            "商业",
-            "便购",
-            "餐饮",
-        ]
+        # 对手方分类器：关键词列表来自配置，预编译为一个多模式匹配自动机
+        self.counterparty_classifier = CounterpartyClassifier(
+            settings.COUNTERPARTY_MERCHANT_KEYWORDS,
+            settings.COUNTERPARTY_PAYMENT_KEYWORDS,
+            settings.COUNTERPARTY_BANK_KEYWORDS,
+        )
+
+    def _select_excel_engine(self, suffix: str) -> str:
+        """
+        选择 Excel 读取引擎。
+        自动模式下优先使用 calamine（同时支持 .xlsx 和 .xls，速度最快）；
+        未安装时 .xls 使用 xlrd，.xlsx 使用 openpyxl（pandas 以只读流式模式打开）。
+        """
+        engine = settings.EXCEL_ENGINE
+        if engine != "auto":
+            return engine
+        if CALAMINE_AVAILABLE:
+            return "calamine"
+        return "xlrd" if suffix == ".xls" else "openpyxl"
 
     def _read_file_to_dataframe(self, file_path: str) -> pd.DataFrame:
         """
@@ -82,12 +121,47 @@ class ParserService:
         path = Path(file_path)
         logger.info(f"开始读取文件: {path}")
         if path.suffix in [".xlsx", ".xls"]:
-            return pd.read_excel(path, header=0, dtype=str)
+            engine = self._select_excel_engine(path.suffix)
+            logger.info(f"Excel 读取引擎: {engine}")
+            return pd.read_excel(path, header=0, dtype=str, engine=engine)
         elif path.suffix == ".csv":
             return pd.read_csv(path, header=0, dtype=str)
         else:
             raise ValueError(f"不支持的文件类型: {path.suffix}")
 
+    def _read_header(self, file_path: str) -> list[str]:
+        """
+        只读取文件的表头，用于在解析前计算表头签名。
+        .xlsx 固定使用 openpyxl 的只读模式，它只需解析第一行，比整表加载快得多。
+        """
+        path = Path(file_path)
+        if path.suffix == ".csv":
+            df = pd.read_csv(path, header=0, dtype=str, nrows=0)
+        else:
+            engine = "xlrd" if path.suffix == ".xls" else "openpyxl"
+            df = pd.read_excel(path, header=0, dtype=str, nrows=0, engine=engine)
+        return list(df.columns)
+
+    def _iter_dataframe_chunks(
+        self, file_path: str, chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        """
+        按固定行数分块读取文件。
+        CSV 通过 read_csv 的 chunksize 真正流式读取；Excel 无法按行流式解析，
+        整表读入后再按块切分，保证后续清洗和入库阶段的内存占用同样有界。
+        """
+        path = Path(file_path)
+        if path.suffix == ".csv":
+            logger.info(f"开始流式读取文件: {path} (每块 {chunk_size} 行)")
+            with pd.read_csv(
+                path, header=0, dtype=str, chunksize=chunk_size
+            ) as reader:
+                yield from reader
+        else:
+            df = self._read_file_to_dataframe(file_path)
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start : start + chunk_size]
+
     def _normalize_counterparty_name(self, name: str | None) -> str:
         """
         标准化交易对手方的名称 (当前为直通模式，保留原始名称以便测试)
@@ -99,108 +173,141 @@ class ParserService:
         # 2. 暂时不进行任何替换或标准化操作，直接返回原始名称
         return name
 
+    def _normalize_account_number(self, account_number: str | None) -> str | None:
+        """
+        标准化对手方账号：空值或纯空格视为没有账号。
+        """
+        if not isinstance(account_number, str) or not account_number.strip():
+            return None
+        return account_number
+
     def _classify_counterparty(self, name: str) -> CounterpartyType:
         """根据名称中的关键词，使用启发式规则对对手方进行分类 (草鸡版)"""
-        # 将名称转为小写并去除空格，以提高匹配成功率
-        normalized_name = name.lower().strip()
+        return self.counterparty_classifier.classify(name)
 
-        if not normalized_name or normalized_name == "未知对手":
-            return CounterpartyType.UNKNOWN
+    def _determine_is_cash(
+        self, df: pd.DataFrame, rules: list[str] | None = None
+    ) -> pd.Series:
+        """
+        向量化地判断每笔交易是否为现金交易。
+        它会检查多个列来寻找线索，缺失值一律视为“不是现金”。
+
+        参数:
+            rules: 需要检查的标准字段，默认全部检查。解析计划只保留文件中存在的列。
+        """
+        if rules is None:
+            rules = CASH_RULE_COLUMNS
+        is_cash = pd.Series(False, index=df.index)
+
+        # 规则1：检查“现金标志”列
+        if "is_cash_flag" in rules:
+            by_flag = df["is_cash_flag"].str.strip().eq("现金交易")
+            is_cash |= by_flag.fillna(False).astype(bool)
 
-        # 1. 优先根据关键词判断
-        for keyword in self.MERCHANT_KEYWORDS:
-            if keyword.lower() in normalized_name:
-                if any(p in normalized_name for p in ["支付", "财付通", "支付宝"]):
-                    return CounterpartyType.PAYMENT_PLATFORM
-                if "银行" in normalized_name or "银联" in normalized_name:
-                    return CounterpartyType.BANK
-                return CounterpartyType.MERCHANT
+        # 规则2：检查“交易摘要”列
+        if "description" in rules:
+            description = df["description"]
+            is_cash |= description.str.contains(
+                "现金存入", regex=False, na=False
+            ) | description.str.contains("现金支取", regex=False, na=False)
 
-        # 2. 长度启发式规则
-        if len(normalized_name) > 7:
-            return CounterpartyType.MERCHANT
+        # 规则3：检查“交易类型/渠道”列
+        if "transaction_method" in rules:
+            method = df["transaction_method"]
+            is_cash |= method.str.contains(
+                "现金存款", regex=False, na=False
+            ) | method.str.contains("现金取款", regex=False, na=False)
 
-        # 3. 默认是个人
-        return CounterpartyType.PERSON
+        # 任意一条规则满足即为现金交易
+        return is_cash.astype(bool)
 
-    def _determine_is_cash(self, row: pd.Series) -> bool:
-        """
-        用于判断单笔交易是否为现金交易。
-        它会检查多个列来寻找线索，并能正确处理None值。
+    def _build_plan(self, df: pd.DataFrame) -> tuple[ParserPlan, bool]:
         """
+        根据表头和数据检测文件格式，生成解析计划。
 
-        # 规则1：检查“现金标志”列
-        cash_flag = row.get("is_cash_flag")  # 直接获取值，可能是字符串或None
-        if isinstance(cash_flag, str) and cash_flag.strip() == "现金交易":
-            logger.trace(
-                f"Row {row.name}: 通过'现金标志'列找到现金交易 ('{cash_flag}')"
+        返回:
+            (计划, 是否可缓存)。当判断依赖的数据在这一块中全部为空时，
+            检测结果只对当前数据块有效，不应缓存，下一块会重新检测。
+        """
+        columns = list(df.columns)
+        column_picks = {
+            std_name: next(
+                (raw_name for raw_name in raw_names_list if raw_name in columns),
+                None,
             )
-            return True
-
-        # 规则2：检查“交易摘要”列
-        description = row.get("description")
-        if isinstance(description, str) and (
-            "现金存入" in description or "现金支取" in description
+            for std_name, raw_names_list in self.COLUMN_MAPPING.items()
+        }
+        conclusive = True
+
+        # 日期：同时存在“交易日期”和“交易时间”时为分离模式 (例如 中行)，
+        # 否则“交易时间”或“交易日期”本身就是完整的日期时间 (例如 工行)
+        if "交易日期" in columns and "交易时间" in columns:
+            column_picks["transaction_date_str"] = "交易日期"
+            column_picks["transaction_time_str"] = "交易时间"
+            if df["交易时间"].notna().any():
+                date_mode = "separate"
+            else:
+                date_mode = "combined"
+                conclusive = False
+        else:
+            column_picks["transaction_time_str"] = None
+            date_mode = "combined" if column_picks["transaction_date_str"] else "none"
+
+        # 金额：以有效数据判断是“收支分离列”还是“单金额列 + 借贷标志”
+        def has_amount(std_name: str) -> bool:
+            source = column_picks[std_name]
+            if source is None:
+                return False
+            return (pd.to_numeric(df[source], errors="coerce").fillna(0) != 0).any()
+
+        flag_source = column_picks["transaction_type_flag"]
+        if has_amount("amount_in") or has_amount("amount_out"):
+            amount_mode = "separate"
+        elif (
+            has_amount("amount_single")
+            and flag_source is not None
+            and df[flag_source].notna().any()
         ):
-            logger.trace(
-                f"Row {row.name}: 通过'交易摘要'列找到现金交易 ('{description}')"
+            amount_mode = "single"
+        else:
+            amount_mode = "none"
+            conclusive = not any(
+                column_picks[std_name]
+                for std_name in ["amount_in", "amount_out", "amount_single"]
             )
-            return True
-
-        # 规则3：检查“交易类型/渠道”列
-        method = row.get("transaction_method")
-        if isinstance(method, str) and ("现金存款" in method or "现金取款" in method):
-            logger.trace(f"Row {row.name}: 通过'交易方式'列找到现金交易 ('{method}')")
-            return True
 
-        # 如果以上所有规则都不满足，则默认为非现金交易
-        return False
+        plan = ParserPlan(
+            signature=compute_header_signature(columns),
+            columns=[str(column) for column in columns],
+            column_picks=column_picks,
+            date_mode=date_mode,
+            amount_mode=amount_mode,
+            cash_rules=[rule for rule in CASH_RULE_COLUMNS if column_picks[rule]],
+        )
+        return plan, conclusive
 
-    def _clean_and_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _clean_and_transform(
+        self, df: pd.DataFrame, plan: ParserPlan | None = None
+    ) -> pd.DataFrame:
         """
         清洗和转换从 Excel/CSV 文件中解析得到的数据，以便后续入库。
         【V3版核心重构】
+
+        参数:
+            plan: 该文件格式的解析计划。未提供时根据当前数据块现场检测。
         """
         logger.info("开始清洗和转换数据...")
+        if plan is None:
+            plan, _ = self._build_plan(df)
 
         # 创建一个新的干净的DataFrame，用于存放标准化后的数据
         cleaned_df = pd.DataFrame(index=df.index)
 
-        # 步骤 1: 智能处理日期和时间列的歧义
-        if "交易日期" in df.columns and "交易时间" in df.columns:
-            logger.info("检测到'交易日期'和'交易时间'分离模式 (例如 中行)。")
-            cleaned_df["transaction_date_str"] = df["交易日期"]
-            cleaned_df["transaction_time_str"] = df["交易时间"]
-        else:
-            logger.info(
-                "未检测到日期、时间分离列，将尝试寻找单个日期时间列 (例如 工行)。"
-            )
-            # 在工行模式下，“交易时间”就是我们需要的完整日期时间字符串
-            date_col_source = next(
-                (
-                    col
-                    for col in self.COLUMN_MAPPING["transaction_date_str"]
-                    if col in df.columns
-                ),
-                None,
-            )
-            if date_col_source:
-                cleaned_df["transaction_date_str"] = df[date_col_source]
-            else:
-                cleaned_df["transaction_date_str"] = None
-            cleaned_df["transaction_time_str"] = None  # 确保此模式下时间列为空
-
-        # 步骤 2: 复制其余明确的列
-        for std_name, raw_names_list in self.COLUMN_MAPPING.items():
-            # 跳过已特殊处理的日期/时间列
-            if std_name in ["transaction_date_str", "transaction_time_str"]:
-                continue
-
-            source_col_name = next(
-                (raw_name for raw_name in raw_names_list if raw_name in df.columns),
-                None,
-            )
-            if source_col_name:
+        # 步骤 1 & 2: 按计划挑选原始列并复制到标准字段
+        # 覆盖计划中可能引用了文件中不存在的列，这些字段按缺失处理
+        for std_name in self.COLUMN_MAPPING:
+            source_col_name = plan.column_picks.get(std_name)
+            if source_col_name is not None and source_col_name in df.columns:
                 cleaned_df[std_name] = df[source_col_name]
             else:
                 cleaned_df[std_name] = None
@@ -208,36 +315,35 @@ class ParserService:
         logger.info("列名标准化和数据复制完成。")
 
         # 步骤 3: 解析日期时间
-        if pd.notna(cleaned_df["transaction_date_str"]).any():
+        if plan.date_mode == "separate":
             # 模式一：日期+时间分离 (中行)
-            if pd.notna(cleaned_df["transaction_time_str"]).any():
-                logger.info("正在使用“日期+时间分离”模式解析时间...")
-                time_str = pd.to_datetime(
-                    cleaned_df["transaction_time_str"], errors="coerce"
-                ).dt.strftime("%H:%M:%S")
-                full_datetime_str = cleaned_df["transaction_date_str"] + " " + time_str
-                cleaned_df["transaction_date"] = pd.to_datetime(
-                    full_datetime_str, errors="coerce"
-                )
+            logger.info("正在使用“日期+时间分离”模式解析时间...")
+            time_str = pd.to_datetime(
+                cleaned_df["transaction_time_str"], errors="coerce"
+            ).dt.strftime("%H:%M:%S")
+            full_datetime_str = cleaned_df["transaction_date_str"] + " " + time_str
+            cleaned_df["transaction_date"] = pd.to_datetime(
+                full_datetime_str, errors="coerce"
+            )
+        elif plan.date_mode == "combined":
             # 模式二：日期时间合一 (工行、交行等)
-            else:
-                logger.info("正在使用“日期时间合一”模式解析时间（兼容多种格式）...")
-                # --- 对日期字符串进行预处理 ---
-                # 1. 移除所有可能的冒号、空格，并去除首尾空白
-                date_series = (
-                    cleaned_df["transaction_date_str"]
-                    .str.replace(":", "", regex=False)
-                    .str.replace(" ", "", regex=False)
-                    .str.strip()
-                )
-                # 2. 对齐长度：对于缺少秒的格式 (如 YYYYMMDDHHMM)，在末尾补 '00'，使其统一为14位
-                date_series_padded = date_series.str.ljust(14, "0")
-                # 3. 现在所有格式都统一了，再使用严格格式进行解析
-                cleaned_df["transaction_date"] = pd.to_datetime(
-                    date_series_padded,
-                    format="%Y%m%d%H%M%S",
-                    errors="coerce",
-                )
+            logger.info("正在使用“日期时间合一”模式解析时间（兼容多种格式）...")
+            # --- 对日期字符串进行预处理 ---
+            # 1. 移除所有可能的冒号、空格，并去除首尾空白
+            date_series = (
+                cleaned_df["transaction_date_str"]
+                .str.replace(":", "", regex=False)
+                .str.replace(" ", "", regex=False)
+                .str.strip()
+            )
+            # 2. 对齐长度：对于缺少秒的格式 (如 YYYYMMDDHHMM)，在末尾补 '00'，使其统一为14位
+            date_series_padded = date_series.str.ljust(14, "0")
+            # 3. 现在所有格式都统一了，再使用严格格式进行解析
+            cleaned_df["transaction_date"] = pd.to_datetime(
+                date_series_padded,
+                format="%Y%m%d%H%M%S",
+                errors="coerce",
+            )
         else:
             logger.warning(
                 "在文件中未找到可识别的交易日期列，'transaction_date' 将为空。"
@@ -250,36 +356,28 @@ class ParserService:
             .dt.tz_convert("UTC")
         )
 
-        # 步骤 4: 健壮的金额模式检测
-        temp_in = pd.to_numeric(cleaned_df["amount_in"], errors="coerce").fillna(0)
-        temp_out = pd.to_numeric(cleaned_df["amount_out"], errors="coerce").fillna(0)
-        temp_single = pd.to_numeric(
-            cleaned_df["amount_single"], errors="coerce"
-        ).fillna(0)
-
-        is_separate_mode = (temp_in != 0).any() or (temp_out != 0).any()
-        is_single_mode = (temp_single != 0).any() and pd.notna(
-            cleaned_df["transaction_type_flag"]
-        ).any()
-
-        if is_separate_mode:
-            logger.info("检测到“收支分离列”模式 (基于有效数据)。")
-            cleaned_df["amount"] = temp_in - temp_out
-            cleaned_df["transaction_type"] = cleaned_df["amount"].apply(
-                lambda x: "CREDIT" if x >= 0 else "DEBIT"
+        # 步骤 4: 按计划中的金额模式计算金额，只转换该模式用到的列
+        if plan.amount_mode == "separate":
+            logger.info("使用“收支分离列”模式计算金额。")
+            temp_in = pd.to_numeric(cleaned_df["amount_in"], errors="coerce").fillna(0)
+            temp_out = pd.to_numeric(cleaned_df["amount_out"], errors="coerce").fillna(
+                0
             )
-        elif is_single_mode:
-            logger.info("检测到“单金额列 + 借贷标志”模式 (基于有效数据)。")
-            cleaned_df["amount"] = temp_single
-            cleaned_df["transaction_type"] = cleaned_df["transaction_type_flag"].apply(
-                lambda x: "CREDIT" if str(x) in ["进", "贷", "Credit"] else "DEBIT"
+            cleaned_df["amount"] = temp_in - temp_out
+            cleaned_df["transaction_type"] = np.where(
+                cleaned_df["amount"] >= 0, "CREDIT", "DEBIT"
             )
-            cleaned_df["amount"] = cleaned_df.apply(
-                lambda row: abs(row["amount"])
-                if row["transaction_type"] == "CREDIT"
-                else -abs(row["amount"]),
-                axis=1,
+        elif plan.amount_mode == "single":
+            logger.info("使用“单金额列 + 借贷标志”模式计算金额。")
+            temp_single = pd.to_numeric(
+                cleaned_df["amount_single"], errors="coerce"
+            ).fillna(0)
+            is_credit = cleaned_df["transaction_type_flag"].isin(["进", "贷", "Credit"])
+            # 贷方记为正数，借方记为负数
+            cleaned_df["amount"] = temp_single.abs().where(
+                is_credit, -temp_single.abs()
             )
+            cleaned_df["transaction_type"] = np.where(is_credit, "CREDIT", "DEBIT")
         else:
             logger.warning("无法识别有效的金额记录模式！将创建空金额列。")
             cleaned_df["amount"] = 0.0
@@ -291,7 +389,7 @@ class ParserService:
             cleaned_df["balance_after_txn"], errors="coerce"
         )
         logger.info("正在通过多列分析来判断现金交易...")
-        cleaned_df["is_cash"] = cleaned_df.apply(self._determine_is_cash, axis=1)
+        cleaned_df["is_cash"] = self._determine_is_cash(cleaned_df, plan.cash_rules)
         cleaned_df["counterparty_name"] = cleaned_df["counterparty_name"].fillna(
             cleaned_df.get("merchant_name")
         )
@@ -305,71 +403,579 @@ class ParserService:
                 f"过滤掉了 {original_rows - len(cleaned_df)} 行无效数据（缺少有效交易日期）。"
             )
 
-        # 将Pandas的空值统一替换为Python的None
-        cleaned_df = cleaned_df.replace(
-            {np.nan: None, pd.NaT: None, "nan": None, "": None}
-        )
+        self._replace_missing_with_none(cleaned_df)
 
         logger.success("数据清洗和转换完成。")
         return cleaned_df
 
+    def _replace_missing_with_none(self, cleaned_df: pd.DataFrame) -> None:
+        """将Pandas的空值统一替换为Python的None（逐列处理，避免整表 replace）"""
+        for column in cleaned_df.columns:
+            series = cleaned_df[column]
+            if series.dtype == object:
+                missing = series.isna() | series.isin(["nan", ""])
+            elif pd.api.types.is_float_dtype(series.dtype):
+                missing = series.isna()
+            else:
+                # 日期、布尔等列在过滤后不存在空值，保持原始类型
+                continue
+            if missing.any():
+                cleaned_df[column] = series.astype(object).where(~missing, None)
+
+    async def _resolve_counterparty_ids(
+        self,
+        session: AsyncSession,
+        cleaned_df: pd.DataFrame,
+        create: bool = True,
+    ) -> pd.Series:
+        """
+        为清洗后的每一行解析对手方ID。
+        先收集去重后的 (名称, 账号) 组合，只对唯一名称做分类，
+        再通过仓库层一次性批量获取或创建，最后映射回每一行。
+
+        参数:
+            create: 为 False 时先只读地查找已存在的对手方，只为缺失的对手方执行 upsert。
+                分片并行入库时对手方已预先创建，这样各分片的事务不会互相锁住对手方记录。
+        """
+        keys = pd.Series(
+            list(
+                zip(
+                    cleaned_df["counterparty_name"].map(
+                        self._normalize_counterparty_name
+                    ),
+                    cleaned_df["counterparty_account_number"].map(
+                        self._normalize_account_number
+                    ),
+                )
+            ),
+            index=cleaned_df.index,
+        )
+        unique_keys = keys.unique()
+
+        # 唯一名称一次性批量分类
+        unique_names = pd.Series(list({name for name, _ in unique_keys}), dtype=object)
+        type_by_name = dict(
+            zip(
+                unique_names,
+                self.counterparty_classifier.classify_many(unique_names),
+            )
+        )
+        logger.info(f"共 {len(unique_keys)} 个不同的对手方待解析。")
+
+        id_by_key: dict[tuple[str, str | None], int] = {}
+        if not create:
+            id_by_key = await counterparty_repository.bulk_get_ids(
+                session, keys=list(unique_keys)
+            )
+        missing_keys = [key for key in unique_keys if key not in id_by_key]
+        if missing_keys:
+            if not create:
+                logger.warning(f"{len(missing_keys)} 个对手方未预先创建，将补充创建。")
+            id_by_key.update(
+                await counterparty_repository.bulk_get_or_create(
+                    session,
+                    counterparties=[
+                        {
+                            "name": name,
+                            "account_number": account_number,
+                            "counterparty_type": type_by_name[name],
+                        }
+                        for name, account_number in missing_keys
+                    ],
+                )
+            )
+        return keys.map(id_by_key.__getitem__)
+
+    async def _get_cached_plan(self, columns: list) -> ParserPlan | None:
+        """按表头签名查找已缓存（或被强制指定）的解析计划。"""
+        signature = compute_header_signature(columns)
+        plan = await parser_plan_registry.get(signature)
+        if plan is None:
+            logger.info(f"表头签名 {signature} 没有缓存的解析计划，将根据数据检测格式。")
+        else:
+            logger.info(f"表头签名 {signature} 命中解析计划 ({plan.source})，跳过格式检测。")
+        return plan
+
+    async def _plan_for_chunk(
+        self, plan: ParserPlan | None, raw_chunk: pd.DataFrame
+    ) -> tuple[ParserPlan, bool]:
+        """
+        返回处理当前数据块使用的计划，以及它是否可以沿用到后续数据块。
+        首次检测出的可靠计划会写入缓存，供之后同格式的文件直接使用。
+        """
+        if plan is not None:
+            return plan, True
+        plan, conclusive = self._build_plan(raw_chunk)
+        if conclusive:
+            await parser_plan_registry.save(plan)
+        return plan, conclusive
+
+    def _clean_cache_fingerprint(self, plan: ParserPlan) -> str:
+        """清洗结果缓存的指纹：解析器版本或解析计划任一变化都会得到新的指纹"""
+        content = f"{PARSER_VERSION}:{plan.model_dump_json()}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+
+    async def _aiter_cleaned_chunks(
+        self,
+        file_path: str,
+        chunk_size: int,
+        executor: Executor | None = None,
+        file_hash: str | None = None,
+        metrics: IngestionMetrics | None = None,
+    ) -> AsyncIterator[pd.DataFrame]:
+        """
+        流式管道的前半段：逐块读取并清洗，每次只在内存中保留一个数据块。
+        文件格式只在第一块时确定一次（或直接使用缓存的解析计划），之后的数据块沿用同一计划。
+
+        传入进程池时，解析和清洗都在子进程中完成，事件循环只负责等待结果，
+        同一个 worker 上的其他任务（例如数据库写入）因此不会被阻塞。
+
+        传入 file_hash 时启用 Parquet 缓存：
+        1. 已有同一解析器版本和计划下的清洗结果时，直接读出，跳过读取和清洗；
+        2. 已有原始表格缓存时，从中读取，跳过 Excel/CSV 解析；
+        3. 否则边处理边写入两份缓存，供之后重新处理时使用。
+
+        传入 metrics 时记录读取、清洗等阶段的耗时和行数。
+        """
+        loop = asyncio.get_running_loop()
+        if metrics is None:
+            metrics = IngestionMetrics()
+        metrics.details["file_type"] = Path(file_path).suffix
+
+        async def run_io(func, *args):
+            # 使用进程池时，文件读写放到线程中执行，避免阻塞事件循环
+            if executor is None:
+                return func(*args)
+            return await loop.run_in_executor(None, func, *args)
+
+        cache = (
+            ParsedFileCache(file_hash)
+            if file_hash and settings.PARQUET_CACHE_ENABLED
+            else None
+        )
+        use_raw_cache = cache is not None and cache.raw_path.exists()
+
+        with metrics.stage("plan"):
+            if use_raw_cache:
+                columns = await run_io(cache.read_raw_header)
+            else:
+                columns = await run_io(self._read_header, file_path)
+            plan = await self._get_cached_plan(columns)
+        metrics.details["header_signature"] = compute_header_signature(columns)
+        metrics.details["plan_source"] = plan.source if plan else "detected"
+        metrics.details["cache"] = None
+
+        # 1. 清洗结果缓存命中：直接按块读出，跳过读取和清洗
+        if cache is not None and plan is not None:
+            clean_path = cache.clean_path(self._clean_cache_fingerprint(plan))
+            if clean_path.exists():
+                logger.info(f"命中清洗结果缓存，跳过读取和清洗: {clean_path}")
+                metrics.details["cache"] = "clean"
+                with closing(iter_parquet_chunks(clean_path, chunk_size)) as chunks:
+                    while True:
+                        with metrics.stage("read"):
+                            cleaned_chunk = await run_io(next, chunks, None)
+                        if cleaned_chunk is None:
+                            break
+                        self._replace_missing_with_none(cleaned_chunk)
+                        metrics.count("chunks")
+                        yield cleaned_chunk
+                return
+
+        with ExitStack() as stack:
+            if use_raw_cache:
+                # 2. 原始表格缓存命中：从 Parquet 读取，之后与 CSV 一样逐块清洗
+                logger.info(f"命中原始表格缓存，跳过文件解析: {cache.raw_path}")
+                metrics.details["cache"] = "raw"
+                raw_chunks = iter_parquet_chunks(cache.raw_path, chunk_size)
+            elif executor is not None and Path(file_path).suffix != ".csv":
+                # 3. Excel：整表的读取、原始缓存写入和清洗都交给进程池，回到主进程后再按块入库
+                cached_plan = plan
+                (
+                    plan,
+                    conclusive,
+                    cleaned_df,
+                    worker_metrics,
+                ) = await loop.run_in_executor(
+                    executor,
+                    _read_and_clean_in_worker,
+                    file_path,
+                    cached_plan,
+                    file_hash if cache is not None else None,
+                )
+                metrics.merge(worker_metrics)
+                if cached_plan is None and conclusive:
+                    await parser_plan_registry.save(plan)
+                if cache is not None and conclusive:
+                    clean_writer = stack.enter_context(
+                        cache.clean_writer(self._clean_cache_fingerprint(plan))
+                    )
+                    with metrics.stage("cache_write"):
+                        await run_io(clean_writer.write, cleaned_df)
+                for start in range(0, len(cleaned_df), chunk_size):
+                    metrics.count("chunks")
+                    yield cleaned_df.iloc[start : start + chunk_size]
+                return
+            else:
+                # 4. 逐块读取原始文件，启用缓存时同时写出原始表格
+                raw_chunks = self._iter_dataframe_chunks(file_path, chunk_size)
+            chunks = stack.enter_context(closing(raw_chunks))
+
+            raw_writer = clean_writer = None
+            if cache is not None and not use_raw_cache:
+                raw_writer = stack.enter_context(cache.raw_writer(columns))
+
+            first_chunk = True
+            while True:
+                with metrics.stage("read"):
+                    raw_chunk = await run_io(next, chunks, None)
+                if raw_chunk is None:
+                    break
+                metrics.count("raw_rows", len(raw_chunk))
+                if raw_writer is not None:
+                    with metrics.stage("cache_write"):
+                        await run_io(raw_writer.write, raw_chunk)
+
+                with metrics.stage("plan"):
+                    chunk_plan, conclusive = await self._plan_for_chunk(
+                        plan, raw_chunk
+                    )
+                if conclusive:
+                    plan = chunk_plan
+                # 只有从第一块起就使用同一个可靠的计划，清洗结果才能作为整体缓存
+                if cache is not None and first_chunk and conclusive:
+                    clean_writer = stack.enter_context(
+                        cache.clean_writer(self._clean_cache_fingerprint(chunk_plan))
+                    )
+                first_chunk = False
+
+                with metrics.stage("clean"):
+                    if executor is None:
+                        cleaned_chunk = self._clean_and_transform(raw_chunk, chunk_plan)
+                    else:
+                        cleaned_chunk = await loop.run_in_executor(
+                            executor, _clean_in_worker, raw_chunk, chunk_plan
+                        )
+                # 清洗阶段只会丢弃缺少有效交易日期的行
+                metrics.count(
+                    "dropped_missing_date", len(raw_chunk) - len(cleaned_chunk)
+                )
+                if not cleaned_chunk.empty:
+                    if clean_writer is not None:
+                        with metrics.stage("cache_write"):
+                            await run_io(clean_writer.write, cleaned_chunk)
+                    metrics.count("chunks")
+                    yield cleaned_chunk
+
+    async def _save_chunk(
+        self,
+        session: AsyncSession,
+        cleaned_df: pd.DataFrame,
+        account_id: int,
+        metrics: IngestionMetrics,
+        create_counterparties: bool = True,
+    ) -> dict[str, int]:
+        """
+        流式管道的后半段：解析对手方并写入一个数据块，不提交事务。
+        """
+        # 集合式解析对手方：一次批量 upsert 代替逐行的 get_or_create
+        with metrics.stage("resolve_counterparties"):
+            counterparty_ids = await self._resolve_counterparty_ids(
+                session, cleaned_df, create=create_counterparties
+            )
+        with metrics.stage("insert"):
+            transactions_to_create = cleaned_df.assign(
+                counterparty_id=counterparty_ids, account_id=account_id, category=None
+            )[TRANSACTION_COLUMNS].to_dict("records")
+            logger.info(f"准备批量插入 {len(transactions_to_create)} 条交易数据...")
+            if settings.TRANSACTION_LOADER == "copy":
+                counts = await transaction_repository.bulk_copy(
+                    session, transactions_data=transactions_to_create, commit=False
+                )
+            else:
+                counts = await transaction_repository.bulk_create(
+                    session, transactions_data=transactions_to_create, commit=False
+                )
+        if counts["skipped"]:
+            logger.warning(f"跳过了 {counts['skipped']} 条流水号重复的交易。")
+        return counts
+
     async def process_and_save_transactions(
-        self, session: AsyncSession, file_path: str, account_id: int
+        self,
+        session: AsyncSession,
+        file_path: str,
+        account_id: int,
+        executor: Executor | None = None,
+        file_hash: str | None = None,
+        metrics: IngestionMetrics | None = None,
     ):
+        """
+        以固定大小的数据块流式处理文件：读取 -> 清洗 -> 解析对手方 -> 插入。
+        所有数据块在同一个事务中写入，全部成功后统一累加汇总表并提交一次，
+        因此无论文件多大，内存峰值只与块大小有关，而提交语义与整表处理时一致。
+        入库之前先扫描一遍文件得到日期范围并建好分区，见 _scan_date_range。
+
+        参数:
+            executor: 可选的进程池。提供时，CPU 密集的解析与清洗在子进程中执行。
+            file_hash: 文件哈希。提供时启用 Parquet 缓存，重新处理同一文件时直接读取缓存。
+            metrics: 可选的指标收集器。提供时记录各阶段耗时和行数，失败时也保留已记录的部分。
+        """
+        if metrics is None:
+            metrics = IngestionMetrics()
+        metrics.details["loader"] = settings.TRANSACTION_LOADER
         try:
-            raw_df = self._read_file_to_dataframe(file_path)
-            cleaned_df = self._clean_and_transform(raw_df)
-
-            if cleaned_df.empty:
+            # 先确定整个文件的日期范围，在单独的短事务中建好所需分区，入库事务中不再执行 DDL
+            first_date, last_date = await self._scan_date_range(
+                file_path, executor, file_hash, metrics
+            )
+            if first_date is None:
                 logger.warning("清洗后没有有效的交易数据可供处理。")
                 return {"processed_rows": 0}
+            await self._prepare_partitions(first_date, last_date, metrics)
 
-            transactions_to_create = []
-            for _, row in cleaned_df.iterrows():
-                normalized_name = self._normalize_counterparty_name(
-                    row.get("counterparty_name")
+            processed_rows = inserted_rows = skipped_rows = 0
+            # aclosing 保证入库失败时立即关闭生成器，未写完的缓存文件随之删除
+            async with aclosing(
+                self._aiter_cleaned_chunks(
+                    file_path, settings.INGEST_CHUNK_SIZE, executor, file_hash, metrics
                 )
+            ) as cleaned_chunks:
+                async for cleaned_df in cleaned_chunks:
+                    counts = await self._save_chunk(
+                        session, cleaned_df, account_id, metrics
+                    )
+                    processed_rows += len(cleaned_df)
+                    inserted_rows += counts["inserted"]
+                    skipped_rows += counts["skipped"]
+                    metrics.count("cleaned_rows", len(cleaned_df))
+                    metrics.count("inserted_rows", counts["inserted"])
+                    metrics.count("skipped_duplicates", counts["skipped"])
+
+            if processed_rows == 0:
+                logger.warning("清洗后没有有效的交易数据可供处理。")
+                return {"processed_rows": 0}
 
-                counterparty_type = self._classify_counterparty(normalized_name)
+            with metrics.stage("aggregate"):
+                await transaction_repository.apply_pending_aggregates(session)
+            with metrics.stage("commit"):
+                await session.commit()
+            logger.success(
+                f"交易数据批量插入成功！新增 {inserted_rows} 条，重复跳过 {skipped_rows} 条。"
+            )
+            return {
+                "processed_rows": processed_rows,
+                "inserted_rows": inserted_rows,
+                "skipped_rows": skipped_rows,
+            }
+        except Exception as e:
+            logger.error(f"处理文件 {file_path} 时发生严重错误: {e}", exc_info=True)
+            raise
 
-                counterparty = await counterparty_repository.get_or_create(
-                    session,
-                    name=normalized_name,
-                    account_number=row.get("counterparty_account_number"),
-                    counterparty_type=counterparty_type.value,
+    async def _find_clean_cache(
+        self, cache: ParsedFileCache, file_path: str
+    ) -> Path | None:
+        """按当前缓存的解析计划查找已有的清洗结果缓存"""
+        if cache.raw_path.exists():
+            columns = cache.read_raw_header()
+        else:
+            columns = await asyncio.to_thread(self._read_header, file_path)
+        plan = await self._get_cached_plan(columns)
+        if plan is None:
+            return None
+        clean_path = cache.clean_path(self._clean_cache_fingerprint(plan))
+        return clean_path if clean_path.exists() else None
+
+    async def _scan_date_range(
+        self,
+        file_path: str,
+        executor: Executor | None,
+        file_hash: str | None,
+        metrics: IngestionMetrics,
+    ) -> tuple:
+        """
+        入库之前确定文件中交易日期的最小值和最大值，没有有效数据时均为 None。
+
+        已有清洗缓存时只读取其中的日期列；否则完整地清洗一遍文件，
+        启用缓存时清洗结果随之写出，随后的入库直接读取缓存，不会再次清洗。
+        """
+        cache = (
+            ParsedFileCache(file_hash)
+            if file_hash and settings.PARQUET_CACHE_ENABLED
+            else None
+        )
+        if cache is not None:
+            clean_path = await self._find_clean_cache(cache, file_path)
+            if clean_path is not None:
+                return await asyncio.to_thread(
+                    column_range, clean_path, "transaction_date"
                 )
 
-                transaction_data = {
-                    "transaction_date": row.get("transaction_date"),
-                    "amount": row.get("amount"),
-                    "currency": row.get("currency", "CNY"),
-                    "transaction_type": row.get("transaction_type"),
-                    "balance_after_txn": row.get("balance_after_txn"),
-                    "description": row.get("description"),
-                    "transaction_method": row.get("transaction_method"),
-                    "bank_transaction_id": row.get("bank_transaction_id"),
-                    "is_cash": row.get("is_cash", False),
-                    "location": row.get("location"),
-                    "branch_name": row.get("branch_name"),
-                    "category": None,
-                    "account_id": account_id,
-                    "counterparty_id": counterparty.id,
-                }
-                transactions_to_create.append(transaction_data)
-
-            if transactions_to_create:
-                logger.info(f"准备批量插入 {len(transactions_to_create)} 条交易数据...")
-                await transaction_repository.bulk_create(
-                    session, transactions_data=transactions_to_create
+        first_date = last_date = None
+        async with aclosing(
+            self._aiter_cleaned_chunks(
+                file_path, settings.INGEST_CHUNK_SIZE, executor, file_hash, metrics
+            )
+        ) as cleaned_chunks:
+            async for cleaned_df in cleaned_chunks:
+                if cleaned_df.empty:
+                    continue
+                chunk_first = cleaned_df["transaction_date"].min()
+                chunk_last = cleaned_df["transaction_date"].max()
+                if first_date is None or chunk_first < first_date:
+                    first_date = chunk_first
+                if last_date is None or chunk_last > last_date:
+                    last_date = chunk_last
+        return first_date, last_date
+
+    async def _prepare_partitions(
+        self,
+        first_date: datetime.datetime,
+        last_date: datetime.datetime,
+        metrics: IngestionMetrics,
+    ) -> None:
+        """
+        用一个独立的会话建好 [first_date, last_date] 所需的分区并提交。
+        必须在入库事务写入交易表之前调用，否则建分区要等入库事务结束，两者互相等待。
+        """
+        with metrics.stage("partitions"):
+            async with get_session_local()() as session:
+                created = await transaction_repository.ensure_partitions(
+                    session, start=first_date, end=last_date
                 )
-                logger.success("交易数据批量插入成功！")
-            else:
-                logger.warning("没有可供插入的交易数据。")
+        if created:
+            logger.info(f"已创建交易分区: {', '.join(created)}")
+
+    async def prepare_file_parts(
+        self,
+        session: AsyncSession,
+        file_path: str,
+        executor: Executor | None = None,
+        file_hash: str | None = None,
+        metrics: IngestionMetrics | None = None,
+    ) -> tuple[Path, list[list[int]]] | None:
+        """
+        为大文件的分片并行入库做准备，返回 (清洗结果缓存路径, 各分片的 row group 序号)。
 
-            return {"processed_rows": len(cleaned_df)}
-        except Exception as e:
-            logger.error(f"处理文件 {file_path} 时发生严重错误: {e}", exc_info=True)
-            raise
+        1. 读取并清洗整个文件，结果写入清洗缓存（已有缓存时直接复用）；
+        2. 在各自的短事务中预先建好所需的交易分区和整个文件的全部对手方，
+           各分片入库时只需只读查找；
+        3. 按 INGEST_PART_ROWS 将缓存的 row group 分组。
+
+        无法得到完整的清洗缓存（例如缓存未启用、文件格式只能逐块检测）或只有一个分片时返回 None，
+        由调用方按普通流程处理整个文件。
+        """
+        if metrics is None:
+            metrics = IngestionMetrics()
+        if not file_hash or not settings.PARQUET_CACHE_ENABLED:
+            return None
+        cache = ParsedFileCache(file_hash)
+
+        # 1. 没有现成的清洗缓存时，消费一遍清洗管道，清洗缓存随之写出
+        clean_path = await self._find_clean_cache(cache, file_path)
+        if clean_path is None:
+            async with aclosing(
+                self._aiter_cleaned_chunks(
+                    file_path, settings.INGEST_CHUNK_SIZE, executor, file_hash, metrics
+                )
+            ) as cleaned_chunks:
+                async for cleaned_df in cleaned_chunks:
+                    metrics.count("cleaned_rows", len(cleaned_df))
+            # 可靠的计划在清洗时已写入计划缓存，据此找到刚写出的清洗结果
+            clean_path = await self._find_clean_cache(cache, file_path)
+        if clean_path is None:
+            return None
+        parts = split_row_groups(clean_path, settings.INGEST_PART_ROWS)
+        if len(parts) <= 1:
+            return None
+
+        # 2. 建好整个文件涉及的全部月份分区，分片入库时不会再执行 DDL
+        first_date, last_date = await asyncio.to_thread(
+            column_range, clean_path, "transaction_date"
+        )
+        if first_date is not None:
+            await self._prepare_partitions(first_date, last_date, metrics)
+
+        # 预先创建对手方，各分片之后不会再争抢对手方记录上的锁
+        with metrics.stage("resolve_counterparties"):
+            for chunk in iter_parquet_chunks(
+                clean_path,
+                settings.INGEST_CHUNK_SIZE,
+                columns=["counterparty_name", "counterparty_account_number"],
+            ):
+                self._replace_missing_with_none(chunk)
+                await self._resolve_counterparty_ids(session, chunk)
+            await session.commit()
+
+        metrics.details["parts_total"] = len(parts)
+        logger.info(f"文件 {file_path} 将拆分为 {len(parts)} 个分片并行入库。")
+        return clean_path, parts
+
+    async def save_file_part(
+        self,
+        session: AsyncSession,
+        clean_path: str,
+        row_groups: list[int],
+        account_id: int,
+        metrics: IngestionMetrics | None = None,
+    ) -> dict[str, int]:
+        """
+        入库一个分片：从清洗缓存中读出指定的 row group 并写入，全部成功后提交一次。
+        """
+        if metrics is None:
+            metrics = IngestionMetrics()
+        inserted_rows = skipped_rows = 0
+        with closing(iter_parquet_row_groups(Path(clean_path), row_groups)) as chunks:
+            while True:
+                with metrics.stage("read"):
+                    cleaned_df = await asyncio.to_thread(next, chunks, None)
+                if cleaned_df is None:
+                    break
+                self._replace_missing_with_none(cleaned_df)
+                counts = await self._save_chunk(
+                    session,
+                    cleaned_df,
+                    account_id,
+                    metrics,
+                    create_counterparties=False,
+                )
+                inserted_rows += counts["inserted"]
+                skipped_rows += counts["skipped"]
+                metrics.count("cleaned_rows", len(cleaned_df))
+        metrics.count("inserted_rows", inserted_rows)
+        metrics.count("skipped_duplicates", skipped_rows)
+        with metrics.stage("aggregate"):
+            await transaction_repository.apply_pending_aggregates(session)
+        with metrics.stage("commit"):
+            await session.commit()
+        return {"inserted_rows": inserted_rows, "skipped_rows": skipped_rows}
 
 
 parser_service = ParserService()
+
+
+# --- 供进程池调用的顶层函数 ---
+# 进程池只能执行可被 pickle 的顶层函数，子进程中会使用各自的 parser_service 单例。
+def _clean_in_worker(df: pd.DataFrame, plan: ParserPlan) -> pd.DataFrame:
+    return parser_service._clean_and_transform(df, plan)
+
+
+def _read_and_clean_in_worker(
+    file_path: str, plan: ParserPlan | None, file_hash: str | None = None
+) -> tuple[ParserPlan, bool, pd.DataFrame, IngestionMetrics]:
+    metrics = IngestionMetrics()
+    with metrics.stage("read"):
+        df = parser_service._read_file_to_dataframe(file_path)
+    metrics.count("raw_rows", len(df))
+    if file_hash:
+        # 原始表格缓存在子进程中直接写出，避免把整张表传回主进程再写
+        with metrics.stage("cache_write"):
+            with ParsedFileCache(file_hash).raw_writer(list(df.columns)) as raw_writer:
+                raw_writer.write(df)
+    conclusive = True
+    if plan is None:
+        with metrics.stage("plan"):
+            plan, conclusive = parser_service._build_plan(df)
+    with metrics.stage("clean"):
+        cleaned_df = parser_service._clean_and_transform(df, plan)
+    metrics.count("dropped_missing_date", len(df) - len(cleaned_df))
+    return plan, conclusive, cleaned_df, metrics
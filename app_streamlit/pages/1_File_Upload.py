@@ -1,4 +1,5 @@
 import os
+import hashlib
 import streamlit as st
 import requests
 import pandas as pd
@@ -78,6 +79,16 @@ def delete_file(file_id: int, account_id_to_refresh: int):
         st.error(f"删除请求失败: {e}")
 
 
+def find_uploaded_file(file_hash: str):
+    """上传前的哈希预检，返回已存在的文件信息；预检失败时返回 None，照常上传"""
+    try:
+        response = requests.get(f"{API_BASE_URL}/files/by_hash/{file_hash}")
+        response.raise_for_status()
+        return response.json().get("file")
+    except requests.exceptions.RequestException:
+        return None
+
+
 def format_status(status: str) -> str:
     status_map = {
         "SUCCESS": "✅ 成功",
@@ -163,37 +174,52 @@ else:
                     submitted = st.form_submit_button("🚀 开始上传和处理")
 
                     if submitted and uploaded_file is not None:
-                        files = {
-                            "file": (
-                                uploaded_file.name,
-                                uploaded_file.getvalue(),
-                                uploaded_file.type,
+                        file_bytes = uploaded_file.getvalue()
+                        # 先在本地计算哈希，已上传过的文件不再重复传输
+                        existing_file = find_uploaded_file(
+                            hashlib.sha256(file_bytes).hexdigest()
+                        )
+                        if existing_file:
+                            uploaded_at = pd.to_datetime(
+                                existing_file["upload_timestamp"]
+                            ).strftime("%Y-%m-%d %H:%M:%S")
+                            st.warning(
+                                f"该文件已于 {uploaded_at} 以 '{existing_file['filename']}' "
+                                f"上传过，处理状态：{format_status(existing_file['processing_status'])}。"
+                                "无需重复上传。"
                             )
-                        }
-                        data = {"account_id": st.session_state.selected_account_id}
-
-                        with st.spinner(f"正在上传文件 '{uploaded_file.name}'..."):
-                            try:
-                                response = requests.post(
-                                    f"{API_BASE_URL}/files/upload",
-                                    files=files,
-                                    data=data,
+                        else:
+                            files = {
+                                "file": (
+                                    uploaded_file.name,
+                                    file_bytes,
+                                    uploaded_file.type,
                                 )
-                                if response.status_code in [200, 201]:
-                                    st.success("🎉 文件上传成功！后台正在异步处理中...")
-                                    refresh_file_history(
-                                        st.session_state.selected_account_id
-                                    )
-                                else:
-                                    st.error(
-                                        f"上传失败，错误码: {response.status_code}"
+                            }
+                            data = {"account_id": st.session_state.selected_account_id}
+
+                            with st.spinner(f"正在上传文件 '{uploaded_file.name}'..."):
+                                try:
+                                    response = requests.post(
+                                        f"{API_BASE_URL}/files/upload",
+                                        files=files,
+                                        data=data,
                                     )
-                                    try:
-                                        st.json(response.json())
-                                    except requests.exceptions.JSONDecodeError:
-                                        st.text(response.text)
-                            except requests.exceptions.RequestException as e:
-                                st.error(f"上传请求失败: {e}")
+                                    if response.status_code in [200, 201]:
+                                        st.success("🎉 文件上传成功！后台正在异步处理中...")
+                                        refresh_file_history(
+                                            st.session_state.selected_account_id
+                                        )
+                                    else:
+                                        st.error(
+                                            f"上传失败，错误码: {response.status_code}"
+                                        )
+                                        try:
+                                            st.json(response.json())
+                                        except requests.exceptions.JSONDecodeError:
+                                            st.text(response.text)
+                                except requests.exceptions.RequestException as e:
+                                    st.error(f"上传请求失败: {e}")
 
                 st.markdown("---")
                 st.subheader("📂 文件上传历史")
@@ -21,13 +21,23 @@ st.markdown("在这里，您可以一览自己所有账户的完整交易流水
 # --- 会话状态初始化 ---
 if "selected_person_id" not in st.session_state:
     st.session_state.selected_person_id = None
-if "global_transactions_df" not in st.session_state:
-    st.session_state.global_transactions_df = pd.DataFrame()
-if "global_loaded_person_id" not in st.session_state:
-    st.session_state.global_loaded_person_id = None
-
-
-# --- API 调用函数 (不变) ---
+# 交易明细按需逐页加载，筛选条件变化时清空
+if "global_detail_key" not in st.session_state:
+    st.session_state.global_detail_key = None
+if "global_detail_rows" not in st.session_state:
+    st.session_state.global_detail_rows = []
+if "global_detail_cursor" not in st.session_state:
+    st.session_state.global_detail_cursor = None
+
+TYPE_MAPPING = {"CREDIT": "收入", "DEBIT": "支出"}
+# 与后端 TransactionFilter 的限制一致：短关键字用不上索引，只能配合较短的日期范围
+KEYWORD_MIN_LENGTH = 3
+SHORT_KEYWORD_MAX_DAYS = 31
+DETAIL_PAGE_SIZE = 200
+EXPORT_PAGE_SIZE = 10000
+
+
+# --- API 调用函数 ---
 @st.cache_data(ttl=60)
 def get_all_persons():
     try:
@@ -38,40 +48,74 @@ def get_all_persons():
         return []
 
 
-def load_global_transactions(person_id: int):
-    if not person_id:
-        st.session_state.global_transactions_df = pd.DataFrame()
-        return
-    with st.spinner(f"正在加载用户ID {person_id} 的全部交易数据..."):
-        try:
-            all_transactions = []
-            limit, skip = 100, 0
-            while True:
-                response = requests.get(
-                    f"{API_BASE_URL}/persons/{person_id}/transactions",
-                    params={"skip": skip, "limit": limit},
-                )
-                response.raise_for_status()
-                data = response.json()
-                if not data:
-                    break
-                all_transactions.extend(data)
-                skip += limit
-
-            if all_transactions:
-                df = pd.DataFrame(all_transactions)
-                df["transaction_date"] = pd.to_datetime(
-                    df["transaction_date"]
-                ).dt.tz_convert("Asia/Shanghai")
-                df["account_name"] = df["account"].apply(lambda x: x["account_name"])
-                df["counterparty_name"] = df["counterparty"].apply(lambda x: x["name"])
-                df.drop(columns=["account", "counterparty"], inplace=True)
-                st.session_state.global_transactions_df = df
-            else:
-                st.session_state.global_transactions_df = pd.DataFrame()
-        except requests.exceptions.RequestException as e:
-            st.error(f"加载全局交易数据失败: {e}")
-            st.session_state.global_transactions_df = pd.DataFrame()
+@st.cache_data(ttl=60)
+def get_person_analytics(person_id: int, name: str, params: dict):
+    """读取服务端聚合好的分析结果 (kpis / top-counterparties / type-breakdown)"""
+    try:
+        response = requests.get(
+            f"{API_BASE_URL}/persons/{person_id}/analytics/{name}", params=params
+        )
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException:
+        return None
+
+
+@st.cache_data(ttl=60)
+def get_person_timeseries(person_id: int, params: dict):
+    try:
+        response = requests.get(
+            f"{API_BASE_URL}/persons/{person_id}/timeseries", params=params
+        )
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException:
+        return []
+
+
+def fetch_transaction_page(
+    person_id: int, params: dict, cursor: str | None, limit: int = DETAIL_PAGE_SIZE
+):
+    page_params = {**params, "limit": limit}
+    if cursor:
+        page_params["cursor"] = cursor
+    response = requests.get(
+        f"{API_BASE_URL}/persons/{person_id}/transactions/rows", params=page_params
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def load_more_transactions(person_id: int, params: dict):
+    try:
+        data = fetch_transaction_page(
+            person_id, params, st.session_state.global_detail_cursor
+        )
+        st.session_state.global_detail_rows.extend(data["items"])
+        st.session_state.global_detail_cursor = data["next_cursor"]
+    except requests.exceptions.RequestException as e:
+        st.error(f"加载交易明细失败: {e}")
+
+
+def load_all_transactions(person_id: int, params: dict) -> list:
+    """导出 CSV 时才读取全部符合筛选条件的交易"""
+    rows, cursor = [], None
+    while True:
+        data = fetch_transaction_page(person_id, params, cursor, EXPORT_PAGE_SIZE)
+        rows.extend(data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            return rows
+
+
+def transactions_to_df(transactions: list) -> pd.DataFrame:
+    # /transactions/rows 返回扁平的行，账户和对手方名称已经是独立的列
+    df = pd.DataFrame(transactions)
+    df["transaction_date"] = pd.to_datetime(df["transaction_date"]).dt.tz_convert(
+        "Asia/Shanghai"
+    )
+    df["type_cn"] = df["transaction_type"].map(TYPE_MAPPING)
+    return df
 
 
 @st.cache_data
@@ -79,7 +123,7 @@ def convert_df_to_csv(df: pd.DataFrame):
     return df.to_csv(index=False).encode("utf-8-sig")
 
 
-# --- 页面布局与逻辑 (不变) ---
+# --- 页面布局与逻辑 ---
 persons = get_all_persons()
 if not persons:
     st.warning("系统中还没有任何用户。")
@@ -100,39 +144,34 @@ else:
         placeholder="请选择一个用户...",
     )
 
+    overview = None
     if selected_person_name:
-        # 获取当前在UI上选择的用户ID
-        current_person_id = person_df[person_df["full_name"] == selected_person_name][
-            "id"
-        ].iloc[0]
+        current_person_id = int(
+            person_df[person_df["full_name"] == selected_person_name]["id"].iloc[0]
+        )
         st.session_state.selected_person_id = current_person_id
-
-        # 只有当选择的用户ID和我们已加载数据的用户ID不同时，才重新加载
-        if current_person_id != st.session_state.global_loaded_person_id:
-            load_global_transactions(current_person_id)
-            st.session_state.global_loaded_person_id = current_person_id
-    else:
-        # 如果下拉框被清空，我们也清空数据和状态，以避免状态污染
-        if st.session_state.global_loaded_person_id is not None:
-            st.session_state.global_transactions_df = pd.DataFrame()
-            st.session_state.global_loaded_person_id = None
+        # 不带筛选条件的指标，用来确定日期筛选器的范围
+        overview = get_person_analytics(current_person_id, "kpis", {})
+        if overview is None:
+            st.error("加载全局分析数据失败，请检查后端服务。")
 
     # --- 数据展示与筛选 ---
-    if not st.session_state.global_transactions_df.empty:
-        df = st.session_state.global_transactions_df.copy()
-        type_mapping = {"CREDIT": "收入", "DEBIT": "支出"}
-        df["type_cn"] = df["transaction_type"].map(type_mapping)
-
+    if overview and overview["transaction_count"]:
         st.markdown("---")
         st.markdown(f"### **{selected_person_name}** 的财务总览")
 
-        # ... 筛选器代码不变 ...
         with st.expander("点击展开筛选器", expanded=False):
             col1, col2, col3 = st.columns(3)
             with col1:
-                min_date, max_date = (
-                    df["transaction_date"].min().date(),
-                    df["transaction_date"].max().date(),
+                min_date = (
+                    pd.Timestamp(overview["first_transaction_date"])
+                    .tz_convert("Asia/Shanghai")
+                    .date()
+                )
+                max_date = (
+                    pd.Timestamp(overview["last_transaction_date"])
+                    .tz_convert("Asia/Shanghai")
+                    .date()
                 )
                 date_range = st.date_input(
                     "选择日期范围",
@@ -143,58 +182,75 @@ else:
             with col2:
                 selected_types_cn = st.multiselect(
                     "交易类型",
-                    options=df["type_cn"].unique(),
-                    default=df["type_cn"].unique(),
+                    options=list(TYPE_MAPPING.values()),
+                    default=list(TYPE_MAPPING.values()),
                 )
             with col3:
                 search_term = st.text_input(
-                    "摘要或对手方关键字", placeholder="例如：星巴克、工资..."
+                    "摘要或对手方关键字",
+                    placeholder="例如：星巴克、工资...",
+                    help=f"少于 {KEYWORD_MIN_LENGTH} 个字符的关键字需要配合"
+                    f"不超过 {SHORT_KEYWORD_MAX_DAYS} 天的日期范围",
+                )
+            col4, col5, col6 = st.columns(3)
+            with col4:
+                min_amount = st.number_input(
+                    "最小金额 (绝对值)", min_value=0.0, value=None, step=100.0
+                )
+            with col5:
+                max_amount = st.number_input(
+                    "最大金额 (绝对值)", min_value=0.0, value=None, step=100.0
+                )
+            with col6:
+                cash_option = st.selectbox(
+                    "现金交易", options=["全部", "仅现金", "仅非现金"]
                 )
 
+        # 筛选条件交给后端，在数据库中完成筛选和聚合
+        params = {}
         if len(date_range) == 2:
-            start_date, end_date = date_range
-            df = df[
-                (df["transaction_date"].dt.date >= start_date)
-                & (df["transaction_date"].dt.date <= end_date)
-            ]
+            params["start_date"] = date_range[0].isoformat()
+            params["end_date"] = date_range[1].isoformat()
         if selected_types_cn:
-            df = df[df["type_cn"].isin(selected_types_cn)]
-        if search_term:
-            df = df[
-                df["description"].str.contains(search_term, case=False, na=False)
-                | df["counterparty_name"].str.contains(search_term, case=False, na=False)
-                | df["transaction_method"].str.contains(search_term, case=False, na=False)
-                | df["location"].str.contains(search_term, case=False, na=False)
-                | df["branch_name"].str.contains(search_term, case=False, na=False)
+            params["transaction_type"] = [
+                code for code, name in TYPE_MAPPING.items() if name in selected_types_cn
             ]
-
-        filtered_df = df
+        if search_term:
+            if len(search_term) < KEYWORD_MIN_LENGTH and not (
+                len(date_range) == 2
+                and (date_range[1] - date_range[0]).days < SHORT_KEYWORD_MAX_DAYS
+            ):
+                st.warning(
+                    f"关键字少于 {KEYWORD_MIN_LENGTH} 个字符时，请把日期范围缩小到 "
+                    f"{SHORT_KEYWORD_MAX_DAYS} 天以内，本次未按关键字筛选。"
+                )
+            else:
+                params["keyword"] = search_term
+        if min_amount is not None:
+            params["min_amount"] = min_amount
+        if max_amount is not None:
+            params["max_amount"] = max_amount
+        if cash_option != "全部":
+            params["is_cash"] = cash_option == "仅现金"
+
+        kpis = get_person_analytics(current_person_id, "kpis", params) or overview
+        top_counterparties = (
+            get_person_analytics(current_person_id, "top-counterparties", params) or []
+        )
+        type_breakdown = (
+            get_person_analytics(current_person_id, "type-breakdown", params) or []
+        )
 
         st.markdown("#### 📊 关键指标")
-        total_income = filtered_df[filtered_df["transaction_type"] == "CREDIT"][
-            "amount"
-        ].sum()
-        total_expense = filtered_df[filtered_df["transaction_type"] == "DEBIT"][
-            "amount"
-        ].sum()
-        net_flow = total_income + total_expense
-
-        # --- 【核心修改点 1】: 计算并显示全局最终余额 ---
-        total_final_balance = 0.0
-        if not filtered_df.empty:
-            # 按账户分组，找到每个账户的最后一条交易，然后求和
-            latest_txn_indices = filtered_df.groupby("account_name")[
-                "transaction_date"
-            ].idxmax()
-            latest_txns_df = filtered_df.loc[latest_txn_indices]
-            total_final_balance = latest_txns_df["balance_after_txn"].sum()
-
         kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
-        kpi1.metric(label="🔼 总收入", value=f"¥ {total_income:,.2f}")
-        kpi2.metric(label="🔽 总支出", value=f"¥ {abs(total_expense):,.2f}")
-        kpi3.metric(label="↔️ 净流量", value=f"¥ {net_flow:,.2f}")
-        kpi4.metric(label="🔢 总交易笔数", value=f"{len(filtered_df)}")
-        kpi5.metric(label="🏦 全局期末余额", value=f"¥ {total_final_balance:,.2f}")
+        kpi1.metric(label="🔼 总收入", value=f"¥ {kpis['total_income']:,.2f}")
+        kpi2.metric(label="🔽 总支出", value=f"¥ {abs(kpis['total_expense']):,.2f}")
+        kpi3.metric(label="↔️ 净流量", value=f"¥ {kpis['net_flow']:,.2f}")
+        kpi4.metric(label="🔢 总交易笔数", value=f"{kpis['transaction_count']}")
+        # 全局期末余额：每个账户在筛选范围内最后一笔交易的余额之和，由后端计算
+        kpi5.metric(
+            label="🏦 全局期末余额", value=f"¥ {kpis['closing_balance']:,.2f}"
+        )
 
         st.markdown("#### 📈 可视化分析")
 
@@ -204,29 +260,22 @@ else:
         with chart_col1:
             st.write("**Top 收支对手方**")
 
-            # 准备龙卷风图的数据
-            top_5_expense_names = (
-                filtered_df[filtered_df.type_cn == "支出"]
-                .groupby("counterparty_name")["amount"]
-                .sum()
-                .abs()
-                .nlargest(5)
-                .index
-            )
-            top_5_income_names = (
-                filtered_df[filtered_df.type_cn == "收入"]
-                .groupby("counterparty_name")["amount"]
-                .sum()
-                .nlargest(5)
-                .index
-            )
-            top_opponents = top_5_expense_names.union(top_5_income_names)
-
-            chart_df = filtered_df[filtered_df.counterparty_name.isin(top_opponents)]
-            chart_data = (
-                chart_df.groupby(["counterparty_name", "type_cn"])["amount"]
-                .sum()
-                .reset_index()
+            # 准备龙卷风图的数据：后端已按名称聚合出收支前五名的对手方
+            chart_data = pd.DataFrame(
+                [
+                    {
+                        "counterparty_name": row["name"],
+                        "type_cn": type_cn,
+                        "amount": amount,
+                    }
+                    for row in top_counterparties
+                    for type_cn, amount in (
+                        ("收入", row["total_income"]),
+                        ("支出", row["total_expense"]),
+                    )
+                    if amount
+                ],
+                columns=["counterparty_name", "type_cn", "amount"],
             )
 
             # 创建龙卷风图
@@ -257,8 +306,17 @@ else:
 
             # --- 【核心新增代码：饼图】 ---
             # 1. 准备饼图的数据
-            type_summary = (
-                filtered_df.groupby("type_cn")["amount"].sum().abs().reset_index()
+            type_summary = pd.DataFrame(
+                [
+                    {
+                        "type_cn": TYPE_MAPPING.get(
+                            row["transaction_type"], row["transaction_type"]
+                        ),
+                        "amount": abs(row["total_amount"]),
+                    }
+                    for row in type_breakdown
+                ],
+                columns=["type_cn", "amount"],
             )
 
             # 2. 创建饼图（甜甜圈图）
@@ -286,8 +344,47 @@ else:
             )
             st.altair_chart(donut_chart, use_container_width=True)
 
+        st.markdown("#### 📆 月度收支趋势")
+        trend_params = {"granularity": "month"}
+        if len(date_range) == 2:
+            trend_params["start_date"] = date_range[0].isoformat()
+            trend_params["end_date"] = date_range[1].isoformat()
+        trend = get_person_timeseries(current_person_id, trend_params)
+        if trend:
+            trend_df = pd.DataFrame(trend)
+            trend_df["支出"] = trend_df["debit_total"].abs()
+            trend_df = trend_df.rename(columns={"credit_total": "收入"}).melt(
+                id_vars=["period"], value_vars=["收入", "支出"], var_name="type_cn"
+            )
+            trend_chart = (
+                alt.Chart(trend_df)
+                .mark_line(point=True)
+                .encode(
+                    x=alt.X("yearmonth(period):T", title="月份"),
+                    y=alt.Y("value:Q", title="金额 (元)"),
+                    color=alt.Color(
+                        "type_cn:N",
+                        scale=alt.Scale(
+                            domain=["收入", "支出"], range=["#2E8B57", "#D26466"]
+                        ),
+                        title="类型",
+                    ),
+                    tooltip=["period", "type_cn", "value"],
+                )
+                .properties(height=300)
+            )
+            st.altair_chart(trend_chart, use_container_width=True)
+        st.caption("趋势图来自按日汇总表，只受日期范围影响。")
+
         st.markdown("#### 📋 交易明细 (全局)")
-        # ... 表格部分代码不变 ...
+        # 明细按页加载，筛选条件变化时从第一页重新开始
+        detail_key = (current_person_id, repr(sorted(params.items())))
+        if st.session_state.global_detail_key != detail_key:
+            st.session_state.global_detail_key = detail_key
+            st.session_state.global_detail_rows = []
+            st.session_state.global_detail_cursor = None
+            load_more_transactions(current_person_id, params)
+
         display_columns = [
             "transaction_date",
             "account_name",
@@ -304,39 +401,58 @@ else:
             "bank_transaction_id",
             "category",
         ]
-        csv = convert_df_to_csv(filtered_df[display_columns])
-        st.download_button(
-            label="📥 下载筛选结果为 CSV",
-            data=csv,
-            file_name=f"{selected_person_name}_global_transactions.csv",
-            mime="text/csv",
-        )
-        st.dataframe(
-            filtered_df[display_columns],
-            column_config={
-                "transaction_date": st.column_config.DatetimeColumn(
-                    "交易时间 (北京)", format="YYYY-MM-DD HH:mm:ss"
-                ),
-                "account_name": "所属账户",
-                "description": "交易摘要",
-                "counterparty_name": "对手方",
-                "amount": st.column_config.NumberColumn("金额", format="¥ %.2f"),
-                "type_cn": "类型",
-                "balance_after_txn": st.column_config.NumberColumn(
-                    "交易后余额", format="¥ %.2f"
-                ),
-                "currency": "币种",
-                "transaction_method": "交易渠道",
-                "is_cash": "是否现金",
-                "location": "交易地点",
-                "branch_name": "交易网点",
-                "bank_transaction_id": "银行流水号",
-                "category": "交易分类",
-            },
-            use_container_width=True,
-            hide_index=True,
-            height=600,
-        )
+        if st.button("📄 准备完整的筛选结果 CSV"):
+            with st.spinner("正在读取全部符合条件的交易..."):
+                try:
+                    all_rows = load_all_transactions(current_person_id, params)
+                    csv = convert_df_to_csv(
+                        transactions_to_df(all_rows)[display_columns]
+                    )
+                    st.download_button(
+                        label="📥 下载筛选结果为 CSV",
+                        data=csv,
+                        file_name=f"{selected_person_name}_global_transactions.csv",
+                        mime="text/csv",
+                    )
+                except requests.exceptions.RequestException as e:
+                    st.error(f"读取交易明细失败: {e}")
+
+        if not st.session_state.global_detail_rows:
+            st.info("没有符合筛选条件的交易。")
+        else:
+            filtered_df = transactions_to_df(st.session_state.global_detail_rows)
+            st.caption(
+                f"已加载 {len(filtered_df)} / {kpis['transaction_count']} 条交易"
+            )
+            st.dataframe(
+                filtered_df[display_columns],
+                column_config={
+                    "transaction_date": st.column_config.DatetimeColumn(
+                        "交易时间 (北京)", format="YYYY-MM-DD HH:mm:ss"
+                    ),
+                    "account_name": "所属账户",
+                    "description": "交易摘要",
+                    "counterparty_name": "对手方",
+                    "amount": st.column_config.NumberColumn("金额", format="¥ %.2f"),
+                    "type_cn": "类型",
+                    "balance_after_txn": st.column_config.NumberColumn(
+                        "交易后余额", format="¥ %.2f"
+                    ),
+                    "currency": "币种",
+                    "transaction_method": "交易渠道",
+                    "is_cash": "是否现金",
+                    "location": "交易地点",
+                    "branch_name": "交易网点",
+                    "bank_transaction_id": "银行流水号",
+                    "category": "交易分类",
+                },
+                use_container_width=True,
+                hide_index=True,
+                height=600,
+            )
+            if st.session_state.global_detail_cursor and st.button("⬇️ 加载更多"):
+                load_more_transactions(current_person_id, params)
+                st.rerun()
 
-    elif selected_person_name:
+    elif overview is not None and selected_person_name:
         st.info("该用户没有任何交易数据。")
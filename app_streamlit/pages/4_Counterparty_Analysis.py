@@ -23,8 +23,6 @@ if "selected_person_id" not in st.session_state:
     st.session_state.selected_person_id = None
 if "opponent_summary_df" not in st.session_state:
     st.session_state.opponent_summary_df = pd.DataFrame()
-if "opponent_detail_df" not in st.session_state:
-    st.session_state.opponent_detail_df = pd.DataFrame()
 if "opponent_loaded_person_id" not in st.session_state:
     st.session_state.opponent_loaded_person_id = None
 
@@ -40,15 +38,31 @@ def get_all_persons():
         return []
 
 
+@st.cache_data(ttl=60)
+def get_opponent_transactions(person_id: int, opponent_name: str):
+    """只读取选中对手方的交易，筛选在后端按名称完成"""
+    transactions = []
+    params = {"counterparty_name": opponent_name, "limit": 5000}
+    while True:
+        response = requests.get(
+            f"{API_BASE_URL}/persons/{person_id}/transactions/rows", params=params
+        )
+        response.raise_for_status()
+        data = response.json()
+        transactions.extend(data["items"])
+        if not data["next_cursor"]:
+            return transactions
+        params["cursor"] = data["next_cursor"]
+
+
 def load_opponent_data(person_id: int):
     if not person_id:
         st.session_state.opponent_summary_df = pd.DataFrame()
-        st.session_state.opponent_detail_df = pd.DataFrame()
         return
 
     with st.spinner(f"正在深度分析用户ID {person_id} 的对手方网络..."):
         try:
-            # 1. 获取按名称聚合的分析数据
+            # 获取按名称聚合的分析数据；交易明细在选中对手方后再按需读取
             summary_response = requests.get(
                 f"{API_BASE_URL}/persons/{person_id}/counterparties/analysis_summary"
             )
@@ -57,38 +71,9 @@ def load_opponent_data(person_id: int):
             st.session_state.opponent_summary_df = (
                 pd.DataFrame(summary_data) if summary_data else pd.DataFrame()
             )
-
-            # 2. 获取该用户的所有原始交易记录
-            all_transactions = []
-            limit, skip = 100, 0
-            while True:
-                detail_response = requests.get(
-                    f"{API_BASE_URL}/persons/{person_id}/transactions",
-                    params={"skip": skip, "limit": limit},
-                )
-                detail_response.raise_for_status()
-                detail_data = detail_response.json()
-                if not detail_data:
-                    break
-                all_transactions.extend(detail_data)
-                skip += limit
-
-            if all_transactions:
-                detail_df = pd.DataFrame(all_transactions)
-                detail_df["transaction_date"] = pd.to_datetime(
-                    detail_df["transaction_date"]
-                ).dt.tz_convert("Asia/Shanghai")
-                detail_df["counterparty_name"] = detail_df["counterparty"].apply(
-                    lambda x: x["name"]
-                )
-                st.session_state.opponent_detail_df = detail_df
-            else:
-                st.session_state.opponent_detail_df = pd.DataFrame()
-
         except requests.exceptions.RequestException as e:
             st.error(f"加载对手方分析数据失败: {e}")
             st.session_state.opponent_summary_df = pd.DataFrame()
-            st.session_state.opponent_detail_df = pd.DataFrame()
 
 
 # --- 页面布局与逻辑 ---
@@ -127,13 +112,11 @@ else:
             st.rerun()
     else:
         st.session_state.opponent_summary_df = pd.DataFrame()
-        st.session_state.opponent_detail_df = pd.DataFrame()
         st.session_state.opponent_loaded_person_id = None
 
     # --- 数据展示 ---
     if not st.session_state.opponent_summary_df.empty:
         summary_df = st.session_state.opponent_summary_df.copy()
-        detail_df = st.session_state.opponent_detail_df.copy()
 
         st.markdown("---")
         st.markdown(f"### **{selected_person_name}** 的核心对手方网络")
@@ -179,18 +162,37 @@ else:
         )
         st.altair_chart(chart, use_container_width=True)
 
-        # 详细交易使用 expander 和原始交易数据
+        # 详细交易：选中一个对手方后只读取它的交易
         st.markdown("#### 对手方交易明细")
         sorted_summary_df = summary_df.sort_values("total_flow", ascending=False)
+        total_flow_by_name = dict(
+            zip(sorted_summary_df["name"], sorted_summary_df["total_flow"])
+        )
 
-        for _, opponent in sorted_summary_df.iterrows():
-            opponent_name = opponent["name"]
-            with st.expander(
-                f"**{opponent_name}** (总流水: ¥ {opponent['total_flow']:,.2f} | 交易次数: {opponent['transaction_count']})"
-            ):
-                opponent_transactions = detail_df[
-                    detail_df["counterparty_name"] == opponent_name
-                ].copy()
+        opponent_name = st.selectbox(
+            "选择对手方 (按总流水排序)",
+            options=sorted_summary_df["name"],
+            format_func=lambda name: (
+                f"{name} (总流水: ¥ {total_flow_by_name[name]:,.2f})"
+            ),
+            index=None,
+            placeholder="请选择一个对手方查看交易明细...",
+        )
+        if opponent_name:
+            try:
+                opponent_transactions = pd.DataFrame(
+                    get_opponent_transactions(
+                        st.session_state.selected_person_id, opponent_name
+                    )
+                )
+            except requests.exceptions.RequestException as e:
+                st.error(f"加载对手方交易明细失败: {e}")
+                opponent_transactions = pd.DataFrame()
+
+            if not opponent_transactions.empty:
+                opponent_transactions["transaction_date"] = pd.to_datetime(
+                    opponent_transactions["transaction_date"]
+                ).dt.tz_convert("Asia/Shanghai")
 
                 # 1. 在这里对局部的 DataFrame 进行中文映射
                 type_mapping = {"CREDIT": "收入", "DEBIT": "支出"}
@@ -0,0 +1,97 @@
+"""
+对比对手方分类的三种实现：原先的逐关键词循环、自动机逐个分类、自动机批量分类，
+并校验三者结果完全一致。
+
+不依赖数据库。
+
+用法:
+    uv run python -m scripts.bench_counterparty_classifier
+    uv run python -m scripts.bench_counterparty_classifier --names 100000
+"""
+
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from app.core.config import settings
+from app.models.enums import CounterpartyType
+from app.tasks.utils.parser_service import parser_service
+
+
+def legacy_classify(name: str) -> CounterpartyType:
+    """引入自动机之前 ParserService._classify_counterparty 的实现，作为对照"""
+    normalized_name = name.lower().strip()
+
+    if not normalized_name or normalized_name == "未知对手":
+        return CounterpartyType.UNKNOWN
+
+    for keyword in settings.COUNTERPARTY_MERCHANT_KEYWORDS:
+        if keyword.lower() in normalized_name:
+            if any(p in normalized_name for p in ["支付", "财付通", "支付宝"]):
+                return CounterpartyType.PAYMENT_PLATFORM
+            if "银行" in normalized_name or "银联" in normalized_name:
+                return CounterpartyType.BANK
+            return CounterpartyType.MERCHANT
+
+    if len(normalized_name) > 7:
+        return CounterpartyType.MERCHANT
+
+    return CounterpartyType.PERSON
+
+
+def build_names(size: int) -> pd.Series:
+    """生成个人姓名、各类商户名称和空名称混合的样本"""
+    rng = random.Random(0)
+    surnames = "赵钱孙李周吴郑王冯陈褚卫蒋沈韩杨"
+    given = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚"
+    cities = ["北京", "上海", "深圳", "杭州", "成都", "武汉"]
+    suffixes = settings.COUNTERPARTY_MERCHANT_KEYWORDS + ["店", "超市", "工作室"]
+    names = []
+    for i in range(size):
+        kind = i % 10
+        if kind < 5:
+            names.append(rng.choice(surnames) + "".join(rng.choices(given, k=2)))
+        elif kind < 9:
+            names.append(
+                rng.choice(cities) + f"{rng.randrange(1000)}号" + rng.choice(suffixes)
+            )
+        else:
+            names.append(rng.choice(["", "  ", "未知对手", "ATM"]))
+    return pd.Series(names, dtype=object)
+
+
+def main(size: int) -> None:
+    names = build_names(size)
+    classifier = parser_service.counterparty_classifier
+
+    started = time.perf_counter()
+    legacy = [legacy_classify(name).value for name in names]
+    legacy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    single = [classifier.classify(name).value for name in names]
+    single_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = classifier.classify_many(names).tolist()
+    batch_time = time.perf_counter() - started
+
+    assert single == legacy, "逐个分类的结果与原实现不一致"
+    assert batch == legacy, "批量分类的结果与原实现不一致"
+
+    print(f"names: {size}")
+    print(f"{'legacy loop':>16}: {legacy_time:8.2f} s")
+    print(
+        f"{'automaton':>16}: {single_time:8.2f} s  ({legacy_time / single_time:.1f}x)"
+    )
+    print(
+        f"{'automaton batch':>16}: {batch_time:8.2f} s  ({legacy_time / batch_time:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=1_000_000)
+    main(parser.parse_args().names)
@@ -0,0 +1,92 @@
+"""
+对比不同 Excel 读取引擎解析银行流水的耗时，并校验结果完全一致。
+
+生成一个多工作表的大型 .xlsx 流水（第一个工作表为交易明细，其余为附表），
+分别用 openpyxl（只读流式模式）和 calamine 读取，
+要求得到的 DataFrame 与 openpyxl 的结果逐单元格相同。
+
+不依赖数据库，calamine 需要先安装可选依赖:
+    uv sync --extra fast-excel
+
+用法:
+    uv run python -m scripts.bench_excel_reader
+    uv run python -m scripts.bench_excel_reader --rows 50000 200000 --sheets 5
+"""
+
+import argparse
+import datetime
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+
+from app.tasks.utils.parser_service import CALAMINE_AVAILABLE, parser_service
+
+
+def build_workbook(path: Path, rows: int, sheets: int) -> None:
+    """写出一个模拟建行/农行导出格式的多工作表流水文件。"""
+    start = datetime.datetime(2024, 1, 1, 8, 30)
+    statement = pd.DataFrame(
+        {
+            "交易日期": [
+                (start + datetime.timedelta(minutes=i)).strftime("%Y%m%d")
+                for i in range(rows)
+            ],
+            "交易时间": [
+                (start + datetime.timedelta(minutes=i)).strftime("%H:%M:%S")
+                for i in range(rows)
+            ],
+            "收入金额": [round(i * 1.37, 2) if i % 2 else None for i in range(rows)],
+            "支出金额": [None if i % 2 else round(i * 0.91, 2) for i in range(rows)],
+            "账户余额": [round(10000 + i * 0.5, 2) for i in range(rows)],
+            "摘要": ["消费" if i % 3 else "转账" for i in range(rows)],
+            "交易流水号": [f"XLSX{i:012d}" for i in range(rows)],
+            "对方户名": [f"对手{i % 500}" for i in range(rows)],
+            "对方账号": [f"6222{i % 500:015d}" for i in range(rows)],
+            "交易渠道": ["网银" if i % 4 else "柜面" for i in range(rows)],
+        }
+    )
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        statement.to_excel(writer, sheet_name="交易明细", index=False)
+        for n in range(1, sheets):
+            statement.head(rows // 4).to_excel(
+                writer, sheet_name=f"附表{n}", index=False
+            )
+
+
+def read_with(engine: str, path: Path) -> tuple[pd.DataFrame, float]:
+    started = time.perf_counter()
+    df = pd.read_excel(path, header=0, dtype=str, engine=engine)
+    return df, time.perf_counter() - started
+
+
+def main(row_counts: list[int], sheets: int) -> None:
+    logger.remove()
+    engines = ["openpyxl"] + (["calamine"] if CALAMINE_AVAILABLE else [])
+    print(f"自动选择的引擎: {parser_service._select_excel_engine('.xlsx')}")
+    print(f"{'rows':>10} | " + " | ".join(f"{e + ' (s)':>14}" for e in engines))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in row_counts:
+            path = Path(tmp) / f"statement_{rows}.xlsx"
+            build_workbook(path, rows, sheets)
+
+            baseline, timings = None, []
+            for engine in engines:
+                df, elapsed = read_with(engine, path)
+                timings.append(elapsed)
+                if baseline is None:
+                    baseline = df
+                else:
+                    pd.testing.assert_frame_equal(df, baseline)
+            print(f"{rows:>10} | " + " | ".join(f"{t:>14.2f}" for t in timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--sheets", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.sheets)
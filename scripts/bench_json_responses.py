@@ -0,0 +1,145 @@
+"""
+对比交易列表接口三种响应序列化方式的吞吐量，并校验三者输出的 JSON 完全相同：
+
+- baseline: 默认 JSONResponse，路由按 response_model 校验 ORM 对象后用 json 编码（原先的做法）
+- orjson:   同样按 response_model 校验，只把响应类换成 ORJSONResponse
+- adapter:  typed_json_response，用 TypeAdapter 从 ORM 对象校验一次后直接编码为字节
+
+请求经由 ASGI 直接发给一个只包含这三个路由的应用，交易是内存中构造的 ORM 对象，
+金额与余额为 Decimal、时间为带时区的 datetime，与数据库读出的对象一致。
+不依赖数据库。
+
+用法:
+    uv run python -m scripts.bench_json_responses
+    uv run python -m scripts.bench_json_responses --sizes 1000 10000 --seconds 5
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import time
+from decimal import Decimal
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.responses import ORJSONResponse, typed_json_response
+from app.models import Account, Counterparty, Transaction
+from app.schemas.transaction import TransactionPublic, transaction_list_adapter
+
+
+def build_transactions(size: int) -> list[Transaction]:
+    accounts = [
+        Account(
+            id=i,
+            account_name=f"基准测试账户{i}",
+            account_number=f"6222{i:012d}",
+            account_type="借记卡",
+            institution="中国工商银行",
+        )
+        for i in range(2)
+    ]
+    counterparties = [
+        Counterparty(
+            id=i,
+            name=f"基准测试对手{i}",
+            account_number=f"6217{i:012d}" if i % 3 else None,
+            counterparty_type="PERSON",
+        )
+        for i in range(200)
+    ]
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    return [
+        Transaction(
+            id=i,
+            transaction_date=start + datetime.timedelta(minutes=i),
+            amount=Decimal(i % 997 * 137 - 50000) / 100,
+            currency="CNY",
+            transaction_type="CREDIT" if i % 2 else "DEBIT",
+            balance_after_txn=Decimal(1000000 + i * 50) / 100 if i % 7 else None,
+            description=f"基准测试交易 {i}",
+            transaction_method="网银",
+            bank_transaction_id=f"BENCH-JSON-{i}",
+            is_cash=i % 50 == 0,
+            location="北京" if i % 3 else None,
+            branch_name=None,
+            category=None,
+            account=accounts[i % 2],
+            counterparty=counterparties[i % 200],
+        )
+        for i in range(size)
+    ]
+
+
+def build_app(transactions: list[Transaction]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get(
+        "/baseline",
+        response_model=list[TransactionPublic],
+        response_class=JSONResponse,
+    )
+    async def baseline():
+        return transactions
+
+    @app.get(
+        "/orjson",
+        response_model=list[TransactionPublic],
+        response_class=ORJSONResponse,
+    )
+    async def with_orjson():
+        return transactions
+
+    @app.get("/adapter", response_model=list[TransactionPublic])
+    async def with_adapter():
+        return typed_json_response(
+            transaction_list_adapter, transactions, from_attributes=True
+        )
+
+    return app
+
+
+async def throughput(client: httpx.AsyncClient, path: str, seconds: float) -> float:
+    """在给定时间内串行发送请求，返回每秒完成的请求数"""
+    await client.get(path)  # 预热
+    count = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        response = await client.get(path)
+        response.raise_for_status()
+        count += 1
+    return count / elapsed
+
+
+async def main(sizes: list[int], seconds: float) -> None:
+    paths = ["/baseline", "/orjson", "/adapter"]
+    print(
+        f"{'rows':>8} | {'baseline (req/s)':>16} | {'orjson (req/s)':>14} | "
+        f"{'adapter (req/s)':>15} | speedup | identical"
+    )
+    for size in sizes:
+        app = build_app(build_transactions(size))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+            bodies = [(await c.get(path)).content for path in paths]
+            identical = all(json.loads(b) == json.loads(bodies[0]) for b in bodies)
+            # 逐字节也一致时说明连数字和时间的格式都没有变化
+            byte_identical = len(set(bodies)) == 1
+            rates = [await throughput(c, path, seconds) for path in paths]
+        print(
+            f"{size:>8} | {rates[0]:>16.1f} | {rates[1]:>14.1f} | {rates[2]:>15.1f} | "
+            f"{rates[2] / rates[0]:>6.1f}x | "
+            f"{'bytes' if byte_identical else 'json' if identical else 'NO'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument(
+        "--seconds", type=float, default=3.0, help="每种方式持续发送请求的秒数"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.seconds))
@@ -0,0 +1,104 @@
+"""
+对比 TransactionRepository 的两种批量入库方式：
+多行 INSERT (bulk_create) 与 COPY 暂存表合并 (bulk_copy)。
+
+需要一个可用的 PostgreSQL（沿用 .env 中的数据库配置）。
+每一轮都在独立事务中执行并最终回滚，不会在数据库中留下任何数据。
+
+用法:
+    uv run python -m scripts.bench_transaction_loader
+    uv run python -m scripts.bench_transaction_loader --sizes 10000 100000
+"""
+
+import argparse
+import asyncio
+import datetime
+import time
+
+from loguru import logger
+
+from app.core.database import (
+    get_session_local,
+    setup_database_connection,
+    shutdown_database_connection,
+)
+from app.models import Account, Counterparty, Person
+from app.repository.transaction import transaction_repository
+
+
+def build_rows(size: int, account_id: int, counterparty_id: int) -> list[dict]:
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    return [
+        {
+            "transaction_date": start + datetime.timedelta(minutes=i),
+            "amount": round((i % 997) * 1.37 - 500, 2),
+            "currency": "CNY",
+            "transaction_type": "CREDIT" if i % 2 else "DEBIT",
+            "balance_after_txn": round(10000 + i * 0.5, 2),
+            "description": f"基准测试交易 {i}",
+            "transaction_method": "网银",
+            "bank_transaction_id": f"BENCH-{size}-{i}",
+            "is_cash": i % 50 == 0,
+            "location": None,
+            "branch_name": None,
+            "category": None,
+            "account_id": account_id,
+            "counterparty_id": counterparty_id,
+        }
+        for i in range(size)
+    ]
+
+
+async def run_once(loader: str, size: int) -> float:
+    """在一个回滚事务中执行一次导入，返回耗时（秒）。"""
+    async with get_session_local()() as session:
+        person = Person(full_name="基准测试用户")
+        account = Account(
+            account_name="基准测试账户", account_number=f"BENCH-{loader}-{size}"
+        )
+        person.accounts.append(account)
+        counterparty = Counterparty(name="基准测试对手", counterparty_type="PERSON")
+        session.add_all([person, counterparty])
+        await session.flush()
+
+        rows = build_rows(size, account.id, counterparty.id)
+        method = getattr(transaction_repository, loader)
+        async with get_session_local()() as partition_session:
+            await transaction_repository.ensure_partitions(
+                partition_session,
+                start=rows[0]["transaction_date"],
+                end=rows[-1]["transaction_date"],
+            )
+
+        started = time.perf_counter()
+        counts = await method(session, transactions_data=rows, commit=False)
+        await transaction_repository.apply_pending_aggregates(session)
+        elapsed = time.perf_counter() - started
+
+        assert counts["inserted"] == size, counts
+        await session.rollback()
+        return elapsed
+
+
+async def main(sizes: list[int]) -> None:
+    logger.remove()
+    await setup_database_connection()
+    try:
+        print(f"{'rows':>10} | {'bulk_create (s)':>16} | {'bulk_copy (s)':>14} | speedup")
+        for size in sizes:
+            insert_time = await run_once("bulk_create", size)
+            copy_time = await run_once("bulk_copy", size)
+            print(
+                f"{size:>10} | {insert_time:>16.2f} | {copy_time:>14.2f} | "
+                f"{insert_time / copy_time:>6.1f}x"
+            )
+    finally:
+        await shutdown_database_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    asyncio.run(main(parser.parse_args().sizes))
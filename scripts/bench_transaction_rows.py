@@ -0,0 +1,165 @@
+"""
+对比交易列表的两种读取方式在大页面下的单次请求耗时与内存峰值：
+ORM 实体 + selectinload + 嵌套的 TransactionPublic（/persons/{id}/transactions），
+与单条 JOIN 的扁平投影 + TypeAdapter 整页序列化（/persons/{id}/transactions/rows）。
+
+请求经由 ASGI 直接发给应用，包含依赖注入、查询、校验和 JSON 序列化的完整过程。
+需要一个已执行全部迁移的 PostgreSQL（沿用 .env 中的数据库配置）。
+数据写在同一个事务中并最终回滚，不会在数据库中留下任何数据。
+
+用法:
+    uv run python -m scripts.bench_transaction_rows
+    uv run python -m scripts.bench_transaction_rows --rows 10000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+import tracemalloc
+
+import httpx
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import (
+    get_db,
+    get_session_local,
+    setup_database_connection,
+    shutdown_database_connection,
+)
+from app.main import app
+from app.models import Account, Counterparty, Person
+from app.repository.transaction import transaction_repository
+
+COUNTERPARTIES = 200
+
+
+async def seed(session: AsyncSession, size: int) -> int:
+    """写入一个有两个账户的用户及 size 条交易，返回用户 id"""
+    person = Person(full_name="基准测试用户")
+    for j in range(2):
+        person.accounts.append(
+            Account(account_name=f"基准测试账户{j}", account_number=f"BENCH-ROWS-{j}")
+        )
+    counterparties = [
+        Counterparty(name=f"基准测试对手{i}", counterparty_type="PERSON")
+        for i in range(COUNTERPARTIES)
+    ]
+    session.add(person)
+    session.add_all(counterparties)
+    await session.flush()
+
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    rows = [
+        {
+            "transaction_date": start + datetime.timedelta(minutes=i),
+            "amount": round((i % 997) * 1.37 - 500, 2),
+            "currency": "CNY",
+            "transaction_type": "CREDIT" if i % 2 else "DEBIT",
+            "balance_after_txn": round(10000 + i * 0.5, 2),
+            "description": f"基准测试交易 {i}",
+            "transaction_method": "网银",
+            "bank_transaction_id": f"BENCH-ROWS-{i}",
+            "is_cash": i % 50 == 0,
+            "location": "北京",
+            "branch_name": None,
+            "category": None,
+            "account_id": person.accounts[i % 2].id,
+            "counterparty_id": counterparties[i % COUNTERPARTIES].id,
+        }
+        for i in range(size)
+    ]
+    # 所需分区在单独的会话中建好并提交，与入库时一样不在写入交易的事务中执行 DDL
+    async with get_session_local()() as partition_session:
+        await transaction_repository.ensure_partitions(
+            partition_session,
+            start=rows[0]["transaction_date"],
+            end=rows[-1]["transaction_date"],
+        )
+    await transaction_repository.bulk_copy(
+        session, transactions_data=rows, commit=False
+    )
+    return person.id
+
+
+async def measure(
+    client: httpx.AsyncClient, url: str, params: dict, repeat: int
+) -> tuple[float, int, int]:
+    """返回 (中位耗时秒数, 单次请求的内存峰值字节数, 响应体字节数)"""
+    await client.get(url, params=params)  # 预热
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(url, params=params)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+    # tracemalloc 本身会拖慢执行，内存单独测一次
+    tracemalloc.start()
+    response = await client.get(url, params=params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak, len(response.content)
+
+
+async def main(size: int, repeat: int) -> None:
+    logger.remove()
+    await setup_database_connection()
+    try:
+        async with get_session_local()() as session:
+            person_id = await seed(session, size)
+
+            async def override_get_db():
+                # 所有请求共用写入数据的会话（数据尚未提交），
+                # 每次请求后清空 identity map，与每个请求一个新会话的情形一致
+                try:
+                    yield session
+                finally:
+                    session.expunge_all()
+
+            app.dependency_overrides[get_db] = override_get_db
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench/api/v1"
+            ) as client:
+                results = {
+                    "orm + nested": await measure(
+                        client,
+                        f"/persons/{person_id}/transactions",
+                        {"limit": size},
+                        repeat,
+                    ),
+                    "flat rows": await measure(
+                        client,
+                        f"/persons/{person_id}/transactions/rows",
+                        {"limit": size},
+                        repeat,
+                    ),
+                }
+            app.dependency_overrides.pop(get_db, None)
+            await session.rollback()
+    finally:
+        await shutdown_database_connection()
+
+    print(f"每页 {size} 条，重复 {repeat} 次取中位数\n")
+    print(f"{'path':<12} | {'latency (ms)':>12} | {'peak mem (MB)':>13} | body (KB)")
+    for name, (latency, peak, body) in results.items():
+        print(
+            f"{name:<12} | {latency * 1000:>12.1f} | {peak / 2**20:>13.1f} | "
+            f"{body / 2**10:>9.0f}"
+        )
+    (orm_latency, orm_peak, _), (row_latency, row_peak, _) = results.values()
+    print(
+        f"\n耗时降低 {orm_latency / row_latency:.1f}x，"
+        f"内存峰值降低 {orm_peak / row_peak:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000, help="每页的交易条数")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
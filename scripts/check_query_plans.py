@@ -0,0 +1,257 @@
+"""
+检查交易相关热点查询的执行计划：先写入一批接近真实规模的数据，
+再对仓库方法实际发出的每条 SQL 执行 EXPLAIN，确认它们走索引而不是顺序扫描大表。
+
+需要一个已执行全部迁移的 PostgreSQL（沿用 .env 中的数据库配置）。
+所有数据都写在同一个事务中并最终回滚，不会在数据库中留下任何数据。
+存在不符合预期的计划时以退出码 1 结束，可以放进 CI。
+
+用法:
+    uv run python -m scripts.check_query_plans
+    uv run python -m scripts.check_query_plans --transactions 1000000 --verbose
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import sys
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import (
+    get_engine,
+    get_session_local,
+    setup_database_connection,
+    shutdown_database_connection,
+)
+from app.models import Account, Counterparty, Person
+from app.repository.account_daily_rollup import account_daily_rollup_repository
+from app.repository.person import person_repository
+from app.repository.person_counterparty_summary import (
+    person_counterparty_summary_repository,
+)
+from app.repository.transaction import transaction_repository
+from app.schemas.transaction import TransactionFilter
+
+# 交易表和按交易累加的汇总表会随数据量持续增长，热点查询不允许对它们做顺序扫描；
+# 用户、账户、对手方这类维度表较小，规划器选择顺序扫描是正常的。
+LARGE_TABLES = {"transaction", "person_counterparty_summary", "account_daily_rollup"}
+
+PERSONS = 50
+ACCOUNTS_PER_PERSON = 2
+COUNTERPARTIES = 5000
+
+
+class StatementRecorder:
+    """记录仓库方法发给数据库的 SQL 及参数，用于之后逐条 EXPLAIN"""
+
+    def __init__(self):
+        self.enabled = False
+        self.statements: list[tuple[str, Any]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled:
+            self.statements.append((statement, parameters))
+
+
+async def seed(session: AsyncSession, transactions: int) -> dict[str, Any]:
+    """写入用户、账户、对手方和交易，返回第一个用户及其账户作为被查询对象"""
+    persons = [Person(full_name=f"执行计划检查用户{i}") for i in range(PERSONS)]
+    for i, person in enumerate(persons):
+        for j in range(ACCOUNTS_PER_PERSON):
+            person.accounts.append(
+                Account(
+                    account_name=f"执行计划检查账户{i}-{j}",
+                    account_number=f"PLAN-{i}-{j}",
+                )
+            )
+    session.add_all(persons)
+    await session.flush()
+    account_ids = [account.id for person in persons for account in person.accounts]
+
+    counterparty_ids = list(
+        await session.scalars(
+            insert(Counterparty).returning(Counterparty.id),
+            [
+                {
+                    "name": f"执行计划检查对手{i}",
+                    "account_number": f"PLAN-CP-{i}" if i % 3 else None,
+                    "counterparty_type": "PERSON",
+                }
+                for i in range(COUNTERPARTIES)
+            ],
+        )
+    )
+
+    start = datetime.datetime(2023, 1, 1, tzinfo=datetime.UTC)
+    rows = [
+        {
+            "transaction_date": start + datetime.timedelta(minutes=i),
+            "amount": round((i % 997) * 1.37 - 500, 2),
+            "currency": "CNY",
+            "transaction_type": "CREDIT" if i % 2 else "DEBIT",
+            "balance_after_txn": round(10000 + i * 0.5, 2),
+            "description": f"执行计划检查交易 {i}",
+            "transaction_method": "网银",
+            "bank_transaction_id": f"PLAN-{i}",
+            "is_cash": i % 50 == 0,
+            "location": None,
+            "branch_name": None,
+            "category": None,
+            "account_id": account_ids[i % len(account_ids)],
+            "counterparty_id": counterparty_ids[(i * 7919) % len(counterparty_ids)],
+        }
+        for i in range(transactions)
+    ]
+    # 所需分区在单独的会话中建好并提交，与入库时一样不在写入交易的事务中执行 DDL
+    async with get_session_local()() as partition_session:
+        await transaction_repository.ensure_partitions(
+            partition_session,
+            start=rows[0]["transaction_date"],
+            end=rows[-1]["transaction_date"],
+        )
+    await transaction_repository.bulk_copy(
+        session, transactions_data=rows, commit=False
+    )
+
+    # 让规划器看到新数据的规模，否则它会按空表估算
+    for table in (
+        "person",
+        "account",
+        "counterparty",
+        '"transaction"',
+        "person_counterparty_summary",
+        "account_daily_rollup",
+    ):
+        await session.execute(text(f"ANALYZE {table}"))
+
+    # 游标取在数据中段，模拟翻到中间某一页
+    return {
+        "person_id": persons[0].id,
+        "account_id": persons[0].accounts[0].id,
+        "cursor": (rows[transactions // 2]["transaction_date"], 0),
+    }
+
+
+def hot_queries(
+    target: dict[str, Any],
+) -> dict[str, Callable[[AsyncSession], Awaitable[Any]]]:
+    """需要检查的热点查询，与 API 调用仓库方法的方式一致"""
+    person_id, account_id = target["person_id"], target["account_id"]
+    return {
+        "账户交易（第一页）": lambda s: transaction_repository.get_multi_by_account_id(
+            s, account_id=account_id
+        ),
+        "账户交易（游标翻页）": lambda s: transaction_repository.get_multi_by_account_id(
+            s, account_id=account_id, after=target["cursor"]
+        ),
+        "用户交易（第一页）": lambda s: transaction_repository.get_multi_by_person_id(
+            s, person_id=person_id
+        ),
+        "用户交易（游标翻页）": lambda s: transaction_repository.get_multi_by_person_id(
+            s, person_id=person_id, after=target["cursor"]
+        ),
+        # 关键字只命中极少数交易，应走 pg_trgm 索引而不是按时间顺序逐行过滤
+        "用户交易（关键字搜索）": lambda s: transaction_repository.get_multi_by_person_id(
+            s, person_id=person_id, filters=TransactionFilter(keyword="检查交易 12345")
+        ),
+        "用户及其账户": lambda s: person_repository.get_with_accounts(
+            s, person_id=person_id
+        ),
+        "对手方汇总": lambda s: person_counterparty_summary_repository.get_by_person_id(
+            s, person_id=person_id
+        ),
+        "账户收支序列（按日）": lambda s: account_daily_rollup_repository.get_series(
+            s, account_id=account_id
+        ),
+        "用户收支序列（按月）": lambda s: account_daily_rollup_repository.get_series(
+            s, person_id=person_id, granularity="month"
+        ),
+    }
+
+
+def iter_plan_nodes(node: dict[str, Any]):
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+async def explain(session: AsyncSession, statement: str, parameters: Any) -> dict:
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    )
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def main(transactions: int, verbose: bool) -> int:
+    logger.remove()
+    await setup_database_connection()
+    recorder = StatementRecorder()
+    event.listen(get_engine().sync_engine, "before_cursor_execute", recorder)
+    failures = 0
+    try:
+        async with get_session_local()() as session:
+            # LC_CTYPE 为 C 时 pg_trgm 不会从中文里切出三元组，关键字索引对中文无效
+            ctype = await session.scalar(
+                text(
+                    "SELECT datctype FROM pg_database "
+                    "WHERE datname = current_database()"
+                )
+            )
+            if ctype in ("C", "POSIX"):
+                failures += 1
+                print(f"[FAIL] 数据库 LC_CTYPE 为 {ctype}，pg_trgm 无法索引中文关键字\n")
+            target = await seed(session, transactions)
+            print(f"已写入 {transactions} 条交易（事务结束后回滚）\n")
+
+            for name, run_query in hot_queries(target).items():
+                recorder.statements.clear()
+                recorder.enabled = True
+                try:
+                    await run_query(session)
+                finally:
+                    recorder.enabled = False
+
+                for statement, parameters in recorder.statements:
+                    plan = await explain(session, statement, parameters)
+                    scans = [
+                        (node["Node Type"], node.get("Relation Name"))
+                        for node in iter_plan_nodes(plan)
+                        if "Relation Name" in node
+                    ]
+                    seq_scans = [
+                        relation
+                        for node_type, relation in scans
+                        if node_type == "Seq Scan" and relation in LARGE_TABLES
+                    ]
+                    failures += bool(seq_scans)
+                    status = f"FAIL 顺序扫描 {', '.join(seq_scans)}" if seq_scans else "OK"
+                    summary = ", ".join(f"{t} on {r}" for t, r in scans)
+                    print(f"[{status}] {name}: {summary}")
+                    if verbose or seq_scans:
+                        print(f"    {' '.join(statement.split())}\n")
+
+            await session.rollback()
+    finally:
+        event.remove(get_engine().sync_engine, "before_cursor_execute", recorder)
+        await shutdown_database_connection()
+
+    print(f"\n{'全部查询均使用索引' if not failures else f'{failures} 条查询出现顺序扫描'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--verbose", action="store_true", help="打印每条 SQL")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.transactions, args.verbose)))
@@ -0,0 +1,48 @@
+"""
+根据交易表重建对手方汇总表 (person_counterparty_summary)。
+
+汇总表在入库和删除账户时增量维护，正常情况下无需重建；
+手工修改过交易数据、或怀疑汇总与交易不一致时运行本脚本。
+重建在一个事务中完成，期间读取汇总表的请求看到的仍是旧数据。
+
+用法:
+    uv run python -m scripts.rebuild_counterparty_summary
+    uv run python -m scripts.rebuild_counterparty_summary --person-id 3
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.database import (
+    get_session_local,
+    setup_database_connection,
+    shutdown_database_connection,
+)
+from app.repository.person_counterparty_summary import (
+    person_counterparty_summary_repository,
+)
+
+
+async def main(person_id: int | None) -> None:
+    await setup_database_connection()
+    try:
+        async with get_session_local()() as session:
+            started = time.perf_counter()
+            rows = await person_counterparty_summary_repository.rebuild(
+                session, person_id=person_id
+            )
+            await session.commit()
+        target = f"用户 {person_id}" if person_id is not None else "全部用户"
+        print(
+            f"已重建{target}的对手方汇总: {rows} 行, "
+            f"耗时 {time.perf_counter() - started:.2f} s"
+        )
+    finally:
+        await shutdown_database_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--person-id", type=int, default=None, help="只重建这个用户")
+    asyncio.run(main(parser.parse_args().person_id))
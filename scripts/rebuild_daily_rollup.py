@@ -0,0 +1,45 @@
+"""
+根据交易表重建账户日汇总表 (account_daily_rollup)。
+
+日汇总在入库时增量维护、随账户级联删除，正常情况下无需重建；
+手工修改过交易数据、或怀疑汇总与交易不一致时运行本脚本。
+
+用法:
+    uv run python -m scripts.rebuild_daily_rollup
+    uv run python -m scripts.rebuild_daily_rollup --account-id 5
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.database import (
+    get_session_local,
+    setup_database_connection,
+    shutdown_database_connection,
+)
+from app.repository.account_daily_rollup import account_daily_rollup_repository
+
+
+async def main(account_id: int | None) -> None:
+    await setup_database_connection()
+    try:
+        async with get_session_local()() as session:
+            started = time.perf_counter()
+            rows = await account_daily_rollup_repository.rebuild(
+                session, account_id=account_id
+            )
+            await session.commit()
+        target = f"账户 {account_id}" if account_id is not None else "全部账户"
+        print(
+            f"已重建{target}的日汇总: {rows} 行, "
+            f"耗时 {time.perf_counter() - started:.2f} s"
+        )
+    finally:
+        await shutdown_database_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--account-id", type=int, default=None, help="只重建这个账户")
+    asyncio.run(main(parser.parse_args().account_id))
@@ -0,0 +1,6 @@
+#!/bin/sh
+# scripts/start_scheduler.sh
+
+# 按任务上的 cron 标签发送定时任务（提前创建交易分区、检查超时的分片），只能运行一个实例
+echo "[scheduler] Starting Taskiq scheduler..."
+exec taskiq scheduler app.core.taskiq_app:scheduler --fs-discover
@@ -4,5 +4,8 @@
 echo "[worker] Fixing ownership of /app/uploads..."
 chown -R appuser:appuser /app/uploads
 
-echo "[worker] Starting Taskiq worker..."
-exec taskiq worker app.core.taskiq_app:broker --log-level INFO --fs-discover
\ No newline at end of file
+# TASKIQ_BROKER 选择消费的队列：broker 为交互队列，bulk_broker 为批量队列
+# TASKIQ_MAX_ASYNC_TASKS 为该 worker 同时执行的任务数
+echo "[worker] Starting Taskiq worker for ${TASKIQ_BROKER:-broker}..."
+exec taskiq worker "app.core.taskiq_app:${TASKIQ_BROKER:-broker}" --log-level INFO --fs-discover \
+    --max-async-tasks "${TASKIQ_MAX_ASYNC_TASKS:-100}"
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+ParserService._clean_and_transform 的黄金输出测试。
+
+期望值由向量化改写之前的逐行实现（DataFrame.apply + 整表 replace）对同样的输入生成，
+覆盖工行（日期时间合一、收支分离列）、中行（日期与时间分离、单金额列 + 借贷标志）、
+缺少日期列和缺少金额列四种格式，逐列比较取值、dtype 和 None 的位置。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.enums import CounterpartyType
+from app.tasks.utils.parser_service import ParserService
+
+
+def utc(value: str) -> pd.Timestamp:
+    return pd.Timestamp(value, tz="UTC")
+
+
+ICBC_FRAME = pd.DataFrame(
+    {
+        "交易时间": [
+            "20240115 09:30:00",
+            "20240116 1805",
+            "not a date",
+            "20240301 00:00:05",
+            "20240302 12:00",
+        ],
+        "收入金额": ["1000.50", None, "20", None, ""],
+        "支出金额": [None, "35.2", None, "500", "12"],
+        "交易余额": ["5000.50", "4965.30", "x", "4465.30", None],
+        "摘要": ["工资", "星巴克咖啡", "退款", "现金支取", None],
+        "对方户名": ["某某科技有限公司", "星巴克", None, "  ", "财付通支付科技有限公司"],
+        "对方账号": ["6222000011112222", None, None, "", None],
+        "交易流水号": ["A1", "A2", "A3", "A4", "A5"],
+        "币种": ["CNY", None, "CNY", "USD", None],
+        "交易渠道": ["网银", "POS", None, "柜面", "现金存款"],
+        "交易发生地": [None, "上海", None, "", "北京"],
+    }
+)
+ICBC_EXPECTED = {
+    "index": [0, 1, 3, 4],
+    "transaction_date": (
+        "datetime64[ns, UTC]",
+        [
+            utc("2024-01-15 01:30:00"),
+            utc("2024-01-16 10:05:00"),
+            utc("2024-02-29 16:00:05"),
+            utc("2024-03-02 04:00:00"),
+        ],
+    ),
+    "amount": ("float64", [1000.5, -35.2, -500.0, -12.0]),
+    "transaction_type": ("object", ["CREDIT", "DEBIT", "DEBIT", "DEBIT"]),
+    "currency": ("object", ["CNY", "CNY", "USD", "CNY"]),
+    "balance_after_txn": ("object", [5000.5, 4965.3, 4465.3, None]),
+    "description": ("object", ["工资", "星巴克咖啡", "现金支取", "无摘要信息"]),
+    "bank_transaction_id": ("object", ["A1", "A2", "A4", "A5"]),
+    "counterparty_name": (
+        "object",
+        ["某某科技有限公司", "星巴克", "  ", "财付通支付科技有限公司"],
+    ),
+    "counterparty_account_number": ("object", ["6222000011112222", None, None, None]),
+    "transaction_method": ("object", ["网银", "POS", "柜面", "现金存款"]),
+    "location": ("object", [None, "上海", None, "北京"]),
+    "branch_name": ("object", [None, None, None, None]),
+    "is_cash": ("bool", [False, False, True, True]),
+}
+
+BOC_FRAME = pd.DataFrame(
+    {
+        "交易日期": ["2024-02-01", "2024-02-02", "2024-02-03", None],
+        "交易时间": ["08:00:00", "23:59:59", None, "10:00:00"],
+        "交易金额": [200.0, -88.8, 50.0, 10.0],
+        "借贷": ["贷", "借", "Credit", "进"],
+        "账户余额": [1200.0, 1111.2, np.nan, 1000.0],
+        "交易附言": ["转账", None, "现金存入", "利息"],
+        "对方账户名称": ["张三", None, "中国银行股份有限公司", None],
+        "对方账户账号": ["6217000000000001", None, None, None],
+        "商户名称": [None, "美团外卖", None, "银联商务"],
+        "凭证号": ["B1", "B2", "B3", "B4"],
+        "现金标志": ["转账", " 现金交易 ", None, "现金交易"],
+        "交易机构": ["北京分行", None, "上海分行", None],
+    }
+)
+BOC_EXPECTED = {
+    "index": [0, 1],
+    "transaction_date": (
+        "datetime64[ns, UTC]",
+        [utc("2024-02-01 00:00:00"), utc("2024-02-02 15:59:59")],
+    ),
+    "amount": ("float64", [200.0, -88.8]),
+    "amount_single": ("float64", [200.0, -88.8]),
+    "transaction_type": ("object", ["CREDIT", "DEBIT"]),
+    "transaction_type_flag": ("object", ["贷", "借"]),
+    "currency": ("object", ["CNY", "CNY"]),
+    "balance_after_txn": ("float64", [1200.0, 1111.2]),
+    "description": ("object", ["转账", "无摘要信息"]),
+    "bank_transaction_id": ("object", ["B1", "B2"]),
+    "counterparty_name": ("object", ["张三", "美团外卖"]),
+    "counterparty_account_number": ("object", ["6217000000000001", None]),
+    "merchant_name": ("object", [None, "美团外卖"]),
+    "is_cash_flag": ("object", ["转账", " 现金交易 "]),
+    "branch_name": ("object", ["北京分行", None]),
+    "location": ("object", [None, None]),
+    "is_cash": ("bool", [False, True]),
+}
+
+NO_DATE_FRAME = pd.DataFrame({"收入金额": ["1"], "支出金额": [None], "摘要": ["x"]})
+NO_DATE_EXPECTED = {
+    "index": [],
+    "transaction_date": ("datetime64[ns, UTC]", []),
+    "amount": ("float64", []),
+    "balance_after_txn": ("float64", []),
+    "is_cash": ("bool", []),
+}
+
+NO_AMOUNT_FRAME = pd.DataFrame(
+    {
+        "交易时间": ["20240401 10:00:00", "20240402 11:00"],
+        "摘要": ["说明", None],
+        "对方户名": ["李四", None],
+    }
+)
+NO_AMOUNT_EXPECTED = {
+    "index": [0, 1],
+    "transaction_date": (
+        "datetime64[ns, UTC]",
+        [utc("2024-04-01 02:00:00"), utc("2024-04-02 03:00:00")],
+    ),
+    # 旧实现的整表 replace 会把这一列变成 object，取值相同；逐列替换后保持 float64
+    "amount": ("float64", [0.0, 0.0]),
+    "transaction_type": ("object", ["UNKNOWN", "UNKNOWN"]),
+    "currency": ("object", ["CNY", "CNY"]),
+    "balance_after_txn": ("object", [None, None]),
+    "description": ("object", ["说明", "无摘要信息"]),
+    "counterparty_name": ("object", ["李四", None]),
+    "bank_transaction_id": ("object", [None, None]),
+    "is_cash": ("bool", [False, False]),
+}
+
+# 每种格式的输出都包含全部标准字段和计算字段
+OUTPUT_COLUMNS = [
+    *ParserService().COLUMN_MAPPING,
+    "transaction_date",
+    "amount",
+    "transaction_type",
+    "is_cash",
+]
+
+
+@pytest.fixture(scope="module")
+def parser() -> ParserService:
+    return ParserService()
+
+
+@pytest.mark.parametrize(
+    ("frame", "expected"),
+    [
+        (ICBC_FRAME, ICBC_EXPECTED),
+        (BOC_FRAME, BOC_EXPECTED),
+        (NO_DATE_FRAME, NO_DATE_EXPECTED),
+        (NO_AMOUNT_FRAME, NO_AMOUNT_EXPECTED),
+    ],
+    ids=["icbc", "boc", "no_date", "no_amount"],
+)
+def test_clean_and_transform_matches_golden_output(parser, frame, expected):
+    cleaned = parser._clean_and_transform(frame.copy())
+
+    assert sorted(cleaned.columns) == sorted(OUTPUT_COLUMNS)
+    assert list(cleaned.index) == expected["index"]
+    columns = {key: value for key, value in expected.items() if key != "index"}
+    for column, (dtype, values) in columns.items():
+        assert str(cleaned[column].dtype) == dtype, column
+        assert cleaned[column].tolist() == values, column
+    # 缺失值统一为 None，object 列中不应残留 NaN、NaT 或空字符串
+    for column in cleaned.columns:
+        if cleaned[column].dtype == object:
+            assert not any(
+                value is not None and (pd.isna(value) or value in ("", "nan"))
+                for value in cleaned[column]
+            ), column
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("某某科技有限公司", CounterpartyType.MERCHANT),
+        ("星巴克", CounterpartyType.PERSON),
+        ("财付通支付科技有限公司", CounterpartyType.PAYMENT_PLATFORM),
+        ("张三", CounterpartyType.PERSON),
+        ("美团外卖", CounterpartyType.PERSON),
+        ("中国银行股份有限公司", CounterpartyType.BANK),
+        ("银联商务", CounterpartyType.BANK),
+        ("未知对手", CounterpartyType.UNKNOWN),
+        ("", CounterpartyType.UNKNOWN),
+    ],
+)
+def test_classify_counterparty_matches_golden_output(parser, name, expected):
+    assert parser._classify_counterparty(name) == expected